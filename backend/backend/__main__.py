@@ -1,10 +1,29 @@
+import os
+import shutil
+
 import uvicorn
 
 from backend.settings import settings
 
 
+def _prepare_metrics_dir() -> None:
+    """
+    Empty the directory shared by workers for metrics.
+
+    Workers find it through PROMETHEUS_MULTIPROC_DIR, it has to be set
+    before they import prometheus_client.
+    """
+    directory = settings.prometheus_multiproc_dir
+    if directory is None:
+        return
+    shutil.rmtree(directory, ignore_errors=True)
+    directory.mkdir(parents=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = str(directory)
+
+
 def main() -> None:
     """Entrypoint of the application."""
+    _prepare_metrics_dir()
     uvicorn.run(
         "backend.web.application:get_app",
         workers=settings.workers_count,
@@ -7,8 +7,25 @@ from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-from backend.db.dependencies.db import get_db_session
+from backend.db.dependencies.db import get_db_read_session, get_db_session
+from backend.db.instrumentation import instrument_engine
 from backend.db.utils import create_database, drop_database
+from backend.services.chat.buffer import MessageBuffer
+from backend.services.chat.dependency import (
+    get_chat_hub,
+    get_event_relay,
+    get_history_cache,
+    get_message_buffer,
+    get_presence_tracker,
+)
+from backend.services.chat.events import EventRelay
+from backend.services.chat.history import HistoryCache
+from backend.services.chat.hub import ChatHub
+from backend.services.chat.presence import PresenceTracker
+from backend.services.ratelimit.dependency import get_rate_limiter
+from backend.services.ratelimit.limiter import RateLimiter
+from backend.services.readiness.dependency import get_readiness_probe
+from backend.services.readiness.probe import ReadinessProbe
 from backend.services.redis.dependency import get_redis_connection
 from backend.settings import settings
 from backend.web.application import get_app
@@ -39,6 +56,7 @@ async def _engine() -> AsyncGenerator[AsyncEngine, None]:
     await create_database()
 
     engine = create_async_engine(str(settings.db_url))
+    instrument_engine(engine)
     async with engine.begin() as conn:
         await conn.run_sync(meta.create_all)
 
@@ -67,11 +85,14 @@ async def dbsession(
         expire_on_commit=False,
         class_=AsyncSession,
     )
-    async with _engine.begin() as connection:
+    async with _engine.connect() as connection:
+        transaction = await connection.begin()
         async with async_session(bind=connection) as session:
             yield session
-            await session.flush()
-            await session.rollback()
+        # commits inside the session don't end the outer transaction,
+        # so everything written by the test is discarded here
+        if transaction.is_active:
+            await transaction.rollback()
 
 
 @pytest.fixture
@@ -84,12 +105,168 @@ async def fake_redis() -> AsyncGenerator[FakeRedis, None]:
     redis = FakeRedis(decode_responses=True)
     yield redis
     await redis.close()
+    # the pool isn't closed with the client, connections left open
+    # are disconnected on garbage collection, by running the event loop
+    await redis.connection_pool.disconnect()
+
+
+@pytest.fixture
+async def chat_hub(fake_redis: FakeRedis) -> AsyncGenerator[ChatHub, None]:
+    """
+    Get chat hub on top of the fake redis.
+
+    :param fake_redis: fake redis instance.
+    :yield: started chat hub.
+    """
+    hub = ChatHub(
+        fake_redis,
+        channel_prefix=settings.chat_channel_prefix,
+        queue_size=settings.chat_send_queue_size,
+    )
+    hub.start()
+    yield hub
+    await hub.close()
+
+
+@pytest.fixture
+async def message_buffer(
+    dbsession: AsyncSession,
+    history_cache: HistoryCache,
+) -> AsyncGenerator[MessageBuffer, None]:
+    """
+    Get write-behind buffer of messages that stores them in the test session.
+
+    :param dbsession: current session.
+    :param history_cache: cache of recent history.
+    :yield: started message buffer.
+    """
+    buffer = MessageBuffer(
+        lambda: dbsession,
+        flush_size=settings.messages_flush_size,
+        flush_interval=settings.messages_flush_interval,
+        max_size=settings.messages_buffer_size,
+        max_retries=settings.messages_flush_retries,
+        history=history_cache,
+    )
+    buffer.start()
+    yield buffer
+    await buffer.close()
+
+
+@pytest.fixture
+async def presence_tracker(
+    fake_redis: FakeRedis,
+    chat_hub: ChatHub,
+) -> AsyncGenerator[PresenceTracker, None]:
+    """
+    Get presence tracker of the chat hub on top of the fake redis.
+
+    :param fake_redis: fake redis instance.
+    :param chat_hub: chat hub.
+    :yield: started presence tracker.
+    """
+    tracker = PresenceTracker(
+        fake_redis,
+        chat_hub,
+        key=settings.presence_key,
+        channel=settings.presence_channel,
+        interval=settings.presence_interval,
+        timeout=settings.presence_timeout,
+    )
+    await tracker.start()
+    yield tracker
+    await tracker.close()
+
+
+@pytest.fixture
+async def event_relay(
+    dbsession: AsyncSession,
+    chat_hub: ChatHub,
+    history_cache: HistoryCache,
+) -> AsyncGenerator[EventRelay, None]:
+    """
+    Get relay of ephemeral events that stores read cursors in the test session.
+
+    Events are delivered and cursors stored only when tests ask for it.
+
+    :param dbsession: current session.
+    :param chat_hub: chat hub.
+    :param history_cache: history cache.
+    :yield: event relay.
+    """
+    relay = EventRelay(
+        chat_hub,
+        history_cache,
+        lambda: dbsession,
+        window=settings.chat_events_window,
+        typing_throttle=settings.chat_typing_throttle,
+        cursor_flush_interval=settings.read_cursors_flush_interval,
+    )
+    yield relay
+    await relay.close()
+
+
+@pytest.fixture
+def history_cache(fake_redis: FakeRedis) -> HistoryCache:
+    """
+    Get chat history cache on top of the fake redis.
+
+    :param fake_redis: fake redis instance.
+    :returns: history cache.
+    """
+    return HistoryCache(
+        fake_redis,
+        prefix=settings.chat_history_cache_prefix,
+        size=settings.chat_history_cache_size,
+        ttl=settings.chat_history_cache_ttl,
+    )
+
+
+@pytest.fixture
+def rate_limiter(fake_redis: FakeRedis) -> RateLimiter:
+    """
+    Get rate limiter on top of the fake redis.
+
+    :param fake_redis: fake redis instance.
+    :returns: rate limiter.
+    """
+    return RateLimiter(
+        fake_redis,
+        prefix=settings.rate_limit_prefix,
+        fallback_seconds=settings.rate_limit_fallback_seconds,
+    )
+
+
+@pytest.fixture
+def readiness_probe(_engine: AsyncEngine, fake_redis: FakeRedis) -> ReadinessProbe:
+    """
+    Get readiness probe of the test database and the fake redis.
+
+    The probe isn't warmed up, tests mark it when they need to.
+
+    :param _engine: current engine.
+    :param fake_redis: fake redis instance.
+    :returns: readiness probe.
+    """
+    return ReadinessProbe(
+        _engine,
+        fake_redis,
+        ttl=settings.ready_check_ttl,
+        timeout=settings.ready_check_timeout,
+    )
 
 
 @pytest.fixture
 def fastapi_app(
     dbsession: AsyncSession,
     fake_redis: FakeRedis,
+    chat_hub: ChatHub,
+    message_buffer: MessageBuffer,
+    history_cache: HistoryCache,
+    presence_tracker: PresenceTracker,
+    event_relay: EventRelay,
+    rate_limiter: RateLimiter,
+    readiness_probe: ReadinessProbe,
 ) -> FastAPI:
     """
     Fixture for creating FastAPI app.
@@ -98,7 +275,15 @@ def fastapi_app(
     """
     application = get_app()
     application.dependency_overrides[get_db_session] = lambda: dbsession
+    application.dependency_overrides[get_db_read_session] = lambda: dbsession
     application.dependency_overrides[get_redis_connection] = lambda: fake_redis
+    application.dependency_overrides[get_chat_hub] = lambda: chat_hub
+    application.dependency_overrides[get_message_buffer] = lambda: message_buffer
+    application.dependency_overrides[get_history_cache] = lambda: history_cache
+    application.dependency_overrides[get_presence_tracker] = lambda: presence_tracker
+    application.dependency_overrides[get_event_relay] = lambda: event_relay
+    application.dependency_overrides[get_rate_limiter] = lambda: rate_limiter
+    application.dependency_overrides[get_readiness_probe] = lambda: readiness_probe
 
     return application
 
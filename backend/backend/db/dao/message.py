@@ -0,0 +1,262 @@
+import logging
+import uuid
+from datetime import date, datetime
+from typing import Any, Optional
+
+from fastapi import Depends
+from sqlalchemy import text, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from backend.db.dependencies.db import get_db_session
+from backend.db.models.message import Message
+
+logger = logging.getLogger(__name__)
+
+IMPORT_TABLE = "messages_import"
+# messages of months without a partition, kept empty by create_partitions
+DEFAULT_PARTITION = "messages_default"
+
+CONVERSATION_NAMESPACE = uuid.UUID("6f0c4bb4-5d8e-4a4e-9a55-3d0f3c1c2f7e")
+
+
+def conversation_id(first: uuid.UUID, second: uuid.UUID) -> uuid.UUID:
+    """Get ID of the direct conversation between two users.
+
+    Args:
+        first (uuid.UUID): One user.
+        second (uuid.UUID): Another user.
+
+    Returns:
+        uuid.UUID: Same ID for both orders of users.
+    """
+
+    low, high = sorted((str(first), str(second)))
+    return uuid.uuid5(CONVERSATION_NAMESPACE, f"{low}:{high}")
+
+
+def partition_name(month: date) -> str:
+    """Get name of the messages partition of the month.
+
+    Args:
+        month (date): Any day of the month.
+
+    Returns:
+        str: Partition table name.
+    """
+
+    return f"messages_{month:%Y_%m}"
+
+
+class MessageDAO:
+    """Class for accessing message table"""
+
+    def __init__(self, session: AsyncSession = Depends(get_db_session)):
+        self.session = session
+
+    async def create_many(self, objs_in: list[dict[str, Any]]) -> set[uuid.UUID]:
+        """Create messages in bulk.
+
+        Rows are loaded into a temporary table with COPY and moved into messages
+        with a single INSERT ... SELECT. Messages of unknown users are skipped
+        instead of failing the batch.
+
+        Args:
+            objs_in (list[dict[str, Any]]): Messages data with all columns set.
+
+        Returns:
+            set[uuid.UUID]: IDs of created messages.
+        """
+
+        if not objs_in:
+            return set()
+
+        columns = [column.name for column in Message.__table__.columns]
+        records = [tuple(obj_in[name] for name in columns) for obj_in in objs_in]
+
+        await self.session.execute(
+            text(f"CREATE TEMP TABLE {IMPORT_TABLE} (LIKE messages)"),
+        )
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.connection.driver_connection.copy_records_to_table(
+            IMPORT_TABLE,
+            records=records,
+            columns=columns,
+        )
+
+        column_list = ", ".join(f"m.{name}" for name in columns)
+        inserted = await self.session.execute(
+            text(
+                f"INSERT INTO messages SELECT {column_list} "  # noqa: S608
+                f"FROM {IMPORT_TABLE} m "
+                "JOIN users s ON s.id = m.sender_id "
+                "JOIN users r ON r.id = m.recipient_id "
+                "ON CONFLICT DO NOTHING RETURNING id",
+            ),
+        )
+        created = set(inserted.scalars().all())
+        await self.session.execute(text(f"DROP TABLE {IMPORT_TABLE}"))
+        await self.session.commit()
+
+        logger.debug(f"Created {len(created)} messages of {len(records)}")
+        return created
+
+    async def get_history(
+        self,
+        conversation: uuid.UUID,
+        limit: int,
+        before: Optional[tuple[datetime, uuid.UUID]] = None,
+    ) -> list[Message]:
+        """Get messages of the conversation, newest first.
+
+        Args:
+            conversation (uuid.UUID): Conversation ID.
+            limit (int): Limit.
+            before (Optional[tuple[datetime, uuid.UUID]]): Keyset position
+                to start before.
+
+        Returns:
+            list[Message]: List of messages.
+        """
+
+        query = select(Message).where(Message.conversation_id == conversation)
+        if before is not None:
+            query = query.where(
+                tuple_(Message.created_at, Message.id) < tuple_(*before)
+            )
+
+        results = await self.session.execute(
+            query.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit),
+        )
+        messages = results.scalars().all()
+
+        logger.debug(f"Got {len(messages)} messages of {conversation}")
+        return messages
+
+    async def get_sent_at(
+        self,
+        conversation: uuid.UUID,
+        obj_id: uuid.UUID,
+    ) -> Optional[datetime]:
+        """Get creation time of a message of the conversation.
+
+        Args:
+            conversation (uuid.UUID): Conversation ID.
+            obj_id (uuid.UUID): ID of message.
+
+        Returns:
+            Optional[datetime]: Creation time or None if the conversation
+                has no such message.
+        """
+
+        return await self.session.scalar(
+            select(Message.created_at).where(
+                Message.id == obj_id,
+                Message.conversation_id == conversation,
+            ),
+        )
+
+    async def create_partitions(self, start: date, months: int) -> list[str]:
+        """Create monthly partitions of messages that don't exist yet.
+
+        Every month is created in its own transaction, a month that fails
+        doesn't roll back the others.
+
+        Args:
+            start (date): Any day of the first month.
+            months (int): Number of months to create partitions for.
+
+        Returns:
+            list[str]: Names of created partitions.
+        """
+
+        created = []
+        month = start.replace(day=1)
+        for _ in range(months):
+            try:
+                if await self.create_partition(month):
+                    created.append(partition_name(month))
+            except SQLAlchemyError as error:
+                await self.session.rollback()
+                logger.error(f"Failed to create {partition_name(month)}: {error}")
+            month = _next_month(month)
+        return created
+
+    async def create_partition(self, month: date) -> bool:
+        """Create partition of the month unless it exists.
+
+        Messages of the month that landed in the default partition are
+        moved into the new one, PostgreSQL refuses to create a partition
+        overlapping rows of the default partition.
+
+        Args:
+            month (date): First day of the month.
+
+        Returns:
+            bool: Whether the partition was created.
+        """
+
+        name = partition_name(month)
+        bounds = f"FOR VALUES FROM ('{month}') TO ('{_next_month(month)}')"
+        if await self._exists(name):
+            await self.session.commit()
+            return False
+
+        # writes into the default partition wait while rows are moved,
+        # workers creating the same partition wait for each other
+        await self.session.execute(
+            text(f"LOCK TABLE {DEFAULT_PARTITION} IN SHARE ROW EXCLUSIVE MODE"),
+        )
+        if await self._exists(name):
+            await self.session.commit()
+            return False
+        in_range = f"created_at >= '{month}' AND created_at < '{_next_month(month)}'"
+        stray = await self.session.scalar(
+            text(f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE {in_range}"),
+        )
+        if not stray:
+            await self.session.execute(
+                text(f"CREATE TABLE {name} PARTITION OF messages {bounds}"),
+            )
+            await self.session.commit()
+            return True
+
+        await self.session.execute(
+            text(f"CREATE TABLE {name} (LIKE messages INCLUDING ALL)"),
+        )
+        await self.session.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "  # noqa: S608
+                f"WHERE {in_range} RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved",
+            ),
+        )
+        await self.session.execute(
+            text(f"ALTER TABLE messages ATTACH PARTITION {name} {bounds}"),
+        )
+        await self.session.commit()
+        logger.warning(f"Moved {stray} messages from {DEFAULT_PARTITION} to {name}")
+        return True
+
+    async def _exists(self, table: str) -> bool:
+        return await self.session.scalar(
+            text("SELECT to_regclass(:table) IS NOT NULL"),
+            {"table": table},
+        )
+
+    async def count_default(self) -> int:
+        """Count messages outside of monthly partitions.
+
+        Returns:
+            int: Number of messages in the default partition.
+        """
+
+        return await self.session.scalar(
+            text(f"SELECT count(*) FROM {DEFAULT_PARTITION}"),  # noqa: S608
+        )
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
@@ -0,0 +1,94 @@
+import logging
+import uuid
+from datetime import datetime
+from typing import Any
+
+from fastapi import Depends
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from backend.db.dao.message import conversation_id
+from backend.db.dependencies.db import get_db_session
+from backend.db.models.read_cursor import ReadCursor
+
+logger = logging.getLogger(__name__)
+
+UPSERT = text(
+    "INSERT INTO read_cursors "
+    "(user_id, conversation_id, last_read_id, last_read_at, updated_at) "
+    "SELECT c.user_id, c.conversation_id, c.last_read_id, c.last_read_at, "
+    ":updated_at FROM unnest("
+    "CAST(:user_ids AS uuid[]), "
+    "CAST(:conversation_ids AS uuid[]), "
+    "CAST(:last_read_ids AS uuid[]), "
+    "CAST(:last_read_ats AS timestamp[])"
+    ") AS c(user_id, conversation_id, last_read_id, last_read_at) "
+    "JOIN users u ON u.id = c.user_id "
+    "ON CONFLICT (user_id, conversation_id) DO UPDATE SET "
+    "last_read_id = excluded.last_read_id, "
+    "last_read_at = excluded.last_read_at, "
+    "updated_at = excluded.updated_at "
+    "WHERE read_cursors.last_read_at < excluded.last_read_at",
+)
+
+
+class ReadCursorDAO:
+    """Class for accessing read_cursors table"""
+
+    def __init__(self, session: AsyncSession = Depends(get_db_session)):
+        self.session = session
+
+    async def upsert_many(self, objs_in: list[dict[str, Any]]) -> None:
+        """Move read cursors forward in bulk.
+
+        All cursors are sent as arrays in a single statement. Cursors of
+        unknown users are skipped, older positions don't overwrite newer ones.
+
+        Args:
+            objs_in (list[dict[str, Any]]): Cursors data, at most one per
+                user and conversation.
+        """
+
+        if not objs_in:
+            return
+
+        await self.session.execute(
+            UPSERT,
+            {
+                "user_ids": [obj_in["user_id"] for obj_in in objs_in],
+                "conversation_ids": [obj_in["conversation_id"] for obj_in in objs_in],
+                "last_read_ids": [obj_in["last_read_id"] for obj_in in objs_in],
+                "last_read_ats": [obj_in["last_read_at"] for obj_in in objs_in],
+                "updated_at": datetime.utcnow(),
+            },
+        )
+        await self.session.commit()
+
+        logger.debug(f"Upserted {len(objs_in)} read cursors")
+
+    async def get_by_conversation(
+        self,
+        first: uuid.UUID,
+        second: uuid.UUID,
+    ) -> list[ReadCursor]:
+        """Get read cursors of both users of their direct conversation.
+
+        Cursors are looked up by user and conversation, which is
+        the primary key, instead of scanning by conversation alone.
+
+        Args:
+            first (uuid.UUID): One user.
+            second (uuid.UUID): Another user.
+
+        Returns:
+            list[ReadCursor]: List of read cursors.
+        """
+
+        results = await self.session.execute(
+            select(ReadCursor).where(
+                ReadCursor.user_id.in_([first, second]),
+                ReadCursor.conversation_id == conversation_id(first, second),
+            ),
+        )
+        return results.scalars().all()
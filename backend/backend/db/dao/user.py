@@ -1,18 +1,169 @@
+import asyncio
 import logging
-from typing import Any, Optional
+from datetime import datetime
+from typing import Any, AsyncIterator, Optional, Sequence
+from uuid import UUID
 
 from fastapi import Depends
+from sqlalchemy import (
+    Text,
+    case,
+    cast,
+    delete,
+    func,
+    insert,
+    inspect,
+    or_,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import JSONB, array
+from sqlalchemy.engine import Result, Row
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from sqlalchemy.sql.elements import ClauseElement, and_
+from sqlalchemy.future import Select, select
+from sqlalchemy.orm import undefer_group
+from sqlalchemy.sql import Executable
+from sqlalchemy.sql.elements import ClauseElement, ColumnElement, and_
 
 from backend.db.dependencies.db import get_db_session
 from backend.db.models.user import User
 from backend.exceptions import InvalidPasswordException, UserNotFoundException
-from backend.security import hash_password, verify_password
+from backend.security import hash_password, hash_passwords, verify_password
+from backend.services.cache.user import user_cache
+from backend.settings import settings
 
 logger = logging.getLogger(__name__)
 
+IMPORT_TABLE = "users_import"
+IMPORT_COLUMNS = [column.name for column in User.__table__.columns]
+# index of id in rows of the import table, after the position
+IMPORT_ID_INDEX = IMPORT_COLUMNS.index("id") + 1
+
+PUBLIC_COLUMNS = (
+    User.id,
+    User.username,
+    User.email,
+    User.first_name,
+    User.last_name,
+    User.is_superuser,
+    User.is_active,
+    User.is_reported,
+    User.is_blocked,
+    User.preferences,
+    User.created_at,
+    User.updated_at,
+)
+
+# Deferred password hash and salt, loaded by authenticate only.
+CREDENTIALS_GROUP = "credentials"
+# Columns loaded into users by default, also returned by writes.
+LOADED_COLUMNS = tuple(
+    column
+    for column in User.__table__.columns
+    if not inspect(User).get_property_by_column(column).deferred
+)
+
+# Columns with trigram indexes, matched by the search.
+SEARCH_COLUMNS = (User.username, User.first_name, User.last_name, User.email)
+
+
+def _column_values(obj_in: dict[str, Any], columns: list[str]) -> list[Any]:
+    """Get values of all user columns, applying column defaults.
+
+    Args:
+        obj_in (dict[str, Any]): User data.
+        columns (list[str]): Names of user columns.
+
+    Returns:
+        list[Any]: Column values.
+    """
+
+    values = []
+    for name in columns:
+        default = User.__table__.c[name].default
+        if name in obj_in or default is None:
+            values.append(obj_in.get(name))
+        elif default.is_callable:
+            values.append(default.arg(None))
+        else:
+            values.append(default.arg)
+    return values
+
+
+async def _hash_chunk(objs_in: list[dict[str, Any]]) -> list[tuple[str, str]]:
+    return await hash_passwords([obj_in["hashed_password"] for obj_in in objs_in])
+
+
+def _import_records(
+    objs_in: list[dict[str, Any]],
+    hashed: list[tuple[str, str]],
+    offset: int,
+) -> list[tuple[Any, ...]]:
+    """Get rows of the import table.
+
+    Args:
+        objs_in (list[dict[str, Any]]): Users data.
+        hashed (list[tuple[str, str]]): Hashed password and salt of every user.
+        offset (int): Position of the first user in the import.
+
+    Returns:
+        list[tuple[Any, ...]]: Position and column values of every user.
+    """
+
+    return [
+        (
+            offset + position,
+            *_column_values(
+                {**obj_in, "hashed_password": hashed_password, "salt": salt},
+                IMPORT_COLUMNS,
+            ),
+        )
+        for position, (obj_in, (hashed_password, salt)) in enumerate(
+            zip(objs_in, hashed),
+        )
+    ]
+
+
+def _page_query(
+    query: Select,
+    expr: Optional[ClauseElement | list[ClauseElement]],
+    offset: Optional[int],
+    limit: Optional[int],
+    after: Optional[tuple[datetime, UUID]],
+) -> Select:
+    if expr is None:
+        expr = []
+    elif isinstance(expr, ClauseElement):
+        expr = [expr]
+
+    if after is not None:
+        expr = [*expr, tuple_(User.created_at, User.id) > tuple_(*after)]
+
+    return (
+        query.where(and_(True, *expr))
+        .order_by(User.created_at, User.id)
+        .offset(offset)
+        .limit(limit)
+    )
+
+
+def _version_query(obj_id: UUID) -> Select:
+    return select(User.updated_at).where(User.id == obj_id)
+
+
+def _credentials_query(username: str) -> Select:
+    return (
+        select(User)
+        .where(User.username == username)
+        .options(undefer_group(CREDENTIALS_GROUP))
+    )
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
 
 class UserDAO:
     """Class for accessing user table"""
@@ -42,37 +193,175 @@ class UserDAO:
         logger.debug(f"Got user {db_obj.username}")
         return db_obj
 
+    async def get_version(self, obj_id: UUID) -> datetime:
+        """Get last update time of user without loading the whole row.
+
+        Users cached by this worker are answered without a query.
+
+        Args:
+            obj_id (UUID): ID of user.
+
+        Raises:
+            UserNotFoundException: User not found.
+
+        Returns:
+            datetime: Last update time of the user.
+        """
+
+        cached = user_cache.get(str(obj_id))
+        if cached is not None:
+            return cached.updated_at
+
+        updated_at = await self.session.scalar(_version_query(obj_id))
+        if updated_at is None:
+            raise UserNotFoundException(f"User {obj_id} not found")
+        return updated_at
+
+    async def warm_up(self, page_columns: Sequence[ColumnElement]) -> None:
+        """Run the hottest user queries once, matching no rows.
+
+        Their SQL gets compiled and, unless statement caching is off,
+        prepared on the connection of the session.
+
+        Args:
+            page_columns (Sequence[ColumnElement]): Columns of listed users.
+        """
+
+        nil = UUID(int=0)
+        await self.session.get(User, nil)
+        await self.session.scalar(_version_query(nil))
+        await self.session.execute(_credentials_query(""))
+        await self.get_multi_rows(page_columns, limit=0)
+        await self.get_multi_rows(page_columns, limit=0, after=(datetime.min, nil))
+
     async def get_multi(
         self,
         expr: Optional[ClauseElement | list[ClauseElement]] = None,
         offset: Optional[int] = 0,
         limit: Optional[int] = 100,
+        after: Optional[tuple[datetime, UUID]] = None,
     ) -> list[User]:
-        """Get multiple users.
+        """Get multiple users ordered by creation time.
 
         Args:
             expr (Optional[ClauseElement | list[ClauseElement]]): Filter expression.
             offset (Optional[int]): Offset.
             limit (Optional[int]): Limit.
+            after (Optional[tuple[datetime, UUID]]): Keyset position to start after.
 
         Returns:
             list[User]: List of users.
         """
 
-        if expr is None:
-            expr = []
-        elif isinstance(expr, ClauseElement):
-            expr = [expr]
-
-        query = select(User).where(and_(True, *expr)).offset(offset).limit(limit)
+        query = _page_query(select(User), expr, offset, limit, after)
         results = await self.session.execute(query)
         users = results.scalars().all()
 
         logger.debug(f"Got {len(users)} users")
         return users
 
+    async def get_multi_rows(
+        self,
+        columns: Sequence[ColumnElement],
+        expr: Optional[ClauseElement | list[ClauseElement]] = None,
+        offset: Optional[int] = 0,
+        limit: Optional[int] = 100,
+        after: Optional[tuple[datetime, UUID]] = None,
+    ) -> list[Row]:
+        """Get columns of multiple users ordered by creation time.
+
+        Same page as ``get_multi``, but as plain row tuples, no ORM objects
+        are built.
+
+        Args:
+            columns (Sequence[ColumnElement]): Columns to select.
+            expr (Optional[ClauseElement | list[ClauseElement]]): Filter expression.
+            offset (Optional[int]): Offset.
+            limit (Optional[int]): Limit.
+            after (Optional[tuple[datetime, UUID]]): Keyset position to start after.
+
+        Returns:
+            list[Row]: Rows of the selected columns.
+        """
+
+        query = _page_query(select(*columns), expr, offset, limit, after)
+        rows = (await self.session.execute(query)).all()
+
+        logger.debug(f"Got {len(rows)} user rows")
+        return rows
+
+    async def search(self, query: str, limit: int) -> list[User]:
+        """Find users by username, names or email, best matches first.
+
+        Users with a column starting with the query come first, the shorter
+        the matching value the better. The rest of the page is filled with
+        users having a word similar to the query, ranked by similarity.
+        Both lookups are served by the trigram indexes, similarity is only
+        computed when prefixes don't fill the page.
+
+        Args:
+            query (str): Search query.
+            limit (int): Limit.
+
+        Returns:
+            list[User]: List of users.
+        """
+
+        pattern = _escape_like(query) + "%"
+        prefixes = [column.ilike(pattern, escape="\\") for column in SEARCH_COLUMNS]
+        length = func.least(
+            *(
+                case((prefix, func.char_length(column)))
+                for prefix, column in zip(prefixes, SEARCH_COLUMNS)
+            ),
+        )
+        results = await self.session.execute(
+            select(User)
+            .where(or_(*prefixes))
+            .order_by(length, User.username)
+            .limit(limit),
+        )
+        users = results.scalars().all()
+
+        if len(users) < limit:
+            similarity = func.greatest(
+                *(func.word_similarity(query, column) for column in SEARCH_COLUMNS),
+            )
+            results = await self.session.execute(
+                select(User)
+                .where(or_(*(column.bool_op("%>")(query) for column in SEARCH_COLUMNS)))
+                .where(User.id.notin_([user.id for user in users]))
+                .order_by(similarity.desc(), User.username)
+                .limit(limit - len(users)),
+            )
+            users = [*users, *results.scalars().all()]
+
+        logger.debug(f"Found {len(users)} users by {query!r}")
+        return users
+
+    async def stream_public_rows(self, chunk_size: int) -> AsyncIterator[list[Row]]:
+        """Stream public columns of all users through a server-side cursor.
+
+        Rows are plain tuples, no ORM objects are built, so memory usage
+        depends only on the chunk size.
+
+        Args:
+            chunk_size (int): Rows fetched per round trip.
+
+        Yields:
+            list[Row]: Chunk of rows ordered by creation time.
+        """
+
+        query = select(*PUBLIC_COLUMNS).order_by(User.created_at, User.id)
+        result = await self.session.stream(query)
+        try:
+            async for chunk in result.partitions(chunk_size):
+                yield chunk
+        finally:
+            await result.close()
+
     async def create(self, obj_in: dict[str, Any]) -> User:
-        """Create user.
+        """Create user with a single INSERT ... RETURNING statement.
 
         Args:
             obj_in (dict[str, Any]): User data.
@@ -81,56 +370,237 @@ class UserDAO:
             User: User object.
         """
 
-        obj_in["hashed_password"], obj_in["salt"] = hash_password(
+        obj_in["hashed_password"], obj_in["salt"] = await hash_password(
             obj_in["hashed_password"],
         )
 
-        db_obj = User(**obj_in)
-        self.session.add(db_obj)
+        query = select(User).from_statement(
+            insert(User).values(**obj_in).returning(*LOADED_COLUMNS),
+        )
+        db_obj = (await self._execute_write(query)).scalar_one()
         await self.session.commit()
-        await self.session.refresh(db_obj)
 
         logger.debug(f"Created user {db_obj.username}")
         return db_obj
 
+    async def create_many(self, objs_in: list[dict[str, Any]]) -> list[int]:
+        """Create users in bulk.
+
+        Rows are handled in chunks: passwords of a chunk are hashed and the rows
+        are loaded into a temporary table with COPY, while passwords of the next
+        chunk are being hashed. Then all rows are moved into users with a single
+        INSERT ... SELECT. Rows whose username or email is already taken are
+        skipped instead of failing the batch.
+
+        Args:
+            objs_in (list[dict[str, Any]]): Users data.
+
+        Returns:
+            list[int]: Indexes of rows skipped because of conflicts.
+        """
+
+        if not objs_in:
+            return []
+
+        await self.session.execute(
+            text(
+                f"CREATE TEMP TABLE {IMPORT_TABLE} "
+                "(import_position integer, LIKE users)",
+            ),
+        )
+        ids = await self._copy_import_rows(objs_in, settings.users_import_chunk_size)
+
+        column_list = ", ".join(IMPORT_COLUMNS)
+        inserted = await self.session.execute(
+            text(
+                f"INSERT INTO users ({column_list}) "  # noqa: S608
+                f"SELECT {column_list} FROM {IMPORT_TABLE} ORDER BY import_position "
+                "ON CONFLICT DO NOTHING RETURNING id",
+            ),
+        )
+        inserted_ids = set(inserted.scalars().all())
+        await self.session.execute(text(f"DROP TABLE {IMPORT_TABLE}"))
+        await self.session.commit()
+
+        conflicts = [
+            position
+            for position, obj_id in enumerate(ids)
+            if obj_id not in inserted_ids
+        ]
+        logger.debug(f"Created {len(inserted_ids)} users, skipped {len(conflicts)}")
+        return conflicts
+
     async def update(self, obj_in: dict[str, Any], obj_id: str) -> User:
-        """Update user.
+        """Update user with a single UPDATE ... RETURNING statement.
 
         Args:
             obj_in (dict[str, Any]): User data.
             obj_id (str): ID of user to update.
 
+        Raises:
+            UserNotFoundException: User not found.
+
         Returns:
             User: User object.
         """
 
-        db_obj = await self.get(obj_id)
-
         if "hashed_password" in obj_in:
-            hashed_password, salt = hash_password(obj_in["hashed_password"])
+            hashed_password, salt = await hash_password(obj_in["hashed_password"])
             obj_in.update({"hashed_password": hashed_password, "salt": salt})
 
-        for field in obj_in:
-            setattr(db_obj, field, obj_in[field])
+        query = (
+            select(User)
+            .from_statement(
+                update(User)
+                .where(User.id == obj_id)
+                .values(**obj_in)
+                .returning(*LOADED_COLUMNS),
+            )
+            .execution_options(populate_existing=True)
+        )
+        db_obj = (await self._execute_write(query)).scalar_one_or_none()
+
+        if not db_obj:
+            logger.error(f"User {obj_id} not found")
+            raise UserNotFoundException(f"User {obj_id} not found")
 
-        self.session.add(db_obj)
         await self.session.commit()
-        await self.session.refresh(db_obj)
+        await user_cache.invalidate(obj_id)
 
         logger.debug(f"Updated user {db_obj.username}")
         return db_obj
 
+    async def update_preferences(self, changes: dict[str, Any], obj_id: str) -> User:
+        """Merge changes into preferences of user without reading them first.
+
+        Top-level keys are set to the new values, keys set to None are removed,
+        as in JSON Merge Patch. The merge happens in a single UPDATE, so
+        concurrent changes of different keys don't overwrite each other.
+
+        Args:
+            changes (dict[str, Any]): Changed preferences.
+            obj_id (str): ID of user to update.
+
+        Raises:
+            UserNotFoundException: User not found.
+
+        Returns:
+            User: User object.
+        """
+
+        current = func.coalesce(User.preferences, cast({}, JSONB))
+        merged = current.op("||", return_type=JSONB)(
+            cast(
+                {key: value for key, value in changes.items() if value is not None},
+                JSONB,
+            ),
+        )
+        removed = [key for key, value in changes.items() if value is None]
+        if removed:
+            merged = merged.op("-", return_type=JSONB)(array(removed, type_=Text))
+
+        query = (
+            select(User)
+            .from_statement(
+                update(User)
+                .where(User.id == obj_id)
+                .values(preferences=merged)
+                .returning(*LOADED_COLUMNS),
+            )
+            .execution_options(populate_existing=True)
+        )
+        db_obj = (await self.session.execute(query)).scalar_one_or_none()
+
+        if not db_obj:
+            logger.error(f"User {obj_id} not found")
+            raise UserNotFoundException(f"User {obj_id} not found")
+
+        await self.session.commit()
+        await user_cache.invalidate(obj_id)
+
+        logger.debug(f"Updated preferences of user {db_obj.username}")
+        return db_obj
+
     async def delete(self, obj_id: str) -> None:
-        """Delete user.
+        """Delete user with a single DELETE ... RETURNING statement.
 
         Args:
             obj_id (str): ID of user to delete.
+
+        Raises:
+            UserNotFoundException: User not found.
         """
 
-        db_obj = await self.get(obj_id)
-        await self.session.delete(db_obj)
+        query = delete(User).where(User.id == obj_id).returning(User.username)
+        username = (await self.session.execute(query)).scalar_one_or_none()
+
+        if not username:
+            logger.error(f"User {obj_id} not found")
+            raise UserNotFoundException(f"User {obj_id} not found")
+
         await self.session.commit()
-        logger.debug(f"Deleted user {db_obj.username}")
+        await user_cache.invalidate(obj_id)
+        logger.debug(f"Deleted user {username}")
+
+    async def _execute_write(self, query: Executable) -> Result:
+        """Execute write statement, rolling back on constraint violations.
+
+        Args:
+            query (Executable): Statement to execute.
+
+        Raises:
+            IntegrityError: Statement violates a constraint.
+
+        Returns:
+            Result: Statement result.
+        """
+
+        try:
+            return await self.session.execute(query)
+        except IntegrityError:
+            await self.session.rollback()
+            raise
+
+    async def _copy_import_rows(
+        self,
+        objs_in: list[dict[str, Any]],
+        chunk_size: int,
+    ) -> list[UUID]:
+        """COPY users into the import table chunk by chunk.
+
+        Args:
+            objs_in (list[dict[str, Any]]): Users data.
+            chunk_size (int): Rows hashed and copied at once.
+
+        Returns:
+            list[UUID]: ID of every row.
+        """
+
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.connection.driver_connection
+        chunks = [
+            objs_in[start : start + chunk_size]
+            for start in range(0, len(objs_in), chunk_size)
+        ]
+
+        ids: list[UUID] = []
+        hashing = asyncio.ensure_future(_hash_chunk(chunks[0]))
+        try:
+            for number, chunk in enumerate(chunks):
+                hashed = await hashing
+                if number + 1 < len(chunks):
+                    hashing = asyncio.ensure_future(_hash_chunk(chunks[number + 1]))
+                records = _import_records(chunk, hashed, len(ids))
+                ids.extend(record[IMPORT_ID_INDEX] for record in records)
+                await driver_connection.copy_records_to_table(
+                    IMPORT_TABLE,
+                    records=records,
+                    columns=["import_position", *IMPORT_COLUMNS],
+                )
+        finally:
+            hashing.cancel()
+        return ids
 
     async def get_by_expr(self, expr: ClauseElement | list[ClauseElement]) -> User:
         """Get user by expression.
@@ -162,6 +632,8 @@ class UserDAO:
     async def authenticate(self, username: str, password: str) -> User:
         """Authenticate user.
 
+        The only query loading password hash and salt of the user.
+
         Args:
             username (str): Username.
             password (str): Password.
@@ -174,13 +646,14 @@ class UserDAO:
             User: User object.
         """
 
-        user = await self.get_by_expr(User.username == username)
+        results = await self.session.execute(_credentials_query(username))
+        user = results.scalar()
 
         if not user:
             logger.error(f"User {username} not found")
             raise UserNotFoundException(f"User {username} not found")
 
-        if not verify_password(password, user.salt, user.hashed_password):
+        if not await verify_password(password, user.salt, user.hashed_password):
             logger.error(f"User {username} password incorrect")
             raise InvalidPasswordException(f"User {username} password incorrect")
 
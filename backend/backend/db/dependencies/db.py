@@ -1,22 +1,69 @@
 from typing import AsyncGenerator
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
-from starlette.requests import Request
+from sqlalchemy.orm import ORMExecuteState
+from starlette.requests import HTTPConnection
 
+# set in Session.info once the session executes anything but a SELECT
+_WROTE = "wrote"
 
-async def get_db_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+
+async def get_db_session(request: HTTPConnection) -> AsyncGenerator[AsyncSession, None]:
     """Create and get database session.
 
+    The session is committed only if the request left pending changes
+    in it or executed statements other than SELECTs, such as Core
+    INSERTs and UPDATEs, otherwise closing it just ends the transaction.
+    Statements run on ``session.connection()`` directly aren't tracked,
+    requests that use it must commit themselves.
+
     Args:
-        request (Request): FastAPI request object.
+        request (HTTPConnection): FastAPI request or WebSocket.
 
     Yields:
         AsyncSession: Database session.
     """
     session: AsyncSession = request.app.state.db_session_factory()
+    event.listen(session.sync_session, "do_orm_execute", _track_writes)
 
     try:  # noqa: WPS501
         yield session
+        await _commit_pending(session)
+    finally:
+        await session.close()
+
+
+async def get_db_read_session(
+    request: HTTPConnection,
+) -> AsyncGenerator[AsyncSession, None]:
+    """Create and get database session for read-mostly requests.
+
+    SELECTs run in a read-only transaction on a healthy read replica
+    or on the primary until the session writes, after that everything
+    goes to the primary. It's committed the same way as in get_db_session.
+
+    Args:
+        request (HTTPConnection): FastAPI request or WebSocket.
+
+    Yields:
+        AsyncSession: Database session.
+    """
+    session: AsyncSession = request.app.state.db_read_session_factory()
+    event.listen(session.sync_session, "do_orm_execute", _track_writes)
+
+    try:  # noqa: WPS501
+        yield session
+        await _commit_pending(session)
     finally:
-        await session.commit()
         await session.close()
+
+
+def _track_writes(orm_execute_state: ORMExecuteState) -> None:
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info[_WROTE] = True
+
+
+async def _commit_pending(session: AsyncSession) -> None:
+    if session.new or session.dirty or session.deleted or session.info.get(_WROTE):
+        await session.commit()
@@ -0,0 +1,20 @@
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db.dao.message import MessageDAO
+from backend.db.dependencies.db import get_db_read_session
+
+
+def get_message_read_dao(
+    session: AsyncSession = Depends(get_db_read_session),
+) -> MessageDAO:
+    """Get message DAO that reads from replicas.
+
+    Args:
+        session (AsyncSession): Read session.
+
+    Returns:
+        MessageDAO: Message DAO.
+    """
+
+    return MessageDAO(session)
@@ -0,0 +1,20 @@
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db.dao.read_cursor import ReadCursorDAO
+from backend.db.dependencies.db import get_db_read_session
+
+
+def get_read_cursor_read_dao(
+    session: AsyncSession = Depends(get_db_read_session),
+) -> ReadCursorDAO:
+    """Get read cursor DAO that reads from replicas.
+
+    Args:
+        session (AsyncSession): Read session.
+
+    Returns:
+        ReadCursorDAO: Read cursor DAO.
+    """
+
+    return ReadCursorDAO(session)
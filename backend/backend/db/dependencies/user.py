@@ -3,31 +3,63 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from jose.exceptions import JWTError
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.db.dao.user import UserDAO
+from backend.db.dependencies.db import get_db_read_session
 from backend.db.models.user import User
 from backend.exceptions import UserNotFoundException
+from backend.services.cache.user import user_cache
 from backend.settings import settings
 
 reusable_oauth2 = OAuth2PasswordBearer(tokenUrl=f"/api/auth/access-token")
 
 
+def get_user_read_dao(
+    session: AsyncSession = Depends(get_db_read_session),
+) -> UserDAO:
+    """Get user DAO that reads from replicas until it writes.
+
+    Args:
+        session (AsyncSession): Read session.
+
+    Returns:
+        UserDAO: User DAO.
+    """
+
+    return UserDAO(session)
+
+
 async def get_current_user(
     user_dao: UserDAO = Depends(),
     token: str = Depends(reusable_oauth2),
 ) -> User:
     """Get current user.
 
+    Cache misses are loaded from the primary, see get_cached_user.
+
+    Args:
+        user_dao (UserDAO): User DAO on the primary.
+        token (str): JWT token.
+
+    Returns:
+        User: Current user.
+    """
+
+    return await get_cached_user(get_token_subject(token), user_dao)
+
+
+def get_token_subject(token: str) -> str:
+    """Get ID of the user the token was issued to.
+
     Args:
-        user_dao (UserDAO): User DAO.
         token (str): JWT token.
 
     Raises:
         HTTPException: Incorrect token.
-        HTTPException: User not found.
 
     Returns:
-        User: Current user.
+        str: User ID.
     """
 
     try:
@@ -43,8 +75,30 @@ async def get_current_user(
             detail="Could not validate credentials",
         )
 
+    return token_data["sub"]
+
+
+async def get_cached_user(user_id: str, user_dao: UserDAO) -> User:
+    """Get user by id.
+
+    Users are served from the per-worker cache when possible,
+    concurrent misses of the same user share one query. The DAO
+    must read from the primary, a replica lagging behind could
+    put a row changed before the last invalidation back in cache.
+
+    Args:
+        user_id (str): User ID.
+        user_dao (UserDAO): User DAO on the primary.
+
+    Raises:
+        HTTPException: User not found.
+
+    Returns:
+        User: User.
+    """
+
     try:
-        return await user_dao.get(token_data["sub"])
+        return await user_cache.load(user_id, user_dao.get)
     except UserNotFoundException as error:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,127 @@
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from backend.services.metrics.prometheus import DB_N_PLUS_ONE, DB_SLOW_QUERIES
+from backend.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# quoted literals inlined into statements may carry user data as well
+_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+
+class QueryStats:
+    """Statements run while serving a single request."""
+
+    __slots__ = ("request", "queries", "seconds", "statements")
+
+    def __init__(self, request: str):
+        self.request = request
+        self.queries = 0
+        self.seconds = 0.0
+        self.statements: dict[str, int] = {}
+
+
+# stats of the request being served, None outside of requests
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats",
+    default=None,
+)
+
+
+@contextmanager
+def collect_queries(request: str) -> Iterator[QueryStats]:
+    """
+    Count statements run within the block as ones of a request.
+
+    :param request: description of the request for N+1 warnings.
+    :yields: stats of the request, updated as statements run.
+    """
+    stats = QueryStats(request)
+    token = query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        query_stats.reset(token)
+
+
+def redact(statement: str, parameters: Any, executemany: bool) -> str:
+    """
+    Describe statement for logs without values of its parameters.
+
+    :param statement: SQL statement.
+    :param parameters: parameters the statement was run with.
+    :param executemany: whether the statement ran once per set of parameters.
+    :return: statement with literals and parameters replaced.
+    """
+    statement = _LITERAL.sub("'?'", " ".join(statement.split()))
+    count = len(parameters) if parameters else 0
+    if executemany:
+        return f"{statement} [{count} parameter sets redacted]"
+    return f"{statement} [{count} parameters redacted]"
+
+
+def _before_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    context.query_start = time.perf_counter()
+
+
+def _after_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    elapsed = time.perf_counter() - context.query_start
+
+    if elapsed >= settings.db_slow_query_seconds:
+        DB_SLOW_QUERIES.inc()
+        logger.warning(
+            f"Slow query took {elapsed * 1000:.1f} ms: "
+            f"{redact(statement, parameters, executemany)}",
+        )
+
+    stats = query_stats.get()
+    if stats is None:
+        return
+    stats.queries += 1
+    stats.seconds += elapsed
+    repeats = stats.statements.get(statement, 0) + 1
+    stats.statements[statement] = repeats
+    # warned once per statement, when it reaches the threshold
+    if repeats == settings.db_n_plus_one_threshold:
+        DB_N_PLUS_ONE.inc()
+        logger.warning(
+            f"Possible N+1 queries, {stats.request} repeated a statement "
+            f"{repeats} times: {redact(statement, parameters, executemany)}",
+        )
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Time statements of the engine and count them per request.
+
+    Statements slower than the threshold from settings are logged
+    with parameters redacted wherever they run. Within requests,
+    which set :data:`query_stats`, statements are counted and
+    repeating one is reported as possible N+1 queries.
+
+    :param engine: engine to instrument.
+    """
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_execute)
@@ -1,5 +1,6 @@
 import asyncio
 from logging.config import fileConfig
+from typing import Any, Optional
 
 from alembic import context
 from sqlalchemy.ext.asyncio.engine import create_async_engine
@@ -32,6 +33,29 @@ target_metadata = meta
 # ... etc.
 
 
+def include_object(
+    obj: Any,
+    name: Optional[str],
+    type_: str,
+    reflected: bool,
+    compare_to: Any,
+) -> bool:
+    """
+    Skip partitions of messages, they are managed by the application.
+
+    :param obj: schema item.
+    :param name: name of the item.
+    :param type_: kind of the item.
+    :param reflected: whether the item was reflected from the database.
+    :param compare_to: matching item of the metadata.
+    :returns: whether autogenerate should compare the item.
+    """
+    table = obj if type_ == "table" else getattr(obj, "table", None)
+    if not reflected or table is None or compare_to is not None:
+        return True
+    return not table.name.startswith("messages_")
+
+
 async def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -47,6 +71,7 @@ async def run_migrations_offline() -> None:
     context.configure(
         url=str(settings.db_url),
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -61,7 +86,11 @@ def do_run_migrations(connection: Connection) -> None:
 
     :param connection: connection to the database.
     """
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
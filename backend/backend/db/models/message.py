@@ -0,0 +1,49 @@
+import datetime
+import uuid
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+from backend.db.base import Base
+
+
+class Message(Base):
+    __tablename__ = "messages"
+    __table_args__ = (
+        sa.Index(
+            "ix_messages_conversation_id_created_at_id",
+            "conversation_id",
+            "created_at",
+            "id",
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id = sa.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    created_at = sa.Column(
+        sa.DateTime,
+        primary_key=True,
+        default=datetime.datetime.utcnow,
+    )
+    conversation_id = sa.Column(UUID(as_uuid=True), nullable=False)
+    sender_id = sa.Column(
+        UUID(as_uuid=True),
+        sa.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    recipient_id = sa.Column(
+        UUID(as_uuid=True),
+        sa.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    text = sa.Column(sa.Text, nullable=False)
+
+
+# Rows outside of the monthly partitions land here instead of failing.
+sa.event.listen(
+    Message.__table__,
+    "after_create",
+    sa.DDL("CREATE TABLE messages_default PARTITION OF messages DEFAULT"),
+)
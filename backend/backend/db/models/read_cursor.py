@@ -0,0 +1,28 @@
+import datetime
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+from backend.db.base import Base
+
+
+class ReadCursor(Base):
+    """Newest message of a conversation the user has seen."""
+
+    __tablename__ = "read_cursors"
+
+    user_id = sa.Column(
+        UUID(as_uuid=True),
+        sa.ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    conversation_id = sa.Column(UUID(as_uuid=True), primary_key=True)
+    last_read_id = sa.Column(UUID(as_uuid=True), nullable=False)
+    # creation time of the last read message, cursors only move forward
+    last_read_at = sa.Column(sa.DateTime, nullable=False)
+    updated_at = sa.Column(
+        sa.DateTime,
+        nullable=False,
+        default=datetime.datetime.utcnow,
+        onupdate=datetime.datetime.utcnow,
+    )
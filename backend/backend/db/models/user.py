@@ -2,25 +2,56 @@ import datetime
 import uuid
 
 import sqlalchemy as sa
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import deferred
 
 from backend.db.base import Base
 
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        sa.Index("ix_users_created_at_id", "created_at", "id"),
+        *(
+            sa.Index(
+                f"ix_users_{column}_trgm",
+                column,
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+            )
+            for column in ("username", "first_name", "last_name", "email")
+        ),
+        # Serves containment (@>) filters by preferences.
+        sa.Index(
+            "ix_users_preferences",
+            "preferences",
+            postgresql_using="gin",
+            postgresql_ops={"preferences": "jsonb_path_ops"},
+        ),
+        # Preferences are merged key by key, see UserDAO.update_preferences.
+        sa.CheckConstraint(
+            "jsonb_typeof(preferences) = 'object'",
+            name="ck_users_preferences_object",
+        ),
+    )
 
     id = sa.Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
     username = sa.Column(sa.String(32), nullable=False, unique=True, index=True)
     email = sa.Column(sa.String, nullable=False, unique=True, index=True)
-    hashed_password = sa.Column(sa.String, nullable=False)
+    # Credentials are only loaded on request, see UserDAO.authenticate.
+    # Touching them on a user loaded without them raises instead of querying.
+    hashed_password = deferred(
+        sa.Column(sa.String, nullable=False),
+        group="credentials",
+        raiseload=True,
+    )
     first_name = sa.Column(sa.String)
     last_name = sa.Column(sa.String)
     is_superuser = sa.Column(sa.Boolean, nullable=False, default=False)
     is_active = sa.Column(sa.Boolean, nullable=False, default=True)
     is_reported = sa.Column(sa.Boolean, nullable=False, default=False)
     is_blocked = sa.Column(sa.Boolean, nullable=False, default=False)
-    preferences = sa.Column(sa.Text)
+    preferences = sa.Column(JSONB)
     created_at = sa.Column(
         sa.DateTime,
         nullable=False,
@@ -32,4 +63,16 @@ class User(Base):
         default=datetime.datetime.utcnow,
         onupdate=datetime.datetime.utcnow,
     )
-    salt = sa.Column(sa.String, nullable=False)
+    salt = deferred(
+        sa.Column(sa.String, nullable=False),
+        group="credentials",
+        raiseload=True,
+    )
+
+
+# Trigram indexes of the search need the extension.
+sa.event.listen(
+    User.__table__,
+    "before_create",
+    sa.DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"),
+)
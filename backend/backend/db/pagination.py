@@ -0,0 +1,41 @@
+import base64
+from datetime import datetime
+from uuid import UUID
+
+from backend.exceptions import InvalidCursorException
+
+
+def encode_cursor(created_at: datetime, obj_id: UUID) -> str:
+    """Encodes keyset position into an opaque cursor.
+
+    Args:
+        created_at (datetime): Creation time of the last row on a page.
+        obj_id (UUID): ID of the last row on a page.
+
+    Returns:
+        str: Cursor.
+    """
+
+    raw = f"{created_at.isoformat()}|{obj_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """Decodes cursor into keyset position.
+
+    Args:
+        cursor (str): Cursor returned with the previous page.
+
+    Raises:
+        InvalidCursorException: Cursor is malformed.
+
+    Returns:
+        tuple[datetime, UUID]: Creation time and ID of the last row on a page.
+    """
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, obj_id = raw.split("|")
+        return datetime.fromisoformat(created_at), UUID(obj_id)
+    except ValueError as error:
+        raise InvalidCursorException(f"Invalid cursor {cursor}") from error
@@ -0,0 +1,152 @@
+import asyncio
+import time
+from contextlib import AsyncExitStack
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
+
+from backend.services.metrics.histogram import Histogram
+from backend.settings import settings
+
+
+class InstrumentedPoolMixin(Pool):
+    """Records how long checkouts wait for a connection.
+
+    Metrics live on the pool instance, so a pool recreated
+    by ``engine.dispose()`` starts from scratch.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.acquire_seconds = Histogram()
+        self.checked_out = 0
+        self.timeouts_total = 0
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts_total += 1
+            raise
+        finally:
+            self.acquire_seconds.observe(time.perf_counter() - start)
+        self.checked_out += 1
+        return record
+
+    def _do_return_conn(self, conn: Any) -> None:
+        self.checked_out -= 1
+        super()._do_return_conn(conn)
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """Queue pool for asyncio engines with checkout metrics."""
+
+
+class InstrumentedNullPool(InstrumentedPoolMixin, NullPool):
+    """Pool without pooling for use behind PgBouncer, with checkout metrics."""
+
+
+def create_pooled_engine(url: str) -> AsyncEngine:
+    """
+    Create engine with the pool configured from settings.
+
+    In PgBouncer mode connections aren't pooled on our side and
+    prepared statements aren't cached, PgBouncer does the pooling.
+
+    :param url: database URL.
+    :return: engine.
+    """
+    if settings.db_pgbouncer:
+        return create_async_engine(
+            url,
+            echo=settings.db_echo,
+            poolclass=InstrumentedNullPool,
+            connect_args={
+                "prepared_statement_cache_size": 0,
+                "statement_cache_size": 0,
+            },
+        )
+
+    return create_async_engine(
+        url,
+        echo=settings.db_echo,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args={
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+        },
+    )
+
+
+async def warm_up_pool(
+    engine: AsyncEngine,
+    connections: int,
+    prepare: Optional[Callable[[AsyncConnection], Awaitable[None]]] = None,
+) -> int:
+    """
+    Open and validate pool connections ahead of the first requests.
+
+    Connections are opened at once and returned to the pool idle,
+    at most as many as the pool keeps. Pools that don't keep
+    connections, like the one of PgBouncer mode, are left alone.
+
+    :param engine: engine to warm up.
+    :param connections: number of connections to open.
+    :param prepare: called with every connection after it was validated.
+    :return: number of connections opened.
+    """
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, QueuePool):
+        return 0
+    connections = min(connections, pool.size())
+
+    async with AsyncExitStack() as stack:
+        opened = await asyncio.gather(
+            *(stack.enter_async_context(engine.connect()) for _ in range(connections)),
+            return_exceptions=True,
+        )
+        # connections opened before a failure are closed by the stack
+        for conn in opened:
+            if isinstance(conn, BaseException):
+                raise conn
+        for conn in opened:
+            await conn.execute(text("SELECT 1"))
+            if prepare is not None:
+                await prepare(conn)
+    return len(opened)
+
+
+def pool_stats(engine: AsyncEngine) -> dict[str, Any]:
+    """
+    Get connection counts and checkout wait histogram of engine's pool.
+
+    :param engine: engine to inspect.
+    :return: pool statistics.
+    """
+    pool = engine.sync_engine.pool
+    stats: dict[str, Any] = {
+        "pool_class": type(pool).__name__,
+        "size": 0,
+        "checked_out": getattr(pool, "checked_out", 0),
+        "idle": 0,
+        "overflow": 0,
+        "timeouts_total": getattr(pool, "timeouts_total", 0),
+        "acquire_seconds": None,
+    }
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    if isinstance(pool, InstrumentedPoolMixin):
+        stats["acquire_seconds"] = pool.acquire_seconds.snapshot()
+    return stats
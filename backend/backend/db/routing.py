@@ -0,0 +1,165 @@
+import asyncio
+import itertools
+import logging
+from typing import Any, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+logger = logging.getLogger(__name__)
+
+REPLICATION_LAG_QUERY = text(
+    "SELECT CASE "
+    "WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END",
+)
+
+
+class ReplicaSet:
+    """Read replicas that are used only while their replication lag is low."""
+
+    def __init__(self, engines: list[AsyncEngine], max_lag: float):
+        self.engines = engines
+        self.max_lag = max_lag
+        self.lags: dict[AsyncEngine, Optional[float]] = {
+            engine: None for engine in engines
+        }
+        self._healthy: list[AsyncEngine] = []
+        self._round_robin = itertools.count()
+        self._monitor: Optional[asyncio.Task[None]] = None
+
+    def choose(self) -> Optional[AsyncEngine]:
+        """Pick the next healthy replica.
+
+        Returns:
+            Optional[AsyncEngine]: Replica engine or None if all of them lag behind.
+        """
+
+        healthy = self._healthy
+        if not healthy:
+            return None
+        return healthy[next(self._round_robin) % len(healthy)]
+
+    async def check(self) -> None:
+        """Measure replication lag of every replica."""
+
+        for engine in self.engines:
+            try:
+                async with engine.connect() as conn:
+                    lag = await conn.scalar(REPLICATION_LAG_QUERY)
+                self.lags[engine] = float(lag or 0)
+            except Exception as error:
+                logger.warning(f"Replica {_safe_url(engine)} is unavailable: {error}")
+                self.lags[engine] = None
+
+        self._healthy = [
+            engine
+            for engine, lag in self.lags.items()
+            if lag is not None and lag <= self.max_lag
+        ]
+
+    def start(self, interval: float) -> None:
+        """Start checking replication lag in background.
+
+        Args:
+            interval (float): Seconds between checks.
+        """
+
+        if self.engines:
+            self._monitor = asyncio.create_task(self._watch(interval))
+
+    async def stop(self) -> None:
+        """Stop lag checks and close replica connections."""
+
+        if self._monitor is not None:
+            self._monitor.cancel()
+            try:
+                await self._monitor
+            except asyncio.CancelledError:
+                logger.debug("Replica lag monitor stopped")
+            self._monitor = None
+
+        for engine in self.engines:
+            await engine.dispose()
+
+    def stats(self) -> list[dict[str, Any]]:
+        """Returns replication lag and health of every replica.
+
+        Returns:
+            list[dict[str, Any]]: Replica statistics.
+        """
+
+        return [
+            {
+                "url": _safe_url(engine),
+                "lag_seconds": lag,
+                "healthy": engine in self._healthy,
+            }
+            for engine, lag in self.lags.items()
+        ]
+
+    async def _watch(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.check()
+
+
+class RoutingSession(Session):
+    """Session that sends reads to a replica until it writes something.
+
+    Once the session flushes or executes anything but a plain SELECT,
+    every following statement goes to the primary, so reads after a write
+    in the same request see that write. While no replica is healthy,
+    reads go to ``reader`` (usually a read-only view of the primary).
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        replicas: ReplicaSet,
+        reader: Optional[Engine] = None,
+        **kwargs: Any,
+    ):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self.reader = reader
+        self.wrote = False
+        self._replica: Optional[AsyncEngine] = None
+
+    def get_bind(
+        self,
+        mapper: Any = None,
+        clause: Any = None,
+        **kwargs: Any,
+    ) -> Engine:
+        """Choose engine for the statement.
+
+        Args:
+            mapper (Any): Mapper of the statement.
+            clause (Any): Statement to execute.
+            **kwargs (Any): Other arguments of Session.get_bind.
+
+        Returns:
+            Engine: Replica or reader for reads before the first write,
+                primary otherwise.
+        """
+
+        is_read = isinstance(clause, Select) and clause._for_update_arg is None
+        if self._flushing or not is_read:
+            self.wrote = True
+        if not self.wrote:
+            if self._replica is None:
+                self._replica = self.replicas.choose()
+            if self._replica is not None:
+                return self._replica.sync_engine
+            if self.reader is not None:
+                return self.reader
+        return super().get_bind(mapper, clause, **kwargs)
+
+
+def _safe_url(engine: AsyncEngine) -> str:
+    return engine.url.render_as_string(hide_password=True)
@@ -6,3 +6,18 @@ class UserNotFoundException(Exception):
 class InvalidPasswordException(Exception):
     def __init__(self, message: str):
         super().__init__(message)
+
+
+class PasswordHashingOverloadedException(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+class InvalidCursorException(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+class MessageNotStoredException(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
@@ -1,12 +1,21 @@
+import asyncio
+import logging
 import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Optional, TypeVar
 
 from jose import jwt
 from passlib.context import CryptContext
 
+from backend.exceptions import PasswordHashingOverloadedException
 from backend.settings import settings
 
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
@@ -40,7 +49,169 @@ def create_access_token(
     return encoded_jwt
 
 
-def hash_password(password: str) -> tuple[str, str]:
+def _hash_password_sync(password: str, salt: str) -> tuple[str, float]:
+    """Hashes the salted password, meant to run in a worker process.
+
+    Args:
+        password (str): The password to hash.
+        salt (str): The salt to append to the password.
+
+    Returns:
+        tuple[str, float]: The hash and the seconds spent computing it.
+    """
+
+    start = time.perf_counter()
+    hashed_password = pwd_context.hash(password + salt)
+    return hashed_password, time.perf_counter() - start
+
+
+def _verify_password_sync(
+    plain_password: str,
+    salt: str,
+    hashed_password: str,
+) -> tuple[bool, float]:
+    """Verifies the salted password, meant to run in a worker process.
+
+    Args:
+        plain_password (str): The password to check.
+        salt (str): The salt used to hash the password.
+        hashed_password (str): The hashed password to check against.
+
+    Returns:
+        tuple[bool, float]: The verification result and the seconds spent on it.
+    """
+
+    start = time.perf_counter()
+    is_valid = pwd_context.verify(plain_password + salt, hashed_password)
+    return is_valid, time.perf_counter() - start
+
+
+def _hash_passwords_sync(
+    passwords: list[str],
+    salts: list[str],
+) -> tuple[list[str], float]:
+    """Hashes a batch of salted passwords, meant to run in a worker process.
+
+    Args:
+        passwords (list[str]): The passwords to hash.
+        salts (list[str]): The salts to append to the passwords.
+
+    Returns:
+        tuple[list[str], float]: The hashes and the seconds spent computing them.
+    """
+
+    start = time.perf_counter()
+    hashed_passwords = [
+        pwd_context.hash(password + salt) for password, salt in zip(passwords, salts)
+    ]
+    return hashed_passwords, time.perf_counter() - start
+
+
+class PasswordHasher:
+    """Runs bcrypt in a bounded process pool, off the event loop."""
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.in_flight = 0
+        self.completed_total = 0
+        self.rejected_total = 0
+        self.hash_seconds_total = 0.0
+        self.hash_seconds_max = 0.0
+        self.wait_seconds_total = 0.0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a free worker process.
+
+        Returns:
+            int: Queue depth.
+        """
+
+        return max(self.in_flight - self.workers, 0)
+
+    async def run(
+        self,
+        func: Callable[..., tuple[T, float]],
+        *args: Any,
+        hashes: int = 1,
+    ) -> T:
+        """Runs a hashing function in the pool and records its timings.
+
+        Args:
+            func (Callable[..., tuple[T, float]]): Returns result and duration.
+            *args (Any): Arguments for the function.
+            hashes (int): Number of passwords processed by the function.
+
+        Raises:
+            PasswordHashingOverloadedException: Too many jobs are already queued.
+
+        Returns:
+            T: The result of the function.
+        """
+
+        if self.in_flight >= self.queue_size:
+            self.rejected_total += 1
+            logger.warning(f"Password hashing queue is full ({self.in_flight} jobs)")
+            raise PasswordHashingOverloadedException("Password hashing queue is full")
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, hash_seconds = await loop.run_in_executor(
+                self._executor,
+                func,
+                *args,
+            )
+        finally:
+            self.in_flight -= 1
+
+        self.completed_total += hashes
+        self.hash_seconds_total += hash_seconds
+        self.hash_seconds_max = max(self.hash_seconds_max, hash_seconds / hashes)
+        self.wait_seconds_total += (time.perf_counter() - start - hash_seconds) * hashes
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        """Returns pool usage and timing counters.
+
+        Returns:
+            dict[str, Any]: Hashing statistics.
+        """
+
+        completed = self.completed_total or 1
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "completed_total": self.completed_total,
+            "rejected_total": self.rejected_total,
+            "hash_seconds_avg": self.hash_seconds_total / completed,
+            "hash_seconds_max": self.hash_seconds_max,
+            "wait_seconds_avg": self.wait_seconds_total / completed,
+        }
+
+    def shutdown(self) -> None:
+        """Stops worker processes, cancelling queued jobs."""
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.password_hashing_workers,
+    queue_size=settings.password_hashing_queue_size,
+)
+
+
+async def hash_password(password: str) -> tuple[str, str]:
     """Returns a hashed version of the password.
 
     Args:
@@ -51,10 +222,47 @@ def hash_password(password: str) -> tuple[str, str]:
     """
 
     salt = secrets.token_urlsafe(64)
-    return pwd_context.hash(password + salt), salt
+    return await password_hasher.run(_hash_password_sync, password, salt), salt
+
+
+async def hash_passwords(passwords: list[str]) -> list[tuple[str, str]]:
+    """Returns hashed versions of the passwords.
+
+    Passwords are hashed in small jobs, at most one per worker at a time,
+    so logins and registrations queue behind a single job of a bulk
+    import rather than behind the whole import.
+
+    Args:
+        passwords (list[str]): The passwords to hash.
+
+    Raises:
+        PasswordHashingOverloadedException: Too many jobs are already queued.
 
+    Returns:
+        list[tuple[str, str]]: Hashed password and salt for every password.
+    """
+
+    salts = [secrets.token_urlsafe(64) for _ in passwords]
+    size = settings.password_hashing_batch_size
+    slots = asyncio.Semaphore(password_hasher.workers)
+
+    async def _hash_chunk(start: int) -> list[str]:  # noqa: WPS430
+        async with slots:
+            return await password_hasher.run(
+                _hash_passwords_sync,
+                passwords[start : start + size],
+                salts[start : start + size],
+                hashes=len(passwords[start : start + size]),
+            )
 
-def verify_password(plain_password: str, salt: str, hashed_password: str) -> bool:
+    chunks = await asyncio.gather(
+        *(_hash_chunk(start) for start in range(0, len(passwords), size)),
+    )
+    hashed_passwords = [hashed for chunk in chunks for hashed in chunk]
+    return list(zip(hashed_passwords, salts))
+
+
+async def verify_password(plain_password: str, salt: str, hashed_password: str) -> bool:
     """Returns True if the password matches the hash.
 
     Args:
@@ -66,4 +274,9 @@ def verify_password(plain_password: str, salt: str, hashed_password: str) -> boo
         bool: True if the password matches the hash.
     """
 
-    return pwd_context.verify(plain_password + salt, hashed_password)
+    return await password_hasher.run(
+        _verify_password_sync,
+        plain_password,
+        salt,
+        hashed_password,
+    )
@@ -0,0 +1,98 @@
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, Optional, TypeVar
+
+KT = TypeVar("KT", bound=Hashable)
+VT = TypeVar("VT")
+
+
+class LRUCache(Generic[KT, VT]):
+    """Least recently used cache whose entries expire after a TTL.
+
+    Every removal bumps ``epoch``. Callers that load a value from a slow source
+    pass the epoch they saw before loading to ``set``, so a value read before a
+    concurrent invalidation is never stored.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.epoch = 0
+        self._data: OrderedDict[KT, tuple[float, VT]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: KT) -> Optional[VT]:
+        """Get value from the cache.
+
+        Args:
+            key (KT): Cache key.
+
+        Returns:
+            Optional[VT]: Cached value or None if it's missing or expired.
+        """
+
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: KT, value: VT, epoch: Optional[int] = None) -> None:
+        """Put value into the cache, evicting the least recently used ones.
+
+        Args:
+            key (KT): Cache key.
+            value (VT): Value to store.
+            epoch (Optional[int]): Epoch seen before the value was loaded.
+        """
+
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        if epoch is not None and epoch != self.epoch:
+            return
+
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: KT) -> None:
+        """Remove value from the cache.
+
+        Args:
+            key (KT): Cache key.
+        """
+
+        self.epoch += 1
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all values from the cache."""
+
+        self.epoch += 1
+        self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Returns cache size and hit/miss counters.
+
+        Returns:
+            dict[str, Any]: Cache statistics.
+        """
+
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,35 @@
+from typing import Any
+
+from backend.services.cache.lru import LRUCache
+from backend.settings import settings
+
+
+class SearchCache(LRUCache[tuple[str, int], list[dict[str, Any]]]):
+    """Per-worker results of user search queries by (query, limit).
+
+    Results are stored serialized, not as ORM instances bound to the session
+    of the request that found them. Results with a changed or deleted user
+    are dropped, new users show up in results after the TTL.
+    """
+
+    def discard(self, user_id: str) -> None:
+        """Drop results that contain the user.
+
+        Args:
+            user_id (str): ID of changed user.
+        """
+
+        stale = [
+            key
+            for key, (_, users) in self._data.items()  # noqa: WPS437
+            if any(str(user["id"]) == user_id for user in users)
+        ]
+        for key in stale:
+            self.pop(key)
+
+
+# autocomplete repeats the same short prefixes a lot
+search_cache = SearchCache(
+    maxsize=settings.users_search_cache_size,
+    ttl=settings.users_search_cache_ttl,
+)
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+from aioredis import Redis
+from aioredis.exceptions import RedisError
+from sqlalchemy import inspect
+from sqlalchemy.orm.attributes import set_committed_value
+
+from backend.db.models.user import User
+from backend.services.cache.lru import LRUCache
+from backend.services.cache.search import SearchCache, search_cache
+from backend.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class UserCache(LRUCache[str, User]):
+    """Per-worker cache of authenticated users.
+
+    Invalidations are published to a redis channel, so every worker
+    drops its copy of a changed user, and search results with the user
+    from the ``search`` cache. Users are cached as detached
+    copies, the loaded instance belongs to the session of one request
+    and a rollback there would expire it for every other request.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        channel: str,
+        search: Optional[SearchCache] = None,
+    ):
+        super().__init__(maxsize, ttl)
+        self.channel = channel
+        self.search = search
+        self._redis: Optional[Redis] = None
+        self._listener: Optional[asyncio.Task[None]] = None
+        self._loading: dict[str, asyncio.Future[User]] = {}
+
+    def attach(self, redis: Redis) -> None:
+        """Start receiving invalidations from other workers.
+
+        Args:
+            redis (Redis): Redis client used for pub/sub.
+        """
+
+        self._redis = redis
+        self._listener = asyncio.create_task(self._listen(redis))
+
+    async def detach(self) -> None:
+        """Stop receiving invalidations."""
+
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                logger.debug("User cache listener stopped")
+        self._redis = None
+        self._listener = None
+
+    async def load(
+        self,
+        user_id: str,
+        loader: Callable[[str], Awaitable[User]],
+    ) -> User:
+        """Get user from the cache or load it.
+
+        Concurrent misses of the same user wait for a single load,
+        so a reconnect storm doesn't turn into a query per connection.
+
+        Args:
+            user_id (str): User ID.
+            loader (Callable[[str], Awaitable[User]]): Loads user on a miss.
+
+        Returns:
+            User: User.
+        """
+
+        user = self.get(user_id)
+        if user is not None:
+            return user
+
+        pending = self._loading.get(user_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future: asyncio.Future[User] = asyncio.get_running_loop().create_future()
+        self._loading[user_id] = future
+        epoch = self.epoch
+        try:
+            user = _detached_copy(await loader(user_id))
+        except BaseException as error:
+            future.set_exception(error)
+            # waiters get the error, nobody else has to retrieve it
+            future.exception()
+            raise
+        finally:
+            self._loading.pop(user_id, None)
+
+        future.set_result(user)
+        self.set(user_id, user, epoch=epoch)
+        return user
+
+    async def invalidate(self, user_id: str) -> None:
+        """Drop user from this worker's cache and notify other workers.
+
+        Args:
+            user_id (str): ID of changed user.
+        """
+
+        self._forget(user_id)
+        if self._redis is None:
+            return
+
+        try:
+            await self._redis.publish(self.channel, user_id)
+        except RedisError as error:
+            logger.warning(f"Failed to publish invalidation of user {user_id}: {error}")
+
+    async def _listen(self, redis: Redis) -> None:
+        """Apply invalidations published by other workers.
+
+        Args:
+            redis (Redis): Redis client used for pub/sub.
+        """
+
+        while True:
+            try:
+                async with redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    # Invalidations could be missed while we were disconnected.
+                    self._forget_all()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._forget(_decode(message["data"]))
+            except (RedisError, OSError) as error:
+                logger.warning(f"User cache listener disconnected: {error}")
+                self._forget_all()
+                await asyncio.sleep(1)
+
+    def _forget(self, user_id: str) -> None:
+        self.pop(user_id)
+        if self.search is not None:
+            self.search.discard(user_id)
+
+    def _forget_all(self) -> None:
+        self.clear()
+        if self.search is not None:
+            self.search.clear()
+
+
+def _detached_copy(user: User) -> User:
+    state = inspect(user)
+    copy = User()
+    # deferred credentials aren't loaded and stay unloaded in the copy
+    for attr in state.mapper.column_attrs:
+        if attr.key in state.dict:
+            set_committed_value(copy, attr.key, state.dict[attr.key])
+    return copy
+
+
+def _decode(data: bytes | str) -> str:
+    if isinstance(data, bytes):
+        return data.decode()
+    return data
+
+
+user_cache = UserCache(
+    maxsize=settings.user_cache_size,
+    ttl=settings.user_cache_ttl,
+    channel=settings.user_cache_channel,
+    search=search_cache,
+)
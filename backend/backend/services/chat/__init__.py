@@ -0,0 +1 @@
+"""WebSocket chat."""
@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import uuid
+from contextlib import suppress
+from typing import Any, Callable, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db.dao.message import MessageDAO
+from backend.exceptions import MessageNotStoredException, UserNotFoundException
+from backend.services.chat.history import HistoryCache
+
+logger = logging.getLogger(__name__)
+
+# SQLSTATE classes of failures that pass: connection exceptions, transaction
+# rollbacks, insufficient resources and operator intervention (restarts)
+TRANSIENT_SQLSTATE_CLASSES = frozenset(("08", "40", "53", "57"))
+# data exceptions and integrity violations never succeed on retry
+DATA_SQLSTATE_CLASSES = frozenset(("22", "23"))
+
+Batch = list[tuple[dict[str, Any], Optional[asyncio.Future[None]]]]
+
+
+class MessageBuffer:
+    """Write-behind buffer of chat messages.
+
+    Messages are stored in batches through ``MessageDAO.create_many`` once
+    ``flush_size`` of them are pending or ``flush_interval`` seconds passed.
+    At most ``max_size`` messages are held in memory, senders wait for
+    a flush when the buffer is full.
+
+    Batches failing because the database is unavailable stay pending and
+    are retried. Batches failing for any other reason are split in halves
+    until the messages that can't be stored are isolated and dropped, so
+    a single bad message doesn't hold up the rest. Unknown errors are
+    retried ``max_retries`` times before the batch is split.
+
+    Stored messages are pushed to the ``history`` cache, so it never
+    serves messages the database doesn't have.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        flush_size: int,
+        flush_interval: float,
+        max_size: int,
+        max_retries: int,
+        history: Optional[HistoryCache] = None,
+    ):
+        self.session_factory = session_factory
+        self.history = history
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.max_retries = max_retries
+        self._pending: Batch = []
+        self._retries = 0
+        self._space = asyncio.Semaphore(max_size)
+        self._wakeup = asyncio.Event()
+        self._flusher: Optional[asyncio.Task[None]] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        """Start flushing messages in background."""
+
+        self._flusher = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop background flushes and store pending messages."""
+
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                logger.debug("Message buffer flusher stopped")
+            self._flusher = None
+
+        if not await self.flush():
+            logger.error(f"Lost {len(self._pending)} messages on shutdown")
+
+    async def put(self, message: dict[str, Any], durable: bool = False) -> None:
+        """Queue message for storing.
+
+        Args:
+            message (dict[str, Any]): Message with all columns set.
+            durable (bool): Wait until the message is committed.
+
+        Raises:
+            UserNotFoundException: Sender or recipient doesn't exist,
+                only raised for durable messages.
+            MessageNotStoredException: Message was rejected by the database,
+                only raised for durable messages.
+        """
+
+        await self._space.acquire()
+        future = asyncio.get_running_loop().create_future() if durable else None
+        self._pending.append((message, future))
+        if len(self._pending) >= self.flush_size:
+            self._wakeup.set()
+        if future is not None:
+            await future
+
+    async def flush(self) -> bool:
+        """Store pending messages.
+
+        Returns:
+            bool: False if messages couldn't be stored and are still pending.
+        """
+
+        batch, self._pending = self._pending, []
+        # chunks are stored from the end of the list, halves of a failed
+        # chunk are pushed in reverse to keep the order of messages
+        chunks = [batch] if batch else []
+        while chunks:
+            chunk = chunks.pop()
+            try:
+                created = await self._store(chunk)
+            except asyncio.CancelledError:
+                self._requeue(chunk, chunks)
+                raise
+            except Exception as error:
+                if not self._handle_failure(chunk, chunks, error):
+                    return False
+                continue
+            await self._acknowledge(chunk, chunks, created)
+        return True
+
+    async def _store(self, chunk: Batch) -> set[uuid.UUID]:
+        async with self.session_factory() as session:
+            return await MessageDAO(session).create_many(
+                [message for message, _ in chunk],
+            )
+
+    async def _cache(self, chunk: Batch, created: set[uuid.UUID]) -> None:
+        if self.history is not None and created:
+            await self.history.push_many(
+                [message for message, _ in chunk if message["id"] in created],
+            )
+
+    def _handle_failure(
+        self,
+        chunk: Batch,
+        chunks: list[Batch],
+        error: Exception,
+    ) -> bool:
+        # False when the chunk is put back to be retried by the next flush
+        if self._should_retry(error, len(chunk)):
+            self._retries += 1
+            self._requeue(chunk, chunks)
+            return False
+        if len(chunk) == 1:
+            self._drop(chunk[0], error)
+        else:
+            middle = len(chunk) // 2
+            chunks.extend((chunk[middle:], chunk[:middle]))
+        return True
+
+    async def _acknowledge(
+        self,
+        chunk: Batch,
+        chunks: list[Batch],
+        created: set[uuid.UUID],
+    ) -> None:
+        self._retries = 0
+        try:
+            await self._cache(chunk, created)
+        except asyncio.CancelledError:
+            self._requeue([], chunks)
+            raise
+        finally:
+            # durable messages are acknowledged once they are cached too
+            for message, future in chunk:
+                self._space.release()
+                _resolve(future, message["id"], created)
+
+    def _should_retry(self, error: Exception, size: int) -> bool:
+        if _is_transient(error):
+            logger.warning(f"Failed to store {size} messages, will retry: {error}")
+            return True
+        if not _is_data_error(error) and self._retries < self.max_retries:
+            logger.warning(f"Failed to store {size} messages, will retry: {error}")
+            return True
+        logger.warning(f"Failed to store {size} messages, splitting: {error}")
+        return False
+
+    def _requeue(self, chunk: Batch, chunks: list[Batch]) -> None:
+        self._pending[:0] = [
+            *chunk,
+            *(item for rest in reversed(chunks) for item in rest),
+        ]
+
+    def _drop(self, item: tuple[dict[str, Any], Any], error: Exception) -> None:
+        message, future = item
+        logger.error(f"Dropped message {message['id']} the database rejects: {error}")
+        self._space.release()
+        if future is not None and not future.done():
+            future.set_exception(
+                MessageNotStoredException(f"Message {message['id']} not stored"),
+            )
+
+    async def _run(self) -> None:
+        while True:
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            self._wakeup.clear()
+            if not await self.flush():
+                await asyncio.sleep(1)
+
+
+def _resolve(
+    future: Optional[asyncio.Future[None]],
+    message_id: uuid.UUID,
+    created: set[uuid.UUID],
+) -> None:
+    if future is None or future.done():
+        return
+    if message_id in created:
+        future.set_result(None)
+    else:
+        future.set_exception(UserNotFoundException(f"Message {message_id} not stored"))
+
+
+def _sqlstate(error: BaseException) -> Optional[str]:
+    sqlstate = getattr(error, "sqlstate", None)
+    if sqlstate is None and isinstance(error, exc.DBAPIError):
+        sqlstate = getattr(error.orig, "sqlstate", None)
+    return sqlstate
+
+
+def _is_transient(error: Exception) -> bool:
+    if isinstance(error, (OSError, asyncio.TimeoutError, exc.TimeoutError)):
+        return True
+    if isinstance(error, exc.DBAPIError) and error.connection_invalidated:
+        return True
+    sqlstate = _sqlstate(error)
+    return sqlstate is not None and sqlstate[:2] in TRANSIENT_SQLSTATE_CLASSES
+
+
+def _is_data_error(error: Exception) -> bool:
+    if isinstance(error, (exc.DataError, exc.IntegrityError, ValueError, TypeError)):
+        return True
+    sqlstate = _sqlstate(error)
+    return sqlstate is not None and sqlstate[:2] in DATA_SQLSTATE_CLASSES
@@ -0,0 +1,58 @@
+from starlette.requests import HTTPConnection, Request
+from starlette.websockets import WebSocket
+
+from backend.services.chat.buffer import MessageBuffer
+from backend.services.chat.events import EventRelay
+from backend.services.chat.history import HistoryCache
+from backend.services.chat.hub import ChatHub
+from backend.services.chat.presence import PresenceTracker
+
+
+def get_chat_hub(websocket: WebSocket) -> ChatHub:
+    """
+    Get chat hub of the current worker.
+
+    :param websocket: current websocket.
+    :returns: chat hub.
+    """
+    return websocket.app.state.chat_hub
+
+
+def get_message_buffer(websocket: WebSocket) -> MessageBuffer:
+    """
+    Get write-behind buffer of chat messages of the current worker.
+
+    :param websocket: current websocket.
+    :returns: message buffer.
+    """
+    return websocket.app.state.message_buffer
+
+
+def get_history_cache(connection: HTTPConnection) -> HistoryCache:
+    """
+    Get cache of recent chat history.
+
+    :param connection: current request or websocket.
+    :returns: history cache.
+    """
+    return connection.app.state.history_cache
+
+
+def get_presence_tracker(request: Request) -> PresenceTracker:
+    """
+    Get presence tracker of the current worker.
+
+    :param request: current request.
+    :returns: presence tracker.
+    """
+    return request.app.state.presence_tracker
+
+
+def get_event_relay(websocket: WebSocket) -> EventRelay:
+    """
+    Get relay of typing and read events of the current worker.
+
+    :param websocket: current websocket.
+    :returns: event relay.
+    """
+    return websocket.app.state.event_relay
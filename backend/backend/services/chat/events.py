@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from aioredis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db.dao.message import MessageDAO, conversation_id
+from backend.db.dao.read_cursor import ReadCursorDAO
+from backend.services.chat.history import HistoryCache
+from backend.services.chat.hub import ChatHub
+
+logger = logging.getLogger(__name__)
+
+# (event type, sender, recipient)
+EventKey = tuple[str, str, str]
+
+
+class EventRelay:
+    """Throttled delivery of ephemeral chat events.
+
+    Typing indicators and read markers are never stored as messages.
+    Within a ``window`` only the last event of each kind per sender and
+    recipient is kept, and every recipient gets all of its events of the
+    window in a single ``{"type": "events", "events": [...]}`` frame.
+    A sender's typing indicator is forwarded at most once per
+    ``typing_throttle`` seconds per recipient.
+
+    Read markers also move read cursors, which are upserted in batches
+    every ``cursor_flush_interval`` seconds. Both carry the creation time
+    of the read message, looked up in the history cache or the database,
+    markers of messages the conversation doesn't have are dropped.
+    """
+
+    def __init__(
+        self,
+        hub: ChatHub,
+        history: HistoryCache,
+        session_factory: Callable[[], AsyncSession],
+        window: float,
+        typing_throttle: float,
+        cursor_flush_interval: float,
+    ):
+        self.hub = hub
+        self.history = history
+        self.session_factory = session_factory
+        self.window = window
+        self.typing_throttle = typing_throttle
+        self.cursor_flush_interval = cursor_flush_interval
+        self._events: dict[EventKey, dict[str, Any]] = {}
+        self._typing_sent: dict[EventKey, float] = {}
+        self._cursors: dict[tuple[uuid.UUID, uuid.UUID], dict[str, Any]] = {}
+        self._tasks: list[asyncio.Task[None]] = []
+
+    def start(self) -> None:
+        """Start delivering events and storing read cursors in background."""
+
+        self._tasks = [
+            asyncio.create_task(self._deliver_periodically()),
+            asyncio.create_task(self._flush_periodically()),
+        ]
+
+    async def close(self) -> None:
+        """Stop background work and store pending read cursors.
+
+        Undelivered events are dropped, they are outdated by the time
+        clients reconnect anyway.
+        """
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        if not await self.flush():
+            logger.error(f"Lost {len(self._cursors)} read cursors on shutdown")
+
+    def typing(self, sender: str, recipient: str) -> None:
+        """Tell the recipient the sender is typing.
+
+        Args:
+            sender (str): ID of the typing user.
+            recipient (str): ID of the other user.
+        """
+
+        key = ("typing", sender, recipient)
+        now = time.monotonic()
+        sent = self._typing_sent.get(key)
+        if sent is not None and now - sent < self.typing_throttle:
+            return
+        self._typing_sent[key] = now
+        self._events[key] = {"type": "typing", "from": sender}
+
+    async def read(self, reader: str, sender: str, message_id: uuid.UUID) -> bool:
+        """Tell the sender the reader has seen messages up to the given one.
+
+        Args:
+            reader (str): ID of the user who read the messages.
+            sender (str): ID of the other user.
+            message_id (uuid.UUID): ID of the last read message.
+
+        Returns:
+            bool: False if the conversation has no such message.
+        """
+
+        reader_id = uuid.UUID(reader)
+        conversation = conversation_id(reader_id, uuid.UUID(sender))
+        sent_at = await self._sent_at(conversation, message_id)
+        if sent_at is None:
+            logger.debug(f"Dropped read marker of unknown message {message_id}")
+            return False
+
+        key = ("read", reader, sender)
+        pending = self._events.get(key)
+        if pending is None or pending["sent_at"] < sent_at:
+            self._events[key] = {
+                "type": "read",
+                "from": reader,
+                "id": message_id,
+                "sent_at": sent_at,
+            }
+
+        self._keep_cursor(
+            {
+                "user_id": reader_id,
+                "conversation_id": conversation,
+                "last_read_id": message_id,
+                "last_read_at": sent_at,
+            },
+        )
+        return True
+
+    async def deliver(self) -> None:
+        """Send events of the window, one frame per recipient."""
+
+        events, self._events = self._events, {}
+        frames: dict[str, dict[str, Any]] = {}
+        for (_, _, recipient), event in events.items():
+            frame = frames.setdefault(recipient, {"type": "events", "events": []})
+            frame["events"].append(event)
+        if frames:
+            await self.hub.publish_each(frames)
+
+        cutoff = time.monotonic() - self.typing_throttle
+        self._typing_sent = {
+            key: sent for key, sent in self._typing_sent.items() if sent > cutoff
+        }
+
+    async def flush(self) -> bool:
+        """Store pending read cursors.
+
+        Returns:
+            bool: False if cursors couldn't be stored and are still pending.
+        """
+
+        batch, self._cursors = self._cursors, {}
+        if not batch:
+            return True
+
+        try:
+            async with self.session_factory() as session:
+                await ReadCursorDAO(session).upsert_many(list(batch.values()))
+        except Exception as error:
+            # Any failure of the database keeps cursors for the next flush.
+            logger.warning(f"Failed to store {len(batch)} read cursors: {error}")
+            self._restore(batch)
+            return False
+        except asyncio.CancelledError:
+            self._restore(batch)
+            raise
+        return True
+
+    async def _sent_at(
+        self,
+        conversation: uuid.UUID,
+        message_id: uuid.UUID,
+    ) -> Optional[datetime]:
+        message = await self.history.find(conversation, message_id)
+        if message is not None:
+            return message["created_at"]
+
+        try:
+            async with self.session_factory() as session:
+                return await MessageDAO(session).get_sent_at(conversation, message_id)
+        except Exception as error:
+            # Markers are ephemeral, one lost while the database fails is fine.
+            logger.warning(f"Failed to look up message {message_id}: {error}")
+            return None
+
+    def _keep_cursor(self, cursor: dict[str, Any]) -> None:
+        key = (cursor["user_id"], cursor["conversation_id"])
+        pending: Optional[dict[str, Any]] = self._cursors.get(key)
+        if pending is None or pending["last_read_at"] < cursor["last_read_at"]:
+            self._cursors[key] = cursor
+
+    def _restore(
+        self, batch: dict[tuple[uuid.UUID, uuid.UUID], dict[str, Any]]
+    ) -> None:
+        for cursor in batch.values():
+            self._keep_cursor(cursor)
+
+    async def _deliver_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.window)
+            try:
+                await self.deliver()
+            except RedisError as error:
+                logger.warning(f"Failed to deliver chat events: {error}")
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.cursor_flush_interval)
+            await self.flush()
@@ -0,0 +1,276 @@
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+from uuid import UUID
+
+import orjson
+from aioredis import Redis
+from aioredis.client import Pipeline
+from aioredis.exceptions import RedisError, WatchError
+
+from backend.services.metrics.histogram import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Last element of a list that holds the whole conversation.
+END = "-"
+
+FIELDS = ("id", "created_at", "sender_id", "recipient_id", "text")
+
+
+class HistoryCache:
+    """Most recent messages of every conversation in capped redis lists.
+
+    Lists hold serialized messages newest first. Every stored message is
+    pushed, so a list always holds the newest messages without gaps and
+    is served once it has enough of them. Older pages and short lists
+    fall back to the database, which lazily refills the list and marks it
+    with ``END`` if the conversation has no more messages.
+    """
+
+    def __init__(self, redis: Redis, prefix: str, size: int, ttl: int):
+        self.redis = redis
+        self.prefix = prefix
+        self.size = size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.load_seconds = Histogram()
+
+    def key(self, conversation: UUID) -> str:
+        """Get redis key of the conversation.
+
+        Args:
+            conversation (UUID): Conversation ID.
+
+        Returns:
+            str: Key of the list.
+        """
+
+        return f"{self.prefix}:{conversation}"
+
+    async def push(self, message: dict[str, Any]) -> None:
+        """Add stored message to the conversation's list.
+
+        Args:
+            message (dict[str, Any]): Message with all columns set.
+        """
+
+        await self.push_many([message])
+
+    async def push_many(self, messages: list[dict[str, Any]]) -> None:
+        """Add stored messages to the lists of their conversations at once.
+
+        Args:
+            messages (list[dict[str, Any]]): Messages with all columns set,
+                oldest first.
+        """
+
+        keys = {self.key(message["conversation_id"]) for message in messages}
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                for message in messages:
+                    pipe.lpush(self.key(message["conversation_id"]), _dump(message))
+                for key in keys:
+                    pipe.ltrim(key, 0, self.size - 1)
+                    pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except RedisError as error:
+            logger.warning(f"Failed to cache {len(messages)} messages: {error}")
+            # A list missing a message must not be served.
+            for key in keys:
+                await self._forget(key)
+
+    async def find(
+        self,
+        conversation: UUID,
+        message_id: UUID,
+    ) -> Optional[dict[str, Any]]:
+        """Get a recent message of the conversation.
+
+        Args:
+            conversation (UUID): Conversation ID.
+            message_id (UUID): ID of the message.
+
+        Returns:
+            Optional[dict[str, Any]]: Message or None if it isn't cached.
+        """
+
+        try:
+            items = await self.redis.lrange(self.key(conversation), 0, -1)
+        except RedisError as error:
+            logger.warning(f"Failed to read history of {conversation}: {error}")
+            return None
+
+        for item in items:
+            if not _is_end(item):
+                message = _load(item)
+                if message["id"] == message_id:
+                    return message
+        return None
+
+    async def load(
+        self,
+        conversation: UUID,
+        limit: int,
+        before: Optional[tuple[datetime, UUID]],
+        loader: Callable[[int], Awaitable[list[dict[str, Any]]]],
+    ) -> list[dict[str, Any]]:
+        """Get a page of messages, newest first.
+
+        Args:
+            conversation (UUID): Conversation ID.
+            limit (int): Limit.
+            before (Optional[tuple[datetime, UUID]]): Keyset position
+                to start before, older pages are never cached.
+            loader (Callable[[int], Awaitable[list[dict[str, Any]]]]):
+                Loads the given number of the newest messages from the database.
+
+        Returns:
+            list[dict[str, Any]]: Messages.
+        """
+
+        start = time.perf_counter()
+        try:
+            if before is not None or limit > self.size:
+                return await loader(limit)
+
+            page = await self._get(conversation, limit)
+            if page is not None:
+                self.hits += 1
+                return page
+
+            self.misses += 1
+            messages = await self._fill(conversation, await loader(self.size))
+            return messages[:limit]
+        finally:
+            self.load_seconds.observe(time.perf_counter() - start)
+
+    def stats(self) -> dict[str, Any]:
+        """Returns hit ratio and load latency.
+
+        Returns:
+            dict[str, Any]: Cache statistics.
+        """
+
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "load_seconds_p50": self.load_seconds.quantile(0.5),
+            "load_seconds_p99": self.load_seconds.quantile(0.99),
+            "load_seconds": self.load_seconds.snapshot(),
+        }
+
+    async def _get(
+        self,
+        conversation: UUID,
+        limit: int,
+    ) -> Optional[list[dict[str, Any]]]:
+        try:
+            items = await self.redis.lrange(self.key(conversation), 0, limit)
+        except RedisError as error:
+            logger.warning(f"Failed to read history of {conversation}: {error}")
+            return None
+
+        messages = []
+        for item in items[:limit]:
+            if _is_end(item):
+                return messages
+            messages.append(_load(item))
+        return messages if len(messages) == limit else None
+
+    async def _fill(
+        self,
+        conversation: UUID,
+        stored: list[dict[str, Any]],
+    ) -> list[dict[str, Any]]:
+        """Merge messages from the database into the conversation's list.
+
+        Messages pushed while the database was queried may not be stored
+        yet, so they are kept. If the list changes meanwhile, it is left
+        for the next read to fill.
+
+        Args:
+            conversation (UUID): Conversation ID.
+            stored (list[dict[str, Any]]): Newest stored messages.
+
+        Returns:
+            list[dict[str, Any]]: Newest messages, newest first.
+        """
+
+        key = self.key(conversation)
+        messages = {message["id"]: message for message in stored}
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                await pipe.watch(key)
+                _merge(messages, await pipe.lrange(key, 0, -1))
+                await self._replace(
+                    pipe,
+                    key,
+                    self._newest(messages),
+                    complete=len(stored) < self.size,
+                )
+        except WatchError:
+            logger.debug(f"History of {conversation} changed while filling it")
+        except RedisError as error:
+            logger.warning(f"Failed to cache history of {conversation}: {error}")
+
+        return self._newest(messages)
+
+    def _newest(self, messages: dict[UUID, dict[str, Any]]) -> list[dict[str, Any]]:
+        return sorted(
+            messages.values(),
+            key=lambda message: (message["created_at"], message["id"]),
+            reverse=True,
+        )[: self.size]
+
+    async def _replace(
+        self,
+        pipe: Pipeline,
+        key: str,
+        newest: list[dict[str, Any]],
+        complete: bool,
+    ) -> None:
+        # the end marker tells that older messages don't exist
+        items = [_dump(message) for message in newest]
+        if complete:
+            items.append(END)
+        pipe.multi()
+        pipe.delete(key)
+        pipe.rpush(key, *items)
+        pipe.expire(key, self.ttl)
+        await pipe.execute()
+
+    async def _forget(self, key: str) -> None:
+        try:
+            await self.redis.delete(key)
+        except RedisError as error:
+            logger.error(f"Failed to drop stale history {key}: {error}")
+
+
+def _merge(messages: dict[UUID, dict[str, Any]], items: list[bytes | str]) -> None:
+    # messages from the database win over their cached copies
+    for item in items:
+        if not _is_end(item):
+            message = _load(item)
+            messages.setdefault(message["id"], message)
+
+
+def _is_end(item: bytes | str) -> bool:
+    # responses are bytes unless the client decodes them
+    return item in {END, END.encode()}
+
+
+def _dump(message: dict[str, Any]) -> bytes:
+    # asyncpg returns its own UUID type that orjson does not know
+    return orjson.dumps([message[field] for field in FIELDS], default=str)
+
+
+def _load(item: bytes | str) -> dict[str, Any]:
+    message = dict(zip(FIELDS, orjson.loads(item)))
+    message["id"] = UUID(message["id"])
+    message["created_at"] = datetime.fromisoformat(message["created_at"])
+    return message
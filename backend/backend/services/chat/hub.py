@@ -0,0 +1,228 @@
+import asyncio
+import logging
+from typing import Any, Optional
+
+import orjson
+from aioredis import Redis
+from aioredis.exceptions import RedisError
+from starlette import status
+from starlette.websockets import WebSocket, WebSocketState
+
+logger = logging.getLogger(__name__)
+
+
+class ChatConnection:
+    """WebSocket of a user with a bounded queue of outgoing messages.
+
+    Messages are sent by a single task per connection, so a slow client
+    only delays itself. A client that lets its queue fill up is
+    disconnected instead of buffering messages without limit.
+    """
+
+    def __init__(self, user_id: str, websocket: WebSocket, queue_size: int):
+        self.user_id = user_id
+        self.websocket = websocket
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+        # users whose presence changes are sent to the connection
+        self.watching: set[str] = set()
+
+    def push(self, payload: str) -> None:
+        """Queue payload for sending.
+
+        Args:
+            payload (str): Serialized message.
+        """
+
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def deliver(self) -> None:
+        """Send queued messages until the connection is closed."""
+
+        try:
+            while not self.overflowed:
+                await self.websocket.send_text(await self.queue.get())
+        except Exception as error:
+            # Sending to a connection the client has just closed fails
+            # with a server specific error.
+            logger.debug(f"Connection of user {self.user_id} closed: {error}")
+            return
+
+        logger.warning(f"User {self.user_id} is too slow, closing connection")
+        if self.websocket.application_state == WebSocketState.CONNECTED:
+            await self.websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+
+
+class ChatHub:
+    """Per-worker registry of chat connections.
+
+    Every user with connections on this worker has a redis channel the
+    worker is subscribed to. Messages are published to the recipient's
+    channel, so they reach every worker and node holding a connection
+    of that user, over a single pub/sub connection per worker.
+
+    Connections also follow presence of the users they watch, which are
+    indexed by watched user for the presence tracker.
+    """
+
+    def __init__(self, redis: Redis, channel_prefix: str, queue_size: int):
+        self.redis = redis
+        self.channel_prefix = channel_prefix
+        self.queue_size = queue_size
+        self.connections: dict[str, set[ChatConnection]] = {}
+        self.watchers: dict[str, set[ChatConnection]] = {}
+        self._pubsub = redis.pubsub()
+        self._subscribed = asyncio.Event()
+        self._listener: Optional[asyncio.Task[None]] = None
+
+    def start(self) -> None:
+        """Start delivering messages published to local users."""
+
+        self._listener = asyncio.create_task(self._listen())
+
+    async def close(self) -> None:
+        """Stop delivering messages and release the pub/sub connection."""
+
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                logger.debug("Chat hub listener stopped")
+            self._listener = None
+        await self._pubsub.reset()
+
+    def channel(self, user_id: str) -> str:
+        """Get redis channel of the user.
+
+        Args:
+            user_id (str): User ID.
+
+        Returns:
+            str: Channel name.
+        """
+
+        return f"{self.channel_prefix}:{user_id}"
+
+    async def connect(self, user_id: str, websocket: WebSocket) -> ChatConnection:
+        """Register accepted WebSocket of the user.
+
+        Args:
+            user_id (str): User ID.
+            websocket (WebSocket): Accepted WebSocket.
+
+        Returns:
+            ChatConnection: Registered connection.
+        """
+
+        connection = ChatConnection(user_id, websocket, self.queue_size)
+        user_connections = self.connections.setdefault(user_id, set())
+        user_connections.add(connection)
+        if len(user_connections) == 1:
+            await self._pubsub.subscribe(self.channel(user_id))
+            self._subscribed.set()
+        return connection
+
+    async def disconnect(self, connection: ChatConnection) -> None:
+        """Forget closed connection.
+
+        Args:
+            connection (ChatConnection): Connection to forget.
+        """
+
+        self.watch(connection, set())
+        user_connections = self.connections.get(connection.user_id, set())
+        user_connections.discard(connection)
+        if user_connections:
+            return
+
+        self.connections.pop(connection.user_id, None)
+        try:
+            await self._pubsub.unsubscribe(self.channel(connection.user_id))
+        except RedisError as error:
+            logger.warning(f"Failed to unsubscribe user {connection.user_id}: {error}")
+
+    async def publish(self, user_ids: set[str], message: dict[str, Any]) -> None:
+        """Deliver message to every connection of the users.
+
+        Args:
+            user_ids (set[str]): Recipients.
+            message (dict[str, Any]): JSON-serializable message.
+        """
+
+        payload = orjson.dumps(message)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                pipe.publish(self.channel(user_id), payload)
+            await pipe.execute()
+
+    async def publish_each(self, messages: dict[str, dict[str, Any]]) -> None:
+        """Deliver a separate message to every connection of each user.
+
+        Args:
+            messages (dict[str, dict[str, Any]]): JSON-serializable messages
+                by recipient.
+        """
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for user_id, message in messages.items():
+                pipe.publish(self.channel(user_id), orjson.dumps(message))
+            await pipe.execute()
+
+    def dispatch(self, user_id: str, payload: str) -> None:
+        """Queue payload for every local connection of the user.
+
+        Args:
+            user_id (str): Recipient.
+            payload (str): Serialized message.
+        """
+
+        for connection in self.connections.get(user_id, ()):
+            connection.push(payload)
+
+    def watch(self, connection: ChatConnection, user_ids: set[str]) -> None:
+        """Replace users whose presence the connection follows.
+
+        Args:
+            connection (ChatConnection): Client connection.
+            user_ids (set[str]): IDs of watched users.
+        """
+
+        for user_id in connection.watching - user_ids:
+            watchers = self.watchers.get(user_id, set())
+            watchers.discard(connection)
+            if not watchers:
+                self.watchers.pop(user_id, None)
+        for user_id in user_ids - connection.watching:
+            self.watchers.setdefault(user_id, set()).add(connection)
+        connection.watching = user_ids
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                await self._subscribed.wait()
+                async for message in self._pubsub.listen():
+                    self._dispatch_message(message)
+                if not self._pubsub.subscribed:
+                    self._subscribed.clear()
+            except (RedisError, OSError) as error:
+                # The connection resubscribes to all channels when it reconnects,
+                # messages published in between are lost.
+                logger.warning(f"Chat hub listener disconnected: {error}")
+                await asyncio.sleep(1)
+
+    def _dispatch_message(self, message: dict[str, Any]) -> None:
+        if message["type"] != "message":
+            return
+        channel = _decode(message["channel"])
+        user_id = channel[len(self.channel_prefix) + 1 :]
+        self.dispatch(user_id, _decode(message["data"]))
+
+
+def _decode(data: bytes | str) -> str:
+    if isinstance(data, bytes):
+        return data.decode()
+    return data
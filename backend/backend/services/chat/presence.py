@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import time
+from typing import Any, Optional
+
+import orjson
+from aioredis import Redis
+from aioredis.exceptions import RedisError
+
+from backend.services.chat.hub import ChatConnection, ChatHub
+
+logger = logging.getLogger(__name__)
+
+
+class PresenceTracker:
+    """Online status of chat users in a redis sorted set.
+
+    Members are user IDs scored by the last time a worker saw them
+    connected. Every worker refreshes all of its local users with a
+    single ZADD per interval instead of a write per connection, and
+    drops members older than the timeout with ZREMRANGEBYSCORE, which
+    only touches the expired range of the set.
+
+    Users who came online or went offline during an interval are
+    published as one event. Every worker forwards to each of its
+    connections only the changes of users the connection watches.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        hub: ChatHub,
+        key: str,
+        channel: str,
+        interval: float,
+        timeout: float,
+    ):
+        self.redis = redis
+        self.hub = hub
+        self.key = key
+        self.channel = channel
+        self.interval = interval
+        self.timeout = timeout
+        self._pubsub = redis.pubsub()
+        self._tasks: list[asyncio.Task[None]] = []
+
+    async def start(self) -> None:
+        """Start sending heartbeats and forwarding presence events."""
+
+        await self._pubsub.subscribe(self.channel)
+        self._tasks = [
+            asyncio.create_task(self._run()),
+            asyncio.create_task(self._listen()),
+        ]
+
+    async def close(self) -> None:
+        """Stop sending heartbeats and release the pub/sub connection.
+
+        Local users are not removed, they go offline after the timeout
+        unless another worker still holds their connections.
+        """
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._pubsub.reset()
+
+    async def beat(self) -> dict[str, list[str]]:
+        """Refresh local users, expire stale ones and publish the changes.
+
+        Returns:
+            dict[str, list[str]]: IDs of users who came online and went offline.
+        """
+
+        now = time.time()
+        cutoff = now - self.timeout
+        user_ids = list(self.hub.connections)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for user_id in user_ids:
+                pipe.zscore(self.key, user_id)
+            if user_ids:
+                pipe.zadd(self.key, {user_id: now for user_id in user_ids})
+            pipe.zrangebyscore(self.key, "-inf", cutoff)
+            pipe.zremrangebyscore(self.key, "-inf", cutoff)
+            results = await pipe.execute()
+
+        scores = results[: len(user_ids)]
+        changes = {
+            "online": [
+                user_id
+                for user_id, score in zip(user_ids, scores)
+                if score is None or score < cutoff
+            ],
+            "offline": [_decode(user_id) for user_id in results[-2]],
+        }
+        if changes["online"] or changes["offline"]:
+            await self.redis.publish(
+                self.channel,
+                orjson.dumps({"type": "presence", **changes}),
+            )
+        return changes
+
+    async def lookup(self, user_ids: list[str]) -> dict[str, Optional[float]]:
+        """Get last time the users were seen online.
+
+        All scores are read in one round trip.
+
+        Args:
+            user_ids (list[str]): User IDs.
+
+        Returns:
+            dict[str, Optional[float]]: Unix time the user was last seen
+                or None if the user is offline.
+        """
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                pipe.zscore(self.key, user_id)
+            scores = await pipe.execute()
+
+        cutoff = time.time() - self.timeout
+        return {
+            user_id: score if score is not None and score >= cutoff else None
+            for user_id, score in zip(user_ids, scores)
+        }
+
+    def forward(self, changes: dict[str, Any]) -> None:
+        """Send presence changes to the local connections watching the users.
+
+        Args:
+            changes (dict[str, Any]): Presence event with IDs of users
+                who came online and went offline.
+        """
+
+        frames: dict[ChatConnection, dict[str, Any]] = {}
+        for state in ("online", "offline"):
+            for user_id in changes[state]:
+                for connection in self.hub.watchers.get(user_id, ()):
+                    frame = frames.setdefault(
+                        connection,
+                        {"type": "presence", "online": [], "offline": []},
+                    )
+                    frame[state].append(user_id)
+
+        for connection, frame in frames.items():
+            connection.push(orjson.dumps(frame).decode())
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.beat()
+            except RedisError as error:
+                logger.warning(f"Failed to send presence heartbeat: {error}")
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    if message["type"] == "message":
+                        self.forward(orjson.loads(message["data"]))
+            except (RedisError, OSError) as error:
+                # The connection resubscribes when it reconnects.
+                logger.warning(f"Presence listener disconnected: {error}")
+                await asyncio.sleep(1)
+
+
+def _decode(data: bytes | str) -> str:
+    if isinstance(data, bytes):
+        return data.decode()
+    return data
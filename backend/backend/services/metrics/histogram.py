@@ -0,0 +1,79 @@
+import bisect
+from typing import Any, Sequence
+
+# seconds, from sub-millisecond connection reuse up to pool timeouts
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+class Histogram:
+    """Cumulative histogram of observed values with fixed bucket bounds."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.count = 0
+        self.sum = 0.0
+        # the last slot counts values above the largest bound
+        self._counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float) -> None:
+        """Record a value.
+
+        Args:
+            value (float): Observed value.
+        """
+
+        self._counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, quantile: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket containing it.
+
+        Args:
+            quantile (float): Quantile between 0 and 1.
+
+        Returns:
+            float: Bucket bound, infinity if it's above the largest bound.
+        """
+
+        if not self.count:
+            return 0.0
+
+        rank = quantile * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self._counts):
+            seen += count
+            if seen and seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> dict[str, Any]:
+        """Returns count, sum and cumulative bucket counts.
+
+        Returns:
+            dict[str, Any]: Histogram snapshot.
+        """
+
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets, self._counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = self.count
+        return {"count": self.count, "sum": self.sum, "buckets": buckets}
@@ -0,0 +1,117 @@
+import os
+from typing import Any
+
+from aioredis import BlockingConnectionPool
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector, mark_process_dead
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from backend.db.pool import pool_stats
+from backend.services.metrics.histogram import LATENCY_BUCKETS
+from backend.services.redis.pool import redis_pool_stats
+
+# Workers of a multi-process server write metrics to files in this directory,
+# the scraped worker merges them.
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+REQUESTS = Counter(
+    "backend_http_requests_total",
+    "HTTP requests by route template and status.",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "backend_http_requests_in_progress",
+    "HTTP requests being served.",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+REQUEST_SECONDS = Histogram(
+    "backend_http_request_duration_seconds",
+    "HTTP request latency by route template and status.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    "backend_db_queries_per_request",
+    "SQL statements run by requests that reached the database.",
+    ["route"],
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100),
+)
+DB_SECONDS = Histogram(
+    "backend_db_seconds_per_request",
+    "Time requests that reached the database spent in SQL statements.",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_SLOW_QUERIES = Counter(
+    "backend_db_slow_queries_total",
+    "SQL statements slower than the slow query threshold.",
+)
+DB_N_PLUS_ONE = Counter(
+    "backend_db_n_plus_one_total",
+    "Statements repeated by a request as many times as the N+1 threshold.",
+)
+MESSAGES_DEFAULT_PARTITION_ROWS = Gauge(
+    "backend_messages_default_partition_rows",
+    "Messages outside of monthly partitions, should stay zero.",
+    multiprocess_mode="max",
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "backend_db_pool_connections",
+    "Database pool connections by state.",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+REDIS_POOL_CONNECTIONS = Gauge(
+    "backend_redis_pool_connections",
+    "Redis pool connections by state.",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+
+
+def update_pool_metrics(
+    engine: AsyncEngine, redis_pool: BlockingConnectionPool
+) -> None:
+    """Set pool gauges from the pools of this worker.
+
+    Args:
+        engine (AsyncEngine): Database engine.
+        redis_pool (BlockingConnectionPool): Redis connection pool.
+    """
+
+    stats = pool_stats(engine)
+    for state in ("size", "checked_out", "idle", "overflow"):
+        DB_POOL_CONNECTIONS.labels(state).set(stats[state])
+
+    for state, count in redis_pool_stats(redis_pool).items():
+        REDIS_POOL_CONNECTIONS.labels(state).set(count)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Render metrics of all workers in the Prometheus text format.
+
+    Returns:
+        tuple[bytes, str]: Metrics and their content type.
+    """
+
+    registry: Any = REGISTRY
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def forget_worker() -> None:
+    """Drop live gauges of this worker from the multi-process directory."""
+
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        mark_process_dead(os.getpid())
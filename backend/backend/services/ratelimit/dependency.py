@@ -0,0 +1,82 @@
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Depends, HTTPException, status
+from starlette.requests import Request
+
+from backend.services.ratelimit.limiter import RateLimiter, retry_after_header
+from backend.settings import settings
+
+# longer usernames are cut, they can't be registered anyway
+USERNAME_MAX_LENGTH = 64
+
+
+def get_rate_limiter(request: Request) -> RateLimiter:
+    """
+    Get rate limiter shared by all requests.
+
+    :param request: current request.
+    :returns: rate limiter.
+    """
+    return request.app.state.rate_limiter
+
+
+async def _get_username(request: Request) -> Optional[str]:
+    # The body is already parsed and cached by the time dependencies run.
+    body: Any
+    if request.headers.get("content-type", "").startswith("application/json"):
+        body = await request.json()
+    else:
+        body = await request.form()
+    username = body.get("username") if hasattr(body, "get") else None
+    if not isinstance(username, str) or not username:
+        return None
+    return username[:USERNAME_MAX_LENGTH].lower()
+
+
+def rate_limit(route: str) -> Callable[..., Awaitable[None]]:
+    """
+    Create dependency that limits requests of a route.
+
+    Every request takes a token from the bucket of the client IP and,
+    if the body carries one, the bucket of the username, so a single
+    client can't flood the route and a single account can't be brute
+    forced from many addresses.
+
+    :param route: name of the route, buckets of routes are independent.
+    :returns: dependency that raises 429 with Retry-After when over limit.
+    """
+
+    async def _rate_limit(  # noqa: WPS430
+        request: Request,
+        limiter: RateLimiter = Depends(get_rate_limiter),
+    ) -> None:
+        if not settings.rate_limit_enabled:
+            return
+
+        host = request.client.host if request.client else "unknown"
+        buckets = [
+            (
+                f"{route}:ip:{host}",
+                settings.rate_limit_ip_rate,
+                settings.rate_limit_ip_burst,
+            ),
+        ]
+        username = await _get_username(request)
+        if username is not None:
+            buckets.append(
+                (
+                    f"{route}:user:{username}",
+                    settings.rate_limit_username_rate,
+                    settings.rate_limit_username_burst,
+                ),
+            )
+
+        retry_after = await limiter.hit(buckets)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": retry_after_header(retry_after)},
+            )
+
+    return _rate_limit
@@ -0,0 +1,115 @@
+import logging
+import math
+import time
+
+from aioredis import Redis
+from aioredis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+# KEYS are buckets, ARGV holds rate (tokens per second) and burst of every
+# bucket. A bucket is stored as the time it will be full again. A token is
+# taken from all buckets or, if any of them is empty, from none, and the
+# longest wait for a token is returned. Time comes from redis, so workers
+# with skewed clocks share buckets correctly.
+TOKEN_BUCKET = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local full_at = {}
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2 - 1])
+    local burst = tonumber(ARGV[i * 2])
+    full_at[i] = math.max(tonumber(redis.call('GET', key)) or now, now)
+    local tokens = burst - (full_at[i] - now) * rate
+    if tokens < 1 then
+        retry_after = math.max(retry_after, (1 - tokens) / rate)
+    end
+end
+if retry_after == 0 then
+    for i, key in ipairs(KEYS) do
+        local at = full_at[i] + 1 / tonumber(ARGV[i * 2 - 1])
+        redis.call('SET', key, tostring(at), 'PX', math.ceil((at - now) * 1000))
+    end
+end
+return tostring(retry_after)
+"""
+
+
+# full local buckets are dropped once there are more buckets than this
+LOCAL_BUCKETS_MAX = 10000
+
+
+class RateLimiter:
+    """Token buckets shared by all workers through redis.
+
+    Every check is a single EVALSHA of an atomic Lua script. When redis
+    fails, buckets of this worker are used instead for ``fallback_seconds``
+    before redis is tried again, so an outage neither blocks requests nor
+    slows them down with a failing round trip each.
+    """
+
+    def __init__(self, redis: Redis, prefix: str, fallback_seconds: float):
+        self.redis = redis
+        self.prefix = prefix
+        self.fallback_seconds = fallback_seconds
+        self._script = redis.register_script(TOKEN_BUCKET)
+        self._local: dict[str, float] = {}
+        self._redis_retry_at = 0.0
+
+    async def hit(self, buckets: list[tuple[str, float, int]]) -> float:
+        """Take a token from every bucket.
+
+        Args:
+            buckets (list[tuple[str, float, int]]): Bucket key, rate in tokens
+                per second and burst of every bucket.
+
+        Returns:
+            float: Seconds until a token is available, 0 if it was taken.
+        """
+
+        if time.monotonic() >= self._redis_retry_at:
+            try:
+                return await self._hit_redis(buckets)
+            except RedisError as error:
+                logger.warning(f"Rate limiting falls back to local buckets: {error}")
+                self._redis_retry_at = time.monotonic() + self.fallback_seconds
+        return self._hit_local(buckets)
+
+    async def _hit_redis(self, buckets: list[tuple[str, float, int]]) -> float:
+        keys = [f"{self.prefix}:{key}" for key, _, _ in buckets]
+        args = []
+        for _, rate, burst in buckets:
+            args.extend((rate, burst))
+        return float(await self._script(keys=keys, args=args))
+
+    def _hit_local(self, buckets: list[tuple[str, float, int]]) -> float:
+        now = time.monotonic()
+        retry_after = 0.0
+        for key, rate, burst in buckets:
+            tokens = burst - max(0.0, self._local.get(key, now) - now) * rate
+            if tokens < 1:
+                retry_after = max(retry_after, (1 - tokens) / rate)
+        if retry_after:
+            return retry_after
+
+        for key, rate, _ in buckets:
+            self._local[key] = max(self._local.get(key, now), now) + 1 / rate
+        if len(self._local) > LOCAL_BUCKETS_MAX:
+            self._local = {
+                key: full_at for key, full_at in self._local.items() if full_at > now
+            }
+        return 0.0
+
+
+def retry_after_header(retry_after: float) -> str:
+    """Format wait time for the Retry-After header.
+
+    Args:
+        retry_after (float): Seconds until a token is available.
+
+    Returns:
+        str: Whole seconds, at least one.
+    """
+
+    return str(max(1, math.ceil(retry_after)))
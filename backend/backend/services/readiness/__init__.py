@@ -0,0 +1 @@
+"""Readiness of workers to serve requests."""
@@ -0,0 +1,13 @@
+from starlette.requests import Request
+
+from backend.services.readiness.probe import ReadinessProbe
+
+
+def get_readiness_probe(request: Request) -> ReadinessProbe:
+    """
+    Get readiness probe of this worker.
+
+    :param request: current request.
+    :returns: readiness probe.
+    """
+    return request.app.state.readiness_probe
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Awaitable, Optional
+
+from aioredis import Redis
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+
+class ReadinessProbe:
+    """Readiness of this worker to serve requests.
+
+    A worker is ready once its pools are warmed up and while the database
+    and redis answer. Results of checks are reused for ttl seconds and
+    concurrent probes share a single check, so probes add next to no load.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        redis: Redis,
+        ttl: float,
+        timeout: float,
+    ):
+        self.engine = engine
+        self.redis = redis
+        self.ttl = ttl
+        self.timeout = timeout
+        self.warmed_up = False
+        self._checks: dict[str, bool] = {}
+        self._checked_at = -math.inf
+        self._running: Optional[asyncio.Task[dict[str, bool]]] = None
+
+    async def status(self) -> dict[str, Any]:
+        """Get readiness of the worker and results of dependency checks.
+
+        Dependencies aren't checked before the warm-up is over.
+
+        Returns:
+            dict[str, Any]: Readiness, warm-up state and checks by dependency.
+        """
+
+        checks = await self.check() if self.warmed_up else {}
+        return {
+            "ready": self.warmed_up and all(checks.values()),
+            "warmed_up": self.warmed_up,
+            "checks": checks,
+        }
+
+    async def check(self) -> dict[str, bool]:
+        """Check the database and redis, or reuse a recent result.
+
+        Returns:
+            dict[str, bool]: Whether every dependency answered in time.
+        """
+
+        if time.monotonic() - self._checked_at < self.ttl:
+            return self._checks
+        if self._running is None:
+            self._running = asyncio.create_task(self._check())
+        # a cancelled probe doesn't cancel the check shared with others
+        return await asyncio.shield(self._running)
+
+    async def _check(self) -> dict[str, bool]:
+        try:
+            database, redis = await asyncio.gather(
+                self._answers("database", self._ping_database()),
+                self._answers("redis", self.redis.ping()),
+            )
+            self._checks = {"database": database, "redis": redis}
+            self._checked_at = time.monotonic()
+            return self._checks
+        finally:
+            self._running = None
+
+    async def _ping_database(self) -> None:
+        async with self.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def _answers(self, name: str, ping: Awaitable[Any]) -> bool:
+        try:
+            await asyncio.wait_for(ping, self.timeout)
+        except Exception as error:
+            logger.warning(f"Readiness check of {name} failed: {error!r}")
+            return False
+        return True
@@ -1,21 +1,15 @@
-from typing import AsyncGenerator
-
 from aioredis import Redis
 from starlette.requests import Request
 
 
-async def get_redis_connection(request: Request) -> AsyncGenerator[Redis, None]:
+async def get_redis_connection(request: Request) -> Redis:
     """
     Get redis client.
 
-    This dependency aquires connection from pool.
+    The client is shared by all requests,
+    it takes a connection from the pool for every command.
 
     :param request: current request.
-    :yield:  redis client.
+    :returns:  redis client.
     """
-    redis_client = Redis(connection_pool=request.app.state.redis_pool)
-
-    try:  # noqa: WPS501
-        yield redis_client
-    finally:
-        await redis_client.close()
+    return request.app.state.redis
@@ -0,0 +1,50 @@
+import asyncio
+
+from aioredis import BlockingConnectionPool, ConnectionPool
+
+
+async def warm_up_redis_pool(pool: ConnectionPool, connections: int) -> int:
+    """
+    Open and validate redis connections ahead of the first requests.
+
+    Connections are opened at once, checked with PING and released
+    to the pool, at most as many as the pool allows.
+
+    :param pool: redis connection pool.
+    :param connections: number of connections to open.
+    :return: number of connections opened.
+    """
+    connections = min(connections, pool.max_connections)
+    opened = await asyncio.gather(
+        *(pool.get_connection("PING") for _ in range(connections)),
+        return_exceptions=True,
+    )
+    try:
+        for conn in opened:
+            if isinstance(conn, BaseException):
+                raise conn
+            await conn.send_command("PING")
+            await conn.read_response()
+    finally:
+        for conn in opened:
+            if not isinstance(conn, BaseException):
+                await pool.release(conn)
+    return len(opened)
+
+
+def redis_pool_stats(pool: BlockingConnectionPool) -> dict[str, int]:
+    """
+    Get connection counts of the redis pool.
+
+    aioredis doesn't expose pool counters, free slots of the pool's queue
+    hold either an idle connection or None for one not opened yet.
+
+    :param pool: redis connection pool.
+    :return: pool statistics.
+    """
+    idle = sum(conn is not None for conn in pool.pool._queue)  # noqa: WPS437
+    return {
+        "in_use": len(pool._connections) - idle,  # noqa: WPS437
+        "idle": idle,
+        "max": pool.max_connections,
+    }
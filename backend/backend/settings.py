@@ -19,17 +19,129 @@ class Settings(BaseSettings):
     workers_count: int = 1
     # Enable uvicorn reloading
     reload: bool = True
+    # adds Server-Timing headers with SQL statements and time of every request
+    debug: bool = False
     db_host: str = "localhost"
     db_port: int = 5432
     db_user: str = "backend"
     db_pass: str = "backend"
     db_base: str = "backend"
     db_echo: bool = False
+    # statements running longer are logged with parameters redacted, a request
+    # running one statement this many times is logged as possible N+1 queries
+    db_slow_query_seconds: float = 0.2
+    db_n_plus_one_threshold: int = 5
+    # connection pool, timeout and recycle are in seconds (-1 disables recycling)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = -1
+    db_pool_pre_ping: bool = False
+    # prepared statements cached per connection by asyncpg dialect
+    db_statement_cache_size: int = 100
+    # connections every worker opens and validates on startup, hot user queries
+    # are run on them to compile and prepare their statements ahead of requests
+    db_warm_connections: int = 5
+    db_warm_statements: bool = True
+    # PgBouncer compatible mode: NullPool without prepared statement cache
+    db_pgbouncer: bool = False
+    # read replicas as a JSON list of URLs, used while they lag less than
+    # db_replica_max_lag seconds behind the primary
+    db_replica_urls: list[str] = []
+    db_replica_max_lag: float = 5
+    db_replica_check_interval: float = 5
     redis_host: str = "backend-redis"
     redis_port: int = 6379
     redis_user: Optional[str] = None
     redis_pass: Optional[str] = None
     redis_base: Optional[int] = None
+    # shared redis client pool, health check interval in seconds (0 disables it),
+    # commands wait up to pool timeout seconds for a free connection
+    redis_max_connections: int = 50
+    redis_pool_timeout: float = 5
+    redis_socket_keepalive: bool = True
+    redis_health_check_interval: int = 30
+    # connections every worker opens and validates on startup
+    redis_warm_connections: int = 5
+    # max keys read or written by a single batch request
+    redis_batch_max_keys: int = 100
+    # processes used for bcrypt hashing and verification
+    password_hashing_workers: int = 2
+    # max hashing jobs waiting or running before new ones are rejected
+    password_hashing_queue_size: int = 64
+    # passwords hashed by a single job of bulk imports, logins wait for at most
+    # one such job per worker
+    password_hashing_batch_size: int = 4
+    # per-worker cache of authenticated users, ttl in seconds (0 disables it)
+    user_cache_size: int = 10000
+    user_cache_ttl: float = 30
+    user_cache_channel: str = "backend:user-cache:invalidate"
+    # max users returned by the search, cache of frequent queries, ttl in seconds
+    users_search_max_limit: int = 50
+    users_search_cache_size: int = 1000
+    users_search_cache_ttl: float = 30
+    # token buckets of login and registration per client IP and username, rate in
+    # requests per second; local buckets are used for fallback seconds when redis
+    # is unreachable
+    rate_limit_enabled: bool = True
+    rate_limit_prefix: str = "backend:ratelimit"
+    rate_limit_fallback_seconds: float = 5
+    rate_limit_ip_rate: float = 1
+    rate_limit_ip_burst: int = 30
+    rate_limit_username_rate: float = 0.2
+    rate_limit_username_burst: int = 10
+    # max rows accepted by a single bulk user import, rows hashed and copied
+    # to the database at once
+    users_import_max_rows: int = 10000
+    users_import_chunk_size: int = 500
+    # rows fetched from the server-side cursor per chunk of users export
+    users_export_chunk_size: int = 1000
+    # redis channels of chat users are "<prefix>:<user id>"
+    chat_channel_prefix: str = "backend:chat:user"
+    # messages waiting to be sent to a chat connection before it is closed
+    chat_send_queue_size: int = 256
+    chat_message_max_length: int = 4096
+    # newest messages of each conversation kept in redis, ttl in seconds
+    chat_history_cache_size: int = 50
+    chat_history_cache_ttl: int = 86400
+    chat_history_cache_prefix: str = "backend:chat:history"
+    # users seen connected within timeout seconds are online, every worker
+    # refreshes its users and publishes presence changes each interval
+    presence_key: str = "backend:presence"
+    presence_channel: str = "backend:presence:events"
+    presence_interval: float = 5
+    presence_timeout: float = 15
+    presence_lookup_max_ids: int = 500
+    # users a chat connection can follow presence of
+    presence_watch_max_ids: int = 500
+    # typing and read events are coalesced and delivered once per window seconds,
+    # typing events of a sender are forwarded at most once per throttle seconds
+    chat_events_window: float = 0.25
+    chat_typing_throttle: float = 3
+    # read cursors are stored in batches every interval seconds
+    read_cursors_flush_interval: float = 2
+    # chat messages are stored in batches of this size or after interval seconds
+    messages_flush_size: int = 500
+    messages_flush_interval: float = 0.05
+    # max messages waiting to be stored, senders wait while the buffer is full
+    messages_buffer_size: int = 10000
+    # failed batches are retried while the database is unavailable, on unknown
+    # errors this many times, then split to drop messages the database rejects
+    messages_flush_retries: int = 3
+    # monthly partitions of messages kept ahead, including the current one,
+    # created on startup and checked again every interval seconds
+    messages_partitions_ahead: int = 3
+    messages_partitions_interval: float = 3600
+
+    # readiness probe reuses checks of database and redis for ttl seconds,
+    # a dependency not answering within timeout seconds fails the probe
+    ready_check_ttl: float = 2
+    ready_check_timeout: float = 1
+
+    # directory shared by workers for Prometheus metrics, cleared on start
+    # (sets PROMETHEUS_MULTIPROC_DIR), pool gauges are refreshed every interval
+    prometheus_multiproc_dir: Optional[Path] = None
+    metrics_pool_interval: float = 5
 
     # Variables from environment
     secret_key: Optional[str] = None
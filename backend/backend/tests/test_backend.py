@@ -1,8 +1,13 @@
+import uuid
+
 import pytest
 from fastapi import FastAPI
 from httpx import AsyncClient
 from starlette import status
 
+from backend.services.readiness.probe import ReadinessProbe
+from backend.settings import settings
+
 
 @pytest.mark.anyio
 async def test_health(client: AsyncClient, fastapi_app: FastAPI) -> None:
@@ -15,3 +20,77 @@ async def test_health(client: AsyncClient, fastapi_app: FastAPI) -> None:
     url = fastapi_app.url_path_for("health_check")
     response = await client.get(url)
     assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.anyio
+async def test_ready(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    readiness_probe: ReadinessProbe,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    url = fastapi_app.url_path_for("readiness_check")
+    response = await client.get(url)
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json() == {"ready": False, "warmed_up": False, "checks": {}}
+
+    readiness_probe.warmed_up = True
+    response = await client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["checks"] == {"database": True, "redis": True}
+
+    async def _down() -> None:  # noqa: WPS430
+        raise ConnectionError("redis is down")
+
+    # cached checks don't reach redis
+    monkeypatch.setattr(readiness_probe.redis, "ping", _down)
+    response = await client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+
+    readiness_probe.ttl = 0
+    response = await client.get(url)
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json()["checks"] == {"database": True, "redis": False}
+
+
+@pytest.mark.anyio
+async def test_metrics(client: AsyncClient, fastapi_app: FastAPI) -> None:
+    user_url = fastapi_app.url_path_for("get_user", user_id=str(uuid.uuid4()))
+    await client.get(user_url)
+    await client.get("/api/no-such-route")
+
+    response = await client.get(fastapi_app.url_path_for("get_metrics"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    lines = response.text.splitlines()
+    assert any(
+        line.startswith("backend_http_requests_total{")
+        and 'route="/api/users/{user_id}"' in line
+        and 'status="404"' in line
+        for line in lines
+    )
+    assert any(
+        line.startswith("backend_http_request_duration_seconds_count{")
+        and 'route="/api/users/{user_id}"' in line
+        and 'status="404"' in line
+        for line in lines
+    )
+    assert any('route="unmatched"' in line for line in lines)
+    assert not any(user_url in line for line in lines)
+
+
+@pytest.mark.anyio
+async def test_server_timing_in_debug_mode(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    url = fastapi_app.url_path_for("get_users")
+    response = await client.get(url)
+    assert "server-timing" not in response.headers
+
+    monkeypatch.setattr(settings, "debug", True)
+    response = await client.get(url)
+    assert response.headers["server-timing"].startswith("db;dur=")
+    assert 'desc="1 queries"' in response.headers["server-timing"]
@@ -0,0 +1,162 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+from fakeredis.aioredis import FakeRedis
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db.dao.user import UserDAO
+from backend.db.dependencies.db import get_db_read_session
+from backend.db.models.user import User
+from backend.security import create_access_token
+from backend.services.cache.lru import LRUCache
+from backend.services.cache.user import UserCache, user_cache
+from backend.tests.utils import create_random_user, create_user_with_exact_data
+from backend.web.api.auth.schema import Token
+
+
+def test_lru_cache_evicts_least_recently_used() -> None:
+    cache: LRUCache[str, int] = LRUCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_cache_expires_entries() -> None:
+    cache: LRUCache[str, int] = LRUCache(maxsize=2, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_lru_cache_ignores_values_loaded_before_invalidation() -> None:
+    cache: LRUCache[str, int] = LRUCache(maxsize=2, ttl=60)
+    epoch = cache.epoch
+    cache.pop("a")
+
+    cache.set("a", 1, epoch=epoch)
+
+    assert cache.get("a") is None
+
+
+@pytest.mark.anyio
+async def test_user_cache_invalidation_from_other_worker(
+    fake_redis: FakeRedis,
+) -> None:
+    cache = UserCache(maxsize=10, ttl=60, channel=uuid.uuid4().hex)
+    cache.attach(fake_redis)
+    await asyncio.sleep(0.1)
+    cache.set("user", object())  # type: ignore
+
+    await fake_redis.publish(cache.channel, "user")
+    for _ in range(50):
+        if cache.get("user") is None:
+            break
+        await asyncio.sleep(0.01)
+
+    assert len(cache) == 0
+    await cache.detach()
+
+
+@pytest.mark.anyio
+async def test_current_user_is_cached_and_invalidated(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    user, d = await create_user_with_exact_data(dbsession)
+
+    token_url = fastapi_app.url_path_for("login_access_token")
+    response = await client.post(
+        token_url,
+        data={"username": d["username"], "password": d["password"]},
+    )
+    token = Token(**response.json())
+    headers = {"Authorization": f"{token.token_type} {token.access_token}"}
+
+    user_me_url = fastapi_app.url_path_for("get_user_me")
+    await client.get(user_me_url, headers=headers)
+    hits = user_cache.hits
+    await client.get(user_me_url, headers=headers)
+    assert user_cache.hits == hits + 1
+
+    first_name = uuid.uuid4().hex
+    user_url = fastapi_app.url_path_for("update_user", user_id=str(user.id))
+    await client.patch(user_url, json={"first_name": first_name}, headers=headers)
+
+    assert user_cache.get(str(user.id)) is None
+    response = await client.get(user_me_url, headers=headers)
+    assert response.json()["first_name"] == first_name
+
+
+@pytest.mark.anyio
+async def test_current_user_is_loaded_from_primary(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    user, _ = await create_user_with_exact_data(dbsession)
+    await user_cache.invalidate(str(user.id))
+
+    def _replica() -> None:  # noqa: WPS430
+        raise AssertionError("Current user was read from a replica")
+
+    fastapi_app.dependency_overrides[get_db_read_session] = _replica
+    token = create_access_token(str(user.id))
+    response = await client.get(
+        fastapi_app.url_path_for("get_user_me"),
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 200
+    assert user_cache.get(str(user.id)) is not None
+
+
+@pytest.mark.anyio
+async def test_user_cache_loads_concurrent_misses_once() -> None:
+    cache = UserCache(maxsize=10, ttl=60, channel="test")
+    calls = 0
+
+    async def _load(user_id: str) -> User:  # noqa: WPS430
+        nonlocal calls  # noqa: WPS420
+        calls += 1
+        await asyncio.sleep(0.01)
+        return User(username=user_id)
+
+    users = await asyncio.gather(*(cache.load("user", _load) for _ in range(10)))
+
+    assert calls == 1
+    assert all(user is users[0] for user in users)
+    assert cache.get("user") is users[0]
+
+
+@pytest.mark.anyio
+async def test_cached_users_outlive_the_loading_session(
+    dbsession: AsyncSession,
+) -> None:
+    cache = UserCache(maxsize=10, ttl=60, channel="test")
+    user = await create_random_user(dbsession)
+    user_id, username = str(user.id), user.username
+    dbsession.expire_all()
+
+    cached = await cache.load(user_id, UserDAO(dbsession).get)
+    # a rollback in the loading request expires everything in its session
+    dbsession.expire_all()
+    dbsession.expunge_all()
+
+    assert cache.get(user_id) is cached
+    assert cached.username == username
+    assert cached.updated_at is not None
@@ -0,0 +1,333 @@
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator
+
+import orjson
+import pytest
+from fakeredis.aioredis import FakeRedis
+from fastapi import FastAPI
+from httpx import AsyncClient
+from pydantic import ValidationError, parse_raw_as
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from backend.db.dao.message import MessageDAO, conversation_id
+from backend.db.dao.read_cursor import ReadCursorDAO
+from backend.security import create_access_token
+from backend.services.chat.events import EventRelay
+from backend.services.chat.history import HistoryCache
+from backend.services.chat.hub import ChatConnection, ChatHub
+from backend.services.chat.presence import PresenceTracker
+from backend.tests.utils import create_random_user
+from backend.web.api.chat.schema import ChatFrameIn
+
+
+def _message(
+    sender: uuid.UUID,
+    recipient: uuid.UUID,
+    created_at: datetime,
+) -> dict[str, object]:
+    return {
+        "id": uuid.uuid4(),
+        "created_at": created_at,
+        "conversation_id": conversation_id(sender, recipient),
+        "sender_id": sender,
+        "recipient_id": recipient,
+        "text": uuid.uuid4().hex,
+    }
+
+
+@pytest.mark.anyio
+async def test_hub_delivers_to_every_connection_of_recipient(
+    chat_hub: ChatHub,
+) -> None:
+    recipient = str(uuid.uuid4())
+    first = await chat_hub.connect(recipient, None)  # type: ignore
+    second = await chat_hub.connect(recipient, None)  # type: ignore
+    bystander = await chat_hub.connect(str(uuid.uuid4()), None)  # type: ignore
+
+    await chat_hub.publish({recipient}, {"type": "message", "text": "hi"})
+
+    for connection in (first, second):
+        payload = await asyncio.wait_for(connection.queue.get(), timeout=1)
+        assert orjson.loads(payload) == {"type": "message", "text": "hi"}
+    assert bystander.queue.empty()
+
+    await chat_hub.disconnect(first)
+    assert chat_hub.connections[recipient] == {second}
+    await chat_hub.disconnect(second)
+    assert recipient not in chat_hub.connections
+
+
+class _WebSocketClient:
+    """WebSocket client talking to the app on the test's event loop."""
+
+    def __init__(self) -> None:
+        self.received: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        self.sent: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+
+    async def send(self, frame: dict[str, Any]) -> None:
+        text = orjson.dumps(frame).decode()
+        await self.received.put({"type": "websocket.receive", "text": text})
+
+    async def receive(self) -> dict[str, Any]:
+        message = await asyncio.wait_for(self.sent.get(), timeout=5)
+        return orjson.loads(message["text"])
+
+
+@asynccontextmanager
+async def _connect(app: FastAPI, token: str) -> AsyncIterator[_WebSocketClient]:
+    client = _WebSocketClient()
+    scope = {
+        "type": "websocket",
+        "path": app.url_path_for("chat_gateway"),
+        "query_string": f"token={token}".encode(),
+        "headers": [],
+        "root_path": "",
+        "subprotocols": [],
+    }
+    await client.received.put({"type": "websocket.connect"})
+    task = asyncio.create_task(app(scope, client.received.get, client.sent.put))
+    accepted = await asyncio.wait_for(client.sent.get(), timeout=5)
+    assert accepted["type"] == "websocket.accept"
+    try:
+        yield client
+    finally:
+        await client.received.put({"type": "websocket.disconnect", "code": 1000})
+        await asyncio.wait_for(task, timeout=5)
+
+
+@pytest.mark.anyio
+async def test_gateway_delivers_messages_and_acks(
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    sender = await create_random_user(dbsession)
+    recipient = await create_random_user(dbsession)
+
+    async with _connect(fastapi_app, create_access_token(str(sender.id))) as first:
+        async with _connect(
+            fastapi_app,
+            create_access_token(str(recipient.id)),
+        ) as second:
+            await first.send({"to": str(recipient.id), "text": "hi", "ack": True})
+
+            delivered = await second.receive()
+            assert delivered["type"] == "message"
+            assert delivered["from"] == str(sender.id)
+            assert delivered["text"] == "hi"
+            # the ack is pushed directly, the message comes through redis
+            frames = [await first.receive() for _ in range(2)]
+            assert {frame["type"] for frame in frames} == {"message", "ack"}
+            assert all(frame["id"] == delivered["id"] for frame in frames)
+
+    stored = await MessageDAO(dbsession).get_sent_at(
+        conversation_id(sender.id, recipient.id),
+        uuid.UUID(delivered["id"]),
+    )
+    assert stored is not None
+
+
+def test_connection_overflows_when_client_is_slow() -> None:
+    connection = ChatConnection(str(uuid.uuid4()), None, queue_size=1)  # type: ignore
+
+    connection.push("first")
+    assert connection.overflowed is False
+    connection.push("second")
+    assert connection.overflowed is True
+
+
+def test_messages_with_nul_are_rejected() -> None:
+    frame = orjson.dumps({"to": str(uuid.uuid4()), "text": "nul \x00"})
+    with pytest.raises(ValidationError):
+        parse_raw_as(ChatFrameIn, frame)  # type: ignore
+
+
+@pytest.mark.anyio
+async def test_gateway_rejects_invalid_token(fastapi_app: FastAPI) -> None:
+    url = fastapi_app.url_path_for("chat_gateway")
+
+    with pytest.raises(WebSocketDisconnect) as error:
+        with TestClient(fastapi_app).websocket_connect(f"{url}?token=invalid"):
+            pass  # noqa: WPS420
+
+    assert error.value.code == status.WS_1008_POLICY_VIOLATION
+
+
+@pytest.mark.anyio
+async def test_presence_changes_are_coalesced(
+    chat_hub: ChatHub,
+    presence_tracker: PresenceTracker,
+    fake_redis: FakeRedis,
+) -> None:
+    first = await chat_hub.connect(str(uuid.uuid4()), None)  # type: ignore
+    second = await chat_hub.connect(str(uuid.uuid4()), None)  # type: ignore
+    stale = str(uuid.uuid4())
+    await fake_redis.zadd(
+        presence_tracker.key,
+        {stale: time.time() - presence_tracker.timeout - 1},
+    )
+
+    chat_hub.watch(first, {second.user_id, stale})
+    chat_hub.watch(second, {stale})
+
+    changes = await presence_tracker.beat()
+    assert sorted(changes["online"]) == sorted([first.user_id, second.user_id])
+    assert changes["offline"] == [stale]
+    assert await presence_tracker.beat() == {"online": [], "offline": []}
+
+    # changes of watched users reach the connection as a single event
+    payload = await asyncio.wait_for(first.queue.get(), timeout=1)
+    assert orjson.loads(payload) == {
+        "type": "presence",
+        "online": [second.user_id],
+        "offline": [stale],
+    }
+    payload = await asyncio.wait_for(second.queue.get(), timeout=1)
+    assert orjson.loads(payload) == {
+        "type": "presence",
+        "online": [],
+        "offline": [stale],
+    }
+    assert first.queue.empty()
+    assert second.queue.empty()
+
+    # the index forgets closed connections and emptied watch lists
+    await chat_hub.disconnect(second)
+    assert chat_hub.watchers == {second.user_id: {first}, stale: {first}}
+    chat_hub.watch(first, set())
+    assert chat_hub.watchers == {}
+
+    assert await presence_tracker.lookup([first.user_id, stale]) == {
+        first.user_id: pytest.approx(time.time(), abs=5),
+        stale: None,
+    }
+
+
+@pytest.mark.anyio
+async def test_get_presence(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    chat_hub: ChatHub,
+    presence_tracker: PresenceTracker,
+) -> None:
+    user = await create_random_user(dbsession)
+    online = await chat_hub.connect(str(user.id), None)  # type: ignore
+    offline = str(uuid.uuid4())
+    await presence_tracker.beat()
+
+    response = await client.get(
+        fastapi_app.url_path_for("get_presence"),
+        params=[("user_id", online.user_id), ("user_id", offline)],
+        headers={"Authorization": f"Bearer {create_access_token(str(user.id))}"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    statuses = response.json()
+    assert [status["user_id"] for status in statuses] == [online.user_id, offline]
+    assert statuses[0]["online"] is True
+    assert statuses[1] == {"user_id": offline, "online": False, "last_seen": None}
+
+
+@pytest.mark.anyio
+async def test_ephemeral_events_are_throttled_and_coalesced(
+    chat_hub: ChatHub,
+    history_cache: HistoryCache,
+    event_relay: EventRelay,
+) -> None:
+    sender, recipient = uuid.uuid4(), uuid.uuid4()
+    connection = await chat_hub.connect(str(recipient), None)  # type: ignore
+    first_read = _message(recipient, sender, datetime.utcnow() - timedelta(seconds=1))
+    last_read = _message(recipient, sender, datetime.utcnow())
+    for message in (first_read, last_read):
+        await history_cache.push(message)
+
+    for _ in range(10):
+        event_relay.typing(str(sender), str(recipient))
+    assert await event_relay.read(str(sender), str(recipient), last_read["id"])
+    assert await event_relay.read(str(sender), str(recipient), first_read["id"])
+    await event_relay.deliver()
+
+    payload = await asyncio.wait_for(connection.queue.get(), timeout=1)
+    assert orjson.loads(payload) == {
+        "type": "events",
+        "events": [
+            {"type": "typing", "from": str(sender)},
+            {
+                "type": "read",
+                "from": str(sender),
+                "id": str(last_read["id"]),
+                "sent_at": last_read["created_at"].isoformat(),
+            },
+        ],
+    }
+
+    # typing again right away is throttled
+    event_relay.typing(str(sender), str(recipient))
+    await event_relay.deliver()
+    await asyncio.sleep(0.1)
+    assert connection.queue.empty()
+
+
+@pytest.mark.anyio
+async def test_read_cursors_are_stored_in_batches(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    history_cache: HistoryCache,
+    event_relay: EventRelay,
+) -> None:
+    reader = await create_random_user(dbsession)
+    sender = await create_random_user(dbsession)
+    # the newest message is looked up in the database, the older one is cached
+    message = _message(sender.id, reader.id, datetime.utcnow())
+    await MessageDAO(dbsession).create_many([message])
+    old_message = _message(
+        sender.id, reader.id, datetime.utcnow() - timedelta(minutes=1)
+    )
+    await history_cache.push(old_message)
+
+    assert await event_relay.read(str(reader.id), str(sender.id), message["id"])
+    assert await event_relay.flush()
+
+    # older markers don't move the cursor back
+    assert await event_relay.read(str(reader.id), str(sender.id), old_message["id"])
+    assert await event_relay.flush()
+
+    response = await client.get(
+        fastapi_app.url_path_for("get_read_cursors", user_id=str(sender.id)),
+        headers={"Authorization": f"Bearer {create_access_token(str(reader.id))}"},
+    )
+    assert response.json() == [
+        {
+            "user_id": str(reader.id),
+            "last_read_id": str(message["id"]),
+            "last_read_at": message["created_at"].isoformat(),
+        },
+    ]
+
+
+@pytest.mark.anyio
+async def test_read_markers_of_unknown_messages_are_dropped(
+    dbsession: AsyncSession,
+    event_relay: EventRelay,
+) -> None:
+    reader = await create_random_user(dbsession)
+    sender = await create_random_user(dbsession)
+    stranger = await create_random_user(dbsession)
+    message = _message(sender.id, stranger.id, datetime.utcnow())
+    await MessageDAO(dbsession).create_many([message])
+
+    # messages of other conversations can't move the cursor either
+    for message_id in (uuid.uuid4(), message["id"]):
+        assert not await event_relay.read(str(reader.id), str(sender.id), message_id)
+    await event_relay.deliver()
+    assert await event_relay.flush()
+
+    cursors = await ReadCursorDAO(dbsession).get_by_conversation(reader.id, sender.id)
+    assert cursors == []
@@ -0,0 +1,230 @@
+import logging
+import uuid
+
+import pytest
+from sqlalchemy import delete, text, update
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+)
+from sqlalchemy.future import select
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+
+from backend.db.dao.user import UserDAO
+from backend.db.dependencies.db import get_db_session
+from backend.db.instrumentation import collect_queries
+from backend.db.models.user import User
+from backend.db.pool import create_pooled_engine, pool_stats, warm_up_pool
+from backend.db.routing import ReplicaSet, RoutingSession
+from backend.settings import settings
+from backend.tests.utils import create_random_user
+from backend.web.api.user.schema import USER_COLUMNS
+from backend.web.application import get_app
+
+
+@pytest.mark.anyio
+async def test_pool_stats(
+    _engine: AsyncEngine,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "db_pool_size", 1)
+    monkeypatch.setattr(settings, "db_max_overflow", 1)
+    engine = create_pooled_engine(str(settings.db_url))
+
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        async with engine.connect() as conn2:
+            await conn2.execute(text("SELECT 1"))
+            stats = pool_stats(engine)
+            assert stats["checked_out"] == 2
+            assert stats["overflow"] == 1
+
+    stats = pool_stats(engine)
+    assert stats["pool_class"] == "InstrumentedQueuePool"
+    assert stats["checked_out"] == 0
+    assert stats["idle"] == 1
+    assert stats["acquire_seconds"]["count"] == 2
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_pool_stats_pgbouncer_mode(
+    _engine: AsyncEngine,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "db_pgbouncer", True)
+    engine = create_pooled_engine(str(settings.db_url))
+
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        assert pool_stats(engine)["checked_out"] == 1
+
+    stats = pool_stats(engine)
+    assert stats["pool_class"] == "InstrumentedNullPool"
+    assert stats["checked_out"] == 0
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_warm_up_pool(
+    _engine: AsyncEngine,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "db_pool_size", 2)
+    engine = create_pooled_engine(str(settings.db_url))
+    prepared = []
+
+    async def _prepare(conn: AsyncConnection) -> None:
+        async with AsyncSession(bind=conn) as session:
+            await UserDAO(session).warm_up(USER_COLUMNS)
+        prepared.append(conn)
+
+    assert await warm_up_pool(engine, 5, _prepare) == 2
+
+    stats = pool_stats(engine)
+    assert stats["idle"] == 2
+    assert stats["checked_out"] == 0
+    assert len(prepared) == 2
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_routing_session_sticks_to_primary_after_write(
+    _engine: AsyncEngine,
+) -> None:
+    replica = create_async_engine(str(settings.db_url))
+    replicas = ReplicaSet([replica], max_lag=5)
+    await replicas.check()
+    assert replicas.stats()[0]["healthy"] is True
+
+    async with AsyncSession(
+        _engine,
+        sync_session_class=RoutingSession,
+        replicas=replicas,
+    ) as session:
+        assert session.sync_session.get_bind(clause=select(User)) is replica.sync_engine
+
+        await session.execute(update(User).where(User.id == uuid.uuid4()))
+
+        assert session.sync_session.get_bind(clause=select(User)) is _engine.sync_engine
+        await session.rollback()
+
+    await replicas.stop()
+
+
+@pytest.mark.anyio
+async def test_routing_session_falls_back_to_primary_when_replicas_lag(
+    _engine: AsyncEngine,
+) -> None:
+    replicas = ReplicaSet([create_async_engine(str(settings.db_url))], max_lag=-1)
+    await replicas.check()
+
+    async with AsyncSession(
+        _engine,
+        sync_session_class=RoutingSession,
+        replicas=replicas,
+    ) as session:
+        assert session.sync_session.get_bind(clause=select(User)) is _engine.sync_engine
+
+    await replicas.stop()
+
+
+@pytest.mark.anyio
+async def test_routing_session_reads_in_read_only_transaction(
+    _engine: AsyncEngine,
+) -> None:
+    replicas = ReplicaSet([], max_lag=5)
+    reader = _engine.sync_engine.execution_options(postgresql_readonly=True)
+
+    async with AsyncSession(
+        _engine,
+        sync_session_class=RoutingSession,
+        replicas=replicas,
+        reader=reader,
+    ) as session:
+        assert session.sync_session.get_bind(clause=select(User)) is reader
+        read_only = await session.scalar(
+            select(text("current_setting('transaction_read_only')"))
+        )
+        assert read_only == "on"
+
+
+@pytest.mark.anyio
+async def test_query_stats_warn_about_n_plus_one(
+    dbsession: AsyncSession,
+    caplog: pytest.LogCaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "db_n_plus_one_threshold", 3)
+    with collect_queries("GET /test") as stats:
+        for number in range(5):
+            await dbsession.execute(
+                text("SELECT CAST(:number AS integer)"), {"number": number}
+            )
+        await dbsession.execute(text("SELECT 1"))
+
+    assert stats.queries == 6
+    assert stats.seconds > 0
+    warnings = [record.message for record in caplog.records if "N+1" in record.message]
+    assert len(warnings) == 1
+    assert "GET /test" in warnings[0]
+
+
+@pytest.mark.anyio
+async def test_slow_queries_are_logged_redacted(
+    dbsession: AsyncSession,
+    caplog: pytest.LogCaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "db_slow_query_seconds", 0)
+    caplog.set_level(logging.WARNING)
+
+    await dbsession.execute(
+        text("SELECT :password, 'inline-secret'"),
+        {"password": "param-secret"},
+    )
+
+    messages = [
+        record.message
+        for record in caplog.records
+        if record.message.startswith("Slow query")
+    ]
+    assert len(messages) == 1
+    assert "SELECT" in messages[0]
+    assert "1 parameters redacted" in messages[0]
+    assert "secret" not in messages[0]
+
+
+@pytest.mark.anyio
+async def test_core_writes_through_session_dependency_are_committed(
+    _engine: AsyncEngine,
+) -> None:
+    app = get_app()
+    app.state.db_session_factory = sessionmaker(
+        _engine,
+        expire_on_commit=False,
+        class_=AsyncSession,
+    )
+    async with AsyncSession(_engine, expire_on_commit=False) as session:
+        user = await create_random_user(session)
+
+    try:
+        dependency = get_db_session(Request({"type": "http", "app": app}))
+        session = await dependency.__anext__()
+        await session.execute(
+            update(User).where(User.id == user.id).values(is_blocked=True),
+        )
+        with pytest.raises(StopAsyncIteration):
+            await dependency.__anext__()
+
+        async with AsyncSession(_engine) as session:
+            assert await session.scalar(
+                select(User.is_blocked).where(User.id == user.id),
+            )
+    finally:
+        async with AsyncSession(_engine) as session:
+            await session.execute(delete(User).where(User.id == user.id))
+            await session.commit()
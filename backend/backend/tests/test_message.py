@@ -0,0 +1,257 @@
+import uuid
+from datetime import date, datetime
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from backend.db.dao.message import MessageDAO, conversation_id, partition_name
+from backend.db.models.message import Message
+from backend.exceptions import MessageNotStoredException, UserNotFoundException
+from backend.security import create_access_token
+from backend.services.chat.buffer import MessageBuffer
+from backend.services.chat.history import HistoryCache
+from backend.tests.utils import create_random_user
+
+
+def _message(sender: uuid.UUID, recipient: uuid.UUID) -> dict[str, object]:
+    return {
+        "id": uuid.uuid4(),
+        "created_at": datetime.utcnow(),
+        "conversation_id": conversation_id(sender, recipient),
+        "sender_id": sender,
+        "recipient_id": recipient,
+        "text": uuid.uuid4().hex,
+    }
+
+
+def test_conversation_id_does_not_depend_on_order() -> None:
+    first, second = uuid.uuid4(), uuid.uuid4()
+    assert conversation_id(first, second) == conversation_id(second, first)
+    assert conversation_id(first, second) != conversation_id(first, uuid.uuid4())
+
+
+@pytest.mark.anyio
+async def test_buffer_stores_messages_in_batches(
+    dbsession: AsyncSession,
+    message_buffer: MessageBuffer,
+) -> None:
+    sender = await create_random_user(dbsession)
+    recipient = await create_random_user(dbsession)
+
+    for _ in range(3):
+        await message_buffer.put(_message(sender.id, recipient.id))
+    assert len(message_buffer) == 3
+
+    await message_buffer.put(_message(recipient.id, sender.id), durable=True)
+    assert len(message_buffer) == 0
+
+    stored = await dbsession.scalar(
+        select(func.count()).where(
+            Message.conversation_id == conversation_id(sender.id, recipient.id),
+        ),
+    )
+    assert stored == 4
+
+
+@pytest.mark.anyio
+async def test_buffer_rejects_durable_message_to_unknown_user(
+    dbsession: AsyncSession,
+    message_buffer: MessageBuffer,
+) -> None:
+    sender = await create_random_user(dbsession)
+    message = _message(sender.id, uuid.uuid4())
+
+    with pytest.raises(UserNotFoundException):
+        await message_buffer.put(message, durable=True)
+
+    assert await dbsession.get(Message, (message["id"], message["created_at"])) is None
+
+
+@pytest.mark.anyio
+async def test_buffer_caches_only_stored_messages(
+    dbsession: AsyncSession,
+    message_buffer: MessageBuffer,
+    history_cache: HistoryCache,
+) -> None:
+    sender = await create_random_user(dbsession)
+    recipient = await create_random_user(dbsession)
+    stored = _message(sender.id, recipient.id)
+    lost = _message(sender.id, uuid.uuid4())
+
+    await message_buffer.put(stored)
+    await message_buffer.put(lost)
+    assert await history_cache.find(stored["conversation_id"], stored["id"]) is None
+
+    assert await message_buffer.flush()
+    cached = await history_cache.find(stored["conversation_id"], stored["id"])
+    assert cached is not None
+    assert cached["text"] == stored["text"]
+    assert await history_cache.find(lost["conversation_id"], lost["id"]) is None
+
+
+class _RejectedText(Exception):
+    sqlstate = "22021"
+
+
+@pytest.mark.anyio
+async def test_buffer_drops_messages_the_database_rejects(
+    dbsession: AsyncSession,
+    message_buffer: MessageBuffer,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    sender = await create_random_user(dbsession)
+    recipient = await create_random_user(dbsession)
+    good = [_message(sender.id, recipient.id) for _ in range(4)]
+    bad = {**_message(sender.id, recipient.id), "text": "nul \x00"}
+    create_many = MessageDAO.create_many
+
+    async def _reject_nul(dao: MessageDAO, objs_in: list[dict[str, object]]) -> object:
+        # the test session can't recover from a failed statement
+        if any("\x00" in str(obj_in["text"]) for obj_in in objs_in):
+            raise _RejectedText("invalid byte sequence for encoding UTF8: 0x00")
+        return await create_many(dao, objs_in)
+
+    monkeypatch.setattr(MessageDAO, "create_many", _reject_nul)
+    for message in good[:2]:
+        await message_buffer.put(message)
+    with pytest.raises(MessageNotStoredException):
+        await message_buffer.put(bad, durable=True)
+    for message in good[2:]:
+        await message_buffer.put(message)
+    assert await message_buffer.flush()
+
+    stored = await dbsession.scalars(
+        select(Message.id).where(
+            Message.conversation_id == conversation_id(sender.id, recipient.id),
+        ),
+    )
+    assert set(stored) == {message["id"] for message in good}
+    assert len(message_buffer) == 0
+
+
+@pytest.mark.anyio
+async def test_buffer_keeps_messages_while_database_is_unavailable(
+    dbsession: AsyncSession,
+    message_buffer: MessageBuffer,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    sender = await create_random_user(dbsession)
+    recipient = await create_random_user(dbsession)
+
+    async def _unavailable(*args: object) -> None:
+        raise ConnectionRefusedError("database is down")
+
+    monkeypatch.setattr(MessageDAO, "create_many", _unavailable)
+    for _ in range(2):
+        await message_buffer.put(_message(sender.id, recipient.id))
+    for _ in range(message_buffer.max_retries + 1):
+        assert not await message_buffer.flush()
+    assert len(message_buffer) == 2
+
+    monkeypatch.undo()
+    assert await message_buffer.flush()
+    assert len(message_buffer) == 0
+
+
+@pytest.mark.anyio
+async def test_messages_are_routed_to_monthly_partitions(
+    dbsession: AsyncSession,
+) -> None:
+    sender = await create_random_user(dbsession)
+    recipient = await create_random_user(dbsession)
+    message_dao = MessageDAO(dbsession)
+    await message_dao.create_partitions(date(2030, 12, 15), months=2)
+
+    inside = {**_message(sender.id, recipient.id), "created_at": datetime(2031, 1, 31)}
+    outside = {**_message(sender.id, recipient.id), "created_at": datetime(2032, 1, 1)}
+    await message_dao.create_many([inside, outside])
+
+    partitions = await dbsession.execute(
+        text("SELECT id, tableoid::regclass::text FROM messages WHERE id IN (:a, :b)"),
+        {"a": inside["id"], "b": outside["id"]},
+    )
+    assert dict(partitions.all()) == {
+        inside["id"]: partition_name(date(2031, 1, 1)),
+        outside["id"]: "messages_default",
+    }
+
+    # a month that got messages before its partition existed
+    assert await message_dao.create_partitions(date(2032, 1, 1), months=2) == [
+        partition_name(date(2032, 1, 1)),
+        partition_name(date(2032, 2, 1)),
+    ]
+    partition = await dbsession.scalar(
+        text("SELECT tableoid::regclass::text FROM messages WHERE id = :id"),
+        {"id": outside["id"]},
+    )
+    assert partition == partition_name(date(2032, 1, 1))
+    assert await message_dao.count_default() == 0
+    assert await message_dao.create_partitions(date(2032, 1, 1), months=2) == []
+
+
+@pytest.mark.anyio
+async def test_history_is_cached_and_older_pages_read_from_db(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    history_cache: HistoryCache,
+) -> None:
+    sender = await create_random_user(dbsession)
+    recipient = await create_random_user(dbsession)
+    messages = [_message(sender.id, recipient.id) for _ in range(5)]
+    await MessageDAO(dbsession).create_many(messages)
+    url = fastapi_app.url_path_for("get_history", user_id=str(recipient.id))
+    headers = {"Authorization": f"Bearer {create_access_token(str(sender.id))}"}
+    newest = [str(message["id"]) for message in reversed(messages)]
+
+    response = await client.get(url, params={"limit": 2}, headers=headers)
+    assert [message["id"] for message in response.json()] == newest[:2]
+    assert history_cache.misses == 1
+
+    response = await client.get(url, params={"limit": 2}, headers=headers)
+    assert [message["id"] for message in response.json()] == newest[:2]
+    assert history_cache.hits == 1
+
+    cursor = response.headers["X-Next-Cursor"]
+    response = await client.get(
+        url,
+        params={"limit": 4, "cursor": cursor},
+        headers=headers,
+    )
+    assert [message["id"] for message in response.json()] == newest[2:]
+    assert "X-Next-Cursor" not in response.headers
+    assert history_cache.stats()["hit_ratio"] == 0.5
+
+
+@pytest.mark.anyio
+async def test_history_cache_keeps_pushed_messages(
+    history_cache: HistoryCache,
+) -> None:
+    sender, recipient = uuid.uuid4(), uuid.uuid4()
+    conversation = conversation_id(sender, recipient)
+    stored = _message(sender, recipient)
+    pushed = _message(recipient, sender)
+
+    async def _load(count: int) -> list[dict[str, object]]:  # noqa: WPS430
+        return [stored]
+
+    await history_cache.push(pushed)
+    page = await history_cache.load(conversation, 10, None, _load)
+    assert [message["id"] for message in page] == [pushed["id"], stored["id"]]
+    assert history_cache.misses == 1
+
+    # the whole conversation is cached now
+    newest = _message(sender, recipient)
+    await history_cache.push(newest)
+    page = await history_cache.load(conversation, 10, None, _load)
+    assert [message["id"] for message in page] == [
+        newest["id"],
+        pushed["id"],
+        stored["id"],
+    ]
+    assert page[0]["created_at"] == newest["created_at"]
+    assert history_cache.hits == 1
@@ -0,0 +1,89 @@
+import asyncio
+import json
+from pathlib import Path
+
+import anyio
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from backend.db.utils import create_database, drop_database
+from backend.settings import settings
+
+MIGRATIONS = Path(__file__).parents[1] / "db" / "migrations"
+
+
+def _migrate(direction: str, revision: str) -> None:
+    # env.py runs migrations on the current event loop of the thread
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        config = Config()
+        config.set_main_option("script_location", str(MIGRATIONS))
+        getattr(command, direction)(config, revision)
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+async def _preferences(engine: AsyncEngine) -> dict[str, object]:
+    async with engine.connect() as conn:
+        rows = await conn.execute(text("SELECT username, preferences FROM users"))
+        return dict(rows.all())
+
+
+@pytest.mark.anyio
+async def test_legacy_preferences_become_objects(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "db_base", f"{settings.db_base}_migrations")
+    await create_database()
+    # connections aren't reused, statements prepared on them outlive migrations
+    engine = create_async_engine(str(settings.db_url), poolclass=NullPool)
+    legacy = {
+        "text": "dark mode",
+        "array": "[1, 2]",
+        "object": '{"theme": "dark"}',
+        "null": "null",
+        "empty": None,
+    }
+    try:
+        await anyio.to_thread.run_sync(_migrate, "upgrade", "b1cff5a1f307")
+        async with engine.begin() as conn:
+            for username, preferences in legacy.items():
+                await conn.execute(
+                    text(
+                        "INSERT INTO users "
+                        "(id, username, email, hashed_password, salt, is_superuser, "
+                        "is_active, is_reported, is_blocked, created_at, "
+                        "updated_at, preferences) "
+                        "VALUES (gen_random_uuid(), :username, :email, '', '', "
+                        "false, true, false, false, now(), now(), :value)",
+                    ),
+                    {
+                        "username": username,
+                        "email": f"{username}@example.com",
+                        "value": preferences,
+                    },
+                )
+
+        await anyio.to_thread.run_sync(_migrate, "upgrade", "91b8c844b47a")
+        assert await _preferences(engine) == {
+            "text": {"legacy": "dark mode"},
+            "array": {"legacy": [1, 2]},
+            "object": {"theme": "dark"},
+            "null": None,
+            "empty": None,
+        }
+
+        await anyio.to_thread.run_sync(_migrate, "downgrade", "b1cff5a1f307")
+        preferences = await _preferences(engine)
+        assert preferences["text"] == "dark mode"
+        assert json.loads(preferences["array"]) == [1, 2]
+        assert json.loads(preferences["object"]) == {"theme": "dark"}
+    finally:
+        await engine.dispose()
+        await drop_database()
@@ -1,11 +1,14 @@
 import uuid
 
+import aioredis
 import pytest
 from fakeredis.aioredis import FakeRedis
 from fastapi import FastAPI
 from httpx import AsyncClient
 from starlette import status
 
+from backend.services.redis.pool import redis_pool_stats, warm_up_redis_pool
+
 
 @pytest.mark.anyio
 async def test_setting_value(
@@ -57,3 +60,101 @@ async def test_getting_value(
     assert response.status_code == status.HTTP_200_OK
     assert response.json()["key"] == test_key
     assert response.json()["value"] == test_val
+
+
+@pytest.mark.anyio
+async def test_setting_values_in_batch(
+    fastapi_app: FastAPI,
+    fake_redis: FakeRedis,
+    client: AsyncClient,
+) -> None:
+    """
+    Tests that several values are set at once with a ttl.
+
+    :param fastapi_app: current application fixture.
+    :param fake_redis: fake redis instance.
+    :param client: client fixture.
+    """
+    url = fastapi_app.url_path_for("set_redis_values")
+    entries = {uuid.uuid4().hex: uuid.uuid4().hex for _ in range(3)}
+    response = await client.put(
+        url,
+        json={
+            "entries": [{"key": key, "value": val} for key, val in entries.items()],
+            "ttl": 60,
+        },
+    )
+    assert response.status_code == status.HTTP_200_OK
+    for key, val in entries.items():
+        assert await fake_redis.get(key) == val
+        assert 0 < await fake_redis.ttl(key) <= 60
+
+
+@pytest.mark.anyio
+async def test_getting_values_in_batch(
+    fastapi_app: FastAPI,
+    fake_redis: FakeRedis,
+    client: AsyncClient,
+) -> None:
+    """
+    Tests that several values are returned in the order of keys.
+
+    :param fastapi_app: current application fixture.
+    :param fake_redis: fake redis instance.
+    :param client: client fixture.
+    """
+    test_key = uuid.uuid4().hex
+    missing_key = uuid.uuid4().hex
+    await fake_redis.set(test_key, "value")
+
+    url = fastapi_app.url_path_for("get_redis_values")
+    response = await client.get(url, params=[("key", missing_key), ("key", test_key)])
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [
+        {"key": missing_key, "value": None},
+        {"key": test_key, "value": "value"},
+    ]
+
+
+@pytest.mark.anyio
+async def test_warm_up_redis_pool(fake_redis: FakeRedis) -> None:
+    """
+    Tests that warmed up connections are left idle in the pool.
+
+    :param fake_redis: fake redis instance.
+    """
+    pool = fake_redis.connection_pool
+
+    assert await warm_up_redis_pool(pool, 3) == 3
+
+    assert len(pool._available_connections) == 3  # noqa: WPS437
+    assert not pool._in_use_connections  # noqa: WPS437
+
+
+@pytest.mark.anyio
+async def test_blocking_redis_pool_waits_for_free_connection(
+    fake_redis: FakeRedis,
+) -> None:
+    """
+    Tests that commands wait for a free connection up to the pool timeout.
+
+    :param fake_redis: fake redis instance.
+    """
+    pool = aioredis.BlockingConnectionPool(
+        max_connections=2,
+        timeout=0.1,
+        connection_class=fake_redis.connection_pool.connection_class,
+        **fake_redis.connection_pool.connection_kwargs,
+    )
+
+    assert await warm_up_redis_pool(pool, 3) == 2
+    assert redis_pool_stats(pool) == {"in_use": 0, "idle": 2, "max": 2}
+
+    taken = [await pool.get_connection("PING") for _ in range(2)]
+    assert redis_pool_stats(pool) == {"in_use": 2, "idle": 0, "max": 2}
+    with pytest.raises(aioredis.ConnectionError):
+        await pool.get_connection("PING")
+
+    await pool.release(taken[0])
+    assert await pool.get_connection("PING") is taken[0]
+    await pool.disconnect()
@@ -0,0 +1,148 @@
+import asyncio
+import uuid
+from typing import Any
+
+import pytest
+from aioredis.exceptions import ConnectionError
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.exceptions import PasswordHashingOverloadedException
+from backend.security import (
+    PasswordHasher,
+    _hash_password_sync,
+    create_access_token,
+    hash_password,
+    hash_passwords,
+    password_hasher,
+    verify_password,
+)
+from backend.services.ratelimit.limiter import RateLimiter
+from backend.settings import settings
+from backend.tests.utils import create_random_user
+
+
+@pytest.mark.anyio
+async def test_hash_and_verify_password() -> None:
+    password = uuid.uuid4().hex
+    hashed_password, salt = await hash_password(password)
+
+    assert await verify_password(password, salt, hashed_password) is True
+    assert await verify_password(uuid.uuid4().hex, salt, hashed_password) is False
+
+
+@pytest.mark.anyio
+async def test_hasher_rejects_when_queue_is_full() -> None:
+    hasher = PasswordHasher(workers=1, queue_size=0)
+
+    with pytest.raises(PasswordHashingOverloadedException):
+        await hasher.run(_hash_password_sync, "password", "salt")
+
+    assert hasher.stats()["rejected_total"] == 1
+    hasher.shutdown()
+
+
+@pytest.mark.anyio
+async def test_bulk_hashing_runs_small_jobs_one_per_worker(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "password_hashing_batch_size", 3)
+    jobs: list[int] = []
+    running = 0
+    max_running = 0
+
+    async def _run(func: Any, passwords: list[str], salts: list[str], hashes: int):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        jobs.append(hashes)
+        return [f"hashed-{password}" for password in passwords]
+
+    monkeypatch.setattr(password_hasher, "run", _run)
+    passwords = [str(number) for number in range(10)]
+
+    hashed = await hash_passwords(passwords)
+
+    assert [hashed_password for hashed_password, _ in hashed] == [
+        f"hashed-{password}" for password in passwords
+    ]
+    assert sorted(jobs) == [1, 3, 3, 3]
+    assert max_running == password_hasher.workers
+
+
+@pytest.mark.anyio
+async def test_hashing_stats(fastapi_app: FastAPI, client: AsyncClient) -> None:
+    await hash_password(uuid.uuid4().hex)
+
+    url = fastapi_app.url_path_for("get_hashing_stats")
+    response = await client.get(url)
+
+    assert response.status_code == 200
+    content = response.json()
+    assert content["completed_total"] >= 1
+    assert content["hash_seconds_max"] > 0
+
+
+@pytest.mark.anyio
+async def test_login_rate_limited_by_username(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+) -> None:
+    url = fastapi_app.url_path_for("login_access_token")
+    form = {"username": uuid.uuid4().hex, "password": "wrong"}
+
+    for _ in range(settings.rate_limit_username_burst):
+        response = await client.post(url, data=form)
+        assert response.status_code == 401
+
+    response = await client.post(url, data=form)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    form["username"] = uuid.uuid4().hex
+    response = await client.post(url, data=form)
+    assert response.status_code == 401
+
+
+@pytest.mark.anyio
+async def test_rate_limiter_falls_back_to_local_buckets(
+    rate_limiter: RateLimiter,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def _fail(*args: object, **kwargs: object) -> None:
+        raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(rate_limiter, "_script", _fail)
+    buckets = [("test", 1.0, 2)]
+
+    assert await rate_limiter.hit(buckets) == 0
+    assert await rate_limiter.hit(buckets) == 0
+    assert await rate_limiter.hit(buckets) > 0
+
+
+@pytest.mark.anyio
+async def test_overloaded_hashing_is_answered_with_503(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    user = await create_random_user(dbsession)
+
+    async def _overloaded(*args: Any, **kwargs: Any) -> None:
+        raise PasswordHashingOverloadedException("Password hashing queue is full")
+
+    monkeypatch.setattr(password_hasher, "run", _overloaded)
+    url = fastapi_app.url_path_for("update_user", user_id=str(user.id))
+    response = await client.patch(
+        url,
+        json={"password": uuid.uuid4().hex},
+        headers={"Authorization": f"Bearer {create_access_token(str(user.id))}"},
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.json() == {"detail": "Password hashing queue is full"}
@@ -1,16 +1,27 @@
 import uuid
 
+import orjson
 import pytest
 from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
 from httpx import AsyncClient
+from pydantic import parse_obj_as
+from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.db.dao.user import UserDAO
+from backend.security import create_access_token
+from backend.services.cache.search import search_cache
+from backend.settings import settings
 from backend.tests.utils import (
     create_random_user,
+    create_superuser_token,
     create_user_with_exact_data,
     random_email,
 )
 from backend.web.api.auth.schema import Token
+from backend.web.api.user import schema
 
 
 @pytest.mark.anyio
@@ -113,6 +124,65 @@ async def test_get_user_fail_user_not_found(
     assert content["detail"] == "User not found"
 
 
+@pytest.mark.anyio
+async def test_get_user_conditional(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    user = await create_random_user(dbsession)
+    url = fastapi_app.url_path_for("get_user", user_id=str(user.id))
+
+    response = await client.get(url)
+    etag = response.headers["ETag"]
+    last_modified = response.headers["Last-Modified"]
+    assert etag.startswith('W/"')
+
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert not response.content
+
+    response = await client.get(url, headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+
+    await UserDAO(dbsession).update({"first_name": "changed"}, str(user.id))
+
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["first_name"] == "changed"
+    assert response.headers["ETag"] != etag
+
+    token = create_access_token(str(user.id))
+    me_url = fastapi_app.url_path_for("get_user_me")
+    response = await client.get(
+        me_url,
+        headers={
+            "Authorization": f"Bearer {token}",
+            "If-None-Match": response.headers["ETag"],
+        },
+    )
+    assert response.status_code == 304
+
+
+@pytest.mark.anyio
+async def test_credentials_are_loaded_by_authenticate_only(
+    dbsession: AsyncSession,
+) -> None:
+    user, data = await create_user_with_exact_data(dbsession)
+    user_dao = UserDAO(dbsession)
+    dbsession.expunge_all()
+
+    loaded = await user_dao.get(str(user.id))
+    with pytest.raises(InvalidRequestError):
+        loaded.hashed_password  # noqa: WPS428
+    dbsession.expunge_all()
+
+    authenticated = await user_dao.authenticate(data["username"], data["password"])
+    assert authenticated.hashed_password
+    assert authenticated.salt
+
+
 @pytest.mark.anyio
 async def test_update_user_success(
     fastapi_app: FastAPI,
@@ -138,7 +208,7 @@ async def test_update_user_success(
         "is_active": False,
         "is_reported": True,
         "is_blocked": True,
-        "preferences": uuid.uuid4().hex,
+        "preferences": {"theme": uuid.uuid4().hex},
     }
     response = await client.patch(
         user_url,
@@ -315,3 +385,258 @@ async def test_user_me_fail_credentials_error(
     assert response.status_code == 403
     content = response.json()
     assert content["detail"] == "Could not validate credentials"
+
+
+@pytest.mark.anyio
+async def test_get_users_cursor_pagination(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    users = [await create_random_user(dbsession) for _ in range(3)]
+    url = fastapi_app.url_path_for("get_users")
+
+    response = await client.get(url, params={"limit": 2})
+    assert response.status_code == 200
+    first_page = [user["id"] for user in response.json()]
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = await client.get(url, params={"limit": 2, "cursor": cursor})
+    assert response.status_code == 200
+    second_page = [user["id"] for user in response.json()]
+    assert "X-Next-Cursor" not in response.headers
+
+    assert first_page + second_page == [str(user.id) for user in users]
+
+
+@pytest.mark.anyio
+async def test_get_users_matches_response_model(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    user_dao = UserDAO(dbsession)
+    user = await create_random_user(dbsession)
+    await user_dao.update(
+        {"first_name": "Jörg", "preferences": {"theme": "dark", "size": 1.5}},
+        str(user.id),
+    )
+    await create_random_user(dbsession)
+    url = fastapi_app.url_path_for("get_users")
+
+    response = await client.get(url)
+
+    users = parse_obj_as(list[schema.User], await user_dao.get_multi())
+    expected = ORJSONResponse(jsonable_encoder(users)).body
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == expected
+
+
+@pytest.mark.anyio
+async def test_update_user_preferences(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    user = await create_random_user(dbsession)
+    other = await create_random_user(dbsession)
+    await UserDAO(dbsession).update(
+        {"preferences": {"theme": "dark", "lang": "en"}},
+        str(other.id),
+    )
+    headers = {"Authorization": f"Bearer {create_access_token(str(user.id))}"}
+    url = fastapi_app.url_path_for("update_user_preferences", user_id=str(user.id))
+
+    response = await client.patch(url, json={"theme": "dark"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["preferences"] == {"theme": "dark"}
+
+    response = await client.patch(
+        url,
+        json={"lang": "uk", "theme": None, "notify": {"email": True}},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["preferences"] == {"lang": "uk", "notify": {"email": True}}
+
+    users_url = fastapi_app.url_path_for("get_users")
+    response = await client.get(
+        users_url,
+        params={"preferences": '{"notify": {"email": true}}'},
+    )
+    assert [found["id"] for found in response.json()] == [str(user.id)]
+
+    response = await client.get(users_url, params={"preferences": '{"theme": "dark"}'})
+    assert [found["id"] for found in response.json()] == [str(other.id)]
+
+    response = await client.get(users_url, params={"preferences": "[1]"})
+    assert response.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_get_users_fail_invalid_cursor(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    url = fastapi_app.url_path_for("get_users")
+
+    response = await client.get(url, params={"cursor": uuid.uuid4().hex})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.anyio
+async def test_search_users(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    name = uuid.uuid4().hex[:8]
+    user_dao = UserDAO(dbsession)
+    for username, last_name in (
+        (f"{name}_anderson", None),
+        (f"{name}_andersen", None),
+        (uuid.uuid4().hex[:16], f"{name}anderson"),
+    ):
+        await user_dao.create(
+            {
+                "username": username,
+                "email": random_email(),
+                "hashed_password": uuid.uuid4().hex,
+                "last_name": last_name,
+            },
+        )
+    url = fastapi_app.url_path_for("search_users")
+
+    response = await client.get(url, params={"q": f"{name}_anderson"})
+    assert response.status_code == 200
+    found = response.json()
+    assert found[0]["username"] == f"{name}_anderson"
+    assert {user["username"] for user in found[:2]} == {
+        f"{name}_anderson",
+        f"{name}_andersen",
+    }
+
+    response = await client.get(url, params={"q": name.upper(), "limit": 2})
+    assert len(response.json()) == 2
+
+    hits = search_cache.hits
+    response = await client.get(url, params={"q": name, "limit": 2})
+    assert len(response.json()) == 2
+    assert search_cache.hits == hits + 1
+
+
+@pytest.mark.anyio
+async def test_search_results_with_changed_users_are_dropped(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    name = uuid.uuid4().hex[:8]
+    user_dao = UserDAO(dbsession)
+    renamed = await create_random_user(dbsession)
+    await user_dao.update({"last_name": f"{name}smith"}, str(renamed.id))
+    deleted = await create_random_user(dbsession)
+    await user_dao.update({"last_name": f"{name}smythe"}, str(deleted.id))
+    url = fastapi_app.url_path_for("search_users")
+
+    response = await client.get(url, params={"q": name})
+    assert len(response.json()) == 2
+    assert search_cache.get((name, 10)) is not None
+
+    await user_dao.update({"last_name": "jones"}, str(renamed.id))
+    assert search_cache.get((name, 10)) is None
+    response = await client.get(url, params={"q": name})
+    assert [user["id"] for user in response.json()] == [str(deleted.id)]
+
+    await user_dao.delete(str(deleted.id))
+    response = await client.get(url, params={"q": name})
+    assert response.json() == []
+
+
+@pytest.mark.anyio
+async def test_import_users(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # valid rows span two chunks, conflicts are reported from both
+    monkeypatch.setattr(settings, "users_import_chunk_size", 2)
+    headers = await create_superuser_token(dbsession)
+    existing = await create_random_user(dbsession)
+    rows = [
+        {"username": uuid.uuid4().hex, "email": random_email(), "password": "1"},
+        {"username": uuid.uuid4().hex, "email": random_email(), "password": "2"},
+        {"username": existing.username, "email": random_email(), "password": "3"},
+        {"username": uuid.uuid4().hex, "email": "not-an-email", "password": "4"},
+    ]
+    rows.append({**rows[0], "email": random_email()})
+
+    url = fastapi_app.url_path_for("import_users")
+    response = await client.post(
+        url,
+        content="\n".join(orjson.dumps(row).decode() for row in rows),
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    content = response.json()
+    assert content["created"] == 2
+    assert [error["index"] for error in content["failed"]] == [2, 3, 4]
+    assert content["failed"][0]["detail"] == "Username or email already exists"
+    assert content["rows_per_second"] > 0
+
+    token_url = fastapi_app.url_path_for("login_access_token")
+    response = await client.post(
+        token_url,
+        data={"username": rows[1]["username"], "password": "2"},
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.anyio
+async def test_import_users_fail_not_superuser(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    user = await create_random_user(dbsession)
+
+    url = fastapi_app.url_path_for("import_users")
+    response = await client.post(
+        url,
+        json=[],
+        headers={"Authorization": f"Bearer {create_access_token(str(user.id))}"},
+    )
+
+    assert response.status_code == 403
+
+
+@pytest.mark.anyio
+async def test_export_users(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    headers = await create_superuser_token(dbsession)
+    user = await create_random_user(dbsession)
+    url = fastapi_app.url_path_for("export_users")
+
+    response = await client.get(url, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [orjson.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 2
+    assert rows[1]["id"] == str(user.id)
+    assert rows[1]["username"] == user.username
+    assert "hashed_password" not in rows[1]
+
+    response = await client.get(url, params={"format": "csv"}, headers=headers)
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert lines[0].startswith("id,username,email")
+    assert lines[2].startswith(f"{user.id},{user.username},{user.email}")
@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.db.dao.user import UserDAO
 from backend.db.models.user import User
+from backend.security import create_access_token
 from backend.web.api.user import schema
 
 
@@ -37,3 +38,9 @@ async def create_user_with_exact_data(
 
     user_dao = UserDAO(dbsession)
     return await user_dao.create(user.dict()), data
+
+
+async def create_superuser_token(dbsession: AsyncSession) -> dict[str, str]:
+    user = await create_random_user(dbsession)
+    await UserDAO(dbsession).update({"is_superuser": True}, str(user.id))
+    return {"Authorization": f"Bearer {create_access_token(str(user.id))}"}
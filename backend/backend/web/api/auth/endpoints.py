@@ -6,13 +6,18 @@ from backend.db.dependencies.user import get_current_user
 from backend.db.models.user import User
 from backend.exceptions import InvalidPasswordException, UserNotFoundException
 from backend.security import create_access_token
+from backend.services.ratelimit.dependency import rate_limit
 from backend.web.api.auth.schema import Token
 from backend.web.api.user import schema
 
 router = APIRouter()
 
 
-@router.post("/access-token", response_model=Token)
+@router.post(
+    "/access-token",
+    response_model=Token,
+    dependencies=[Depends(rate_limit("login"))],
+)
 async def login_access_token(
     user_dao: UserDAO = Depends(),
     form_data: OAuth2PasswordRequestForm = Depends(),
@@ -26,6 +31,7 @@ async def login_access_token(
     Raises:
         HTTPException: User not found or password is invalid.
         HTTPException: User is not active.
+        HTTPException: Too many attempts from the client or for the username.
     """
 
     try:
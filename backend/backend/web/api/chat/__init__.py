@@ -0,0 +1,4 @@
+"""Chat API."""
+from backend.web.api.chat.endpoints import router
+
+__all__ = ["router"]
@@ -0,0 +1,399 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+from uuid import UUID, uuid4
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, WebSocket
+from pydantic import ValidationError, parse_raw_as
+from starlette import status
+from starlette.websockets import WebSocketDisconnect
+
+from backend.db.dao.message import MessageDAO, conversation_id
+from backend.db.dao.read_cursor import ReadCursorDAO
+from backend.db.dao.user import UserDAO
+from backend.db.dependencies.message import get_message_read_dao
+from backend.db.dependencies.read_cursor import get_read_cursor_read_dao
+from backend.db.dependencies.user import (
+    get_cached_user,
+    get_current_active_user,
+    get_token_subject,
+)
+from backend.db.models.read_cursor import ReadCursor
+from backend.db.models.user import User
+from backend.db.pagination import decode_cursor, encode_cursor
+from backend.exceptions import (
+    InvalidCursorException,
+    MessageNotStoredException,
+    UserNotFoundException,
+)
+from backend.services.chat.buffer import MessageBuffer
+from backend.services.chat.dependency import (
+    get_chat_hub,
+    get_event_relay,
+    get_history_cache,
+    get_message_buffer,
+    get_presence_tracker,
+)
+from backend.services.chat.events import EventRelay
+from backend.services.chat.history import FIELDS, HistoryCache
+from backend.services.chat.hub import ChatConnection, ChatHub
+from backend.services.chat.presence import PresenceTracker
+from backend.settings import settings
+from backend.web.api.chat.schema import (
+    ChatFrameIn,
+    ChatMessage,
+    ChatMessageIn,
+    ChatReadCursor,
+    ChatReadIn,
+    ChatTypingIn,
+    ChatWatchIn,
+    Presence,
+)
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@router.get(
+    "/conversations/{user_id}/messages",
+    response_model=list[ChatMessage],
+)
+async def get_history(
+    user_id: UUID,
+    response: Response,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user),
+    message_dao: MessageDAO = Depends(get_message_read_dao),
+    history: HistoryCache = Depends(get_history_cache),
+) -> list[dict[str, Any]]:
+    """Get messages exchanged with the user, newest first.
+
+    The newest page comes from the redis history cache, older pages are
+    read from the database. A full page carries the cursor of the next one
+    in the X-Next-Cursor header.
+
+    Args:
+        user_id (UUID): ID of the other user.
+        response (Response): Response to set headers on.
+        limit (int): Max amount of messages to return. Defaults to 50.
+        cursor (Optional[str], optional): Cursor of the page.
+        current_user (User): Current user.
+        message_dao (MessageDAO): Message DAO.
+        history (HistoryCache): History cache.
+
+    Raises:
+        HTTPException: Invalid cursor.
+
+    Returns:
+        list[dict[str, Any]]: Messages.
+    """
+
+    before = None
+    if cursor:
+        try:
+            before = decode_cursor(cursor)
+        except InvalidCursorException as error:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            ) from error
+
+    conversation = conversation_id(current_user.id, user_id)
+
+    async def _load(count: int) -> list[dict[str, Any]]:  # noqa: WPS430
+        messages = await message_dao.get_history(conversation, count, before)
+        return [
+            {field: getattr(message, field) for field in FIELDS} for message in messages
+        ]
+
+    messages = await history.load(conversation, limit, before, _load)
+
+    if len(messages) == limit:
+        last = messages[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            last["created_at"],
+            last["id"],
+        )
+    return messages
+
+
+@router.get(
+    "/conversations/{user_id}/read-cursors",
+    response_model=list[ChatReadCursor],
+)
+async def get_read_cursors(
+    user_id: UUID,
+    current_user: User = Depends(get_current_active_user),
+    read_cursor_dao: ReadCursorDAO = Depends(get_read_cursor_read_dao),
+) -> list[ReadCursor]:
+    """Get the last messages both users have seen in the conversation.
+
+    Cursors are stored in batches, so they may lag behind read markers
+    delivered over the WebSocket by a couple of seconds.
+
+    Args:
+        user_id (UUID): ID of the other user.
+        current_user (User): Current user.
+        read_cursor_dao (ReadCursorDAO): Read cursor DAO.
+
+    Returns:
+        list[ReadCursor]: Read cursors.
+    """
+
+    return await read_cursor_dao.get_by_conversation(current_user.id, user_id)
+
+
+@router.get("/presence", response_model=list[Presence])
+async def get_presence(
+    user_ids: list[UUID] = Query(
+        ...,
+        alias="user_id",
+        min_items=1,
+        max_items=settings.presence_lookup_max_ids,
+    ),
+    current_user: User = Depends(get_current_active_user),
+    presence: PresenceTracker = Depends(get_presence_tracker),
+) -> list[dict[str, Any]]:
+    """Get online status of several users in one redis round trip.
+
+    Args:
+        user_ids (list[UUID]): User IDs, passed as repeated ``user_id``
+            query parameters.
+        current_user (User): Current user.
+        presence (PresenceTracker): Presence tracker.
+
+    Returns:
+        list[dict[str, Any]]: Statuses in the order of IDs.
+    """
+
+    last_seen = await presence.lookup([str(user_id) for user_id in user_ids])
+    return [
+        {
+            "user_id": user_id,
+            "online": seen is not None,
+            "last_seen": None if seen is None else datetime.utcfromtimestamp(seen),
+        }
+        for user_id, seen in last_seen.items()
+    ]
+
+
+@router.websocket("/ws")
+async def chat_gateway(
+    websocket: WebSocket,
+    token: Optional[str] = Query(None),
+    hub: ChatHub = Depends(get_chat_hub),
+    buffer: MessageBuffer = Depends(get_message_buffer),
+    relay: EventRelay = Depends(get_event_relay),
+    user_dao: UserDAO = Depends(),
+) -> None:
+    """Exchange direct messages over a WebSocket.
+
+    Clients authenticate with the access token in the ``token`` query
+    parameter and send ``{"to": <user id>, "text": <text>, "ack": <bool>}``
+    frames. Every message is delivered to all connections of the recipient
+    and of the sender as ``{"type": "message", "id", "from", "to", "text",
+    "sent_at"}`` and stored in background, the history cache gets it
+    once it is stored.
+    With ``ack`` the message is delivered only after it is committed,
+    and the sender gets ``{"type": "ack", "id"}``.
+
+    ``{"type": "watch", "users": [<user id>, ...]}`` frames replace the users
+    the connection follows, those of them who came online or went offline
+    are sent as ``{"type": "presence", "online", "offline"}`` once per
+    presence interval.
+
+    ``{"type": "typing", "to"}`` and ``{"type": "read", "to", "id"}``
+    frames are ephemeral, the other user gets them in batches as
+    ``{"type": "events", "events": [...]}``, read markers also move the
+    reader's read cursor. Read markers of unknown messages are answered
+    with an error.
+
+    Args:
+        websocket (WebSocket): Client connection.
+        token (str, optional): JWT token.
+        hub (ChatHub): Chat hub of the worker.
+        buffer (MessageBuffer): Write-behind buffer of messages.
+        relay (EventRelay): Relay of typing and read events.
+        user_dao (UserDAO): User DAO on the primary.
+    """
+
+    user = await _authenticate(user_dao, token)
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    connection = await hub.connect(str(user.id), websocket)
+    sender = asyncio.create_task(connection.deliver())
+    try:
+        while True:  # noqa: WPS457
+            await _receive_frame(hub, buffer, relay, connection)
+    except WebSocketDisconnect:
+        logger.debug(f"User {user.id} disconnected")
+    finally:
+        sender.cancel()
+        await hub.disconnect(connection)
+
+
+async def _authenticate(user_dao: UserDAO, token: Optional[str]) -> Optional[User]:
+    """Get active user the token was issued to.
+
+    The database session is closed right after the lookup,
+    connections must not hold it while they are open.
+
+    Args:
+        user_dao (UserDAO): User DAO on the primary.
+        token (str, optional): JWT token.
+
+    Returns:
+        Optional[User]: User or None if the token is not valid.
+    """
+
+    if token is None:
+        return None
+
+    try:
+        user = await get_cached_user(get_token_subject(token), user_dao)
+    except HTTPException:
+        return None
+    finally:
+        await user_dao.session.close()
+
+    if not user.is_active:
+        return None
+    return user
+
+
+async def _receive_frame(
+    hub: ChatHub,
+    buffer: MessageBuffer,
+    relay: EventRelay,
+    connection: ChatConnection,
+) -> None:
+    """Receive frame from the client and handle it.
+
+    Args:
+        hub (ChatHub): Chat hub of the worker.
+        buffer (MessageBuffer): Write-behind buffer of messages.
+        relay (EventRelay): Relay of typing and read events.
+        connection (ChatConnection): Client connection.
+    """
+
+    frame = await connection.websocket.receive_text()
+    try:
+        parsed = parse_raw_as(ChatFrameIn, frame)  # type: ignore
+    except ValidationError as error:
+        connection.push(
+            orjson.dumps({"type": "error", "detail": error.errors()}).decode(),
+        )
+        return
+
+    handler = FRAME_HANDLERS[parsed.type]
+    await handler(hub, buffer, relay, connection, parsed)
+
+
+async def _typing(
+    hub: ChatHub,
+    buffer: MessageBuffer,
+    relay: EventRelay,
+    connection: ChatConnection,
+    frame: ChatTypingIn,
+) -> None:
+    relay.typing(connection.user_id, str(frame.to))
+
+
+async def _watch(
+    hub: ChatHub,
+    buffer: MessageBuffer,
+    relay: EventRelay,
+    connection: ChatConnection,
+    frame: ChatWatchIn,
+) -> None:
+    hub.watch(connection, {str(user_id) for user_id in frame.users})
+
+
+async def _read(
+    hub: ChatHub,
+    buffer: MessageBuffer,
+    relay: EventRelay,
+    connection: ChatConnection,
+    frame: ChatReadIn,
+) -> None:
+    if not await relay.read(connection.user_id, str(frame.to), frame.id):
+        connection.push(
+            orjson.dumps(
+                {"type": "error", "id": frame.id, "detail": "Message not found"},
+            ).decode(),
+        )
+
+
+async def _send_message(
+    hub: ChatHub,
+    buffer: MessageBuffer,
+    relay: EventRelay,
+    connection: ChatConnection,
+    message: ChatMessageIn,
+) -> None:
+    """Store message and publish it.
+
+    Args:
+        hub (ChatHub): Chat hub of the worker.
+        buffer (MessageBuffer): Write-behind buffer of messages.
+        relay (EventRelay): Relay of typing and read events.
+        connection (ChatConnection): Client connection.
+        message (ChatMessageIn): Message.
+    """
+
+    sender = UUID(connection.user_id)
+    row = {
+        "id": uuid4(),
+        "created_at": datetime.utcnow(),
+        "conversation_id": conversation_id(sender, message.to),
+        "sender_id": sender,
+        "recipient_id": message.to,
+        "text": message.text,
+    }
+    try:
+        await buffer.put(row, durable=message.ack)
+    except UserNotFoundException:
+        connection.push(
+            orjson.dumps(
+                {"type": "error", "id": row["id"], "detail": "Recipient not found"},
+            ).decode(),
+        )
+        return
+    except MessageNotStoredException:
+        connection.push(
+            orjson.dumps(
+                {"type": "error", "id": row["id"], "detail": "Message not stored"},
+            ).decode(),
+        )
+        return
+
+    await hub.publish(
+        {str(message.to), connection.user_id},
+        {
+            "type": "message",
+            "id": row["id"],
+            "from": connection.user_id,
+            "to": message.to,
+            "text": message.text,
+            "sent_at": row["created_at"],
+        },
+    )
+    if message.ack:
+        connection.push(orjson.dumps({"type": "ack", "id": row["id"]}).decode())
+
+
+# handlers of client frames by their type, all take the same arguments
+FRAME_HANDLERS: dict[str, Callable[..., Awaitable[None]]] = {
+    "message": _send_message,
+    "typing": _typing,
+    "read": _read,
+    "watch": _watch,
+}
@@ -0,0 +1,94 @@
+from datetime import datetime
+from typing import Literal, Optional, Union
+from uuid import UUID
+
+from pydantic import BaseModel, conlist, constr, validator
+
+from backend.settings import settings
+
+
+class ChatMessageIn(BaseModel):
+    """Direct message sent by a client."""
+
+    type: Literal["message"] = "message"
+    to: UUID
+    text: constr(  # type: ignore
+        min_length=1,
+        max_length=settings.chat_message_max_length,
+    )
+    # wait until the message is stored before delivering and acknowledging it
+    ack: bool = False
+
+    @validator("text")
+    def without_nul(cls, text: str) -> str:  # noqa: N805
+        """Reject NUL characters, PostgreSQL can't store them in text.
+
+        Args:
+            text (str): Text of the message.
+
+        Raises:
+            ValueError: Text contains NUL.
+
+        Returns:
+            str: Text of the message.
+        """
+
+        if "\x00" in text:
+            raise ValueError("text must not contain NUL characters")
+        return text
+
+
+class ChatTypingIn(BaseModel):
+    """Client is typing a message to the user."""
+
+    type: Literal["typing"]
+    to: UUID
+
+
+class ChatReadIn(BaseModel):
+    """Client has seen messages of the user up to the given one."""
+
+    type: Literal["read"]
+    to: UUID
+    # when the message was sent is looked up, clients can't move cursors ahead
+    id: UUID
+
+
+class ChatWatchIn(BaseModel):
+    """Client follows presence of the users, replacing the previous list."""
+
+    type: Literal["watch"]
+    users: conlist(UUID, max_items=settings.presence_watch_max_ids)  # type: ignore
+
+
+# Frames without a type are messages.
+ChatFrameIn = Union[ChatMessageIn, ChatTypingIn, ChatReadIn, ChatWatchIn]
+
+
+class ChatMessage(BaseModel):
+    """Stored direct message."""
+
+    id: UUID
+    sender_id: UUID
+    recipient_id: UUID
+    text: str
+    created_at: datetime
+
+
+class Presence(BaseModel):
+    """Online status of a user."""
+
+    user_id: UUID
+    online: bool
+    last_seen: Optional[datetime]
+
+
+class ChatReadCursor(BaseModel):
+    """Newest message of a conversation the user has seen."""
+
+    user_id: UUID
+    last_read_id: UUID
+    last_read_at: datetime
+
+    class Config:
+        orm_mode = True
@@ -1,4 +1,24 @@
-from fastapi import APIRouter
+from typing import Any
+
+from fastapi import APIRouter, Depends, Request, Response, status
+
+from backend.db.pool import pool_stats
+from backend.security import password_hasher
+from backend.services.cache.search import search_cache
+from backend.services.cache.user import user_cache
+from backend.services.chat.dependency import get_history_cache
+from backend.services.chat.history import HistoryCache
+from backend.services.metrics.prometheus import render_metrics
+from backend.services.readiness.dependency import get_readiness_probe
+from backend.services.readiness.probe import ReadinessProbe
+from backend.web.api.monitoring.schema import (
+    CacheStats,
+    HashingStats,
+    HistoryStats,
+    PoolStats,
+    Readiness,
+    ReplicaStats,
+)
 
 router = APIRouter()
 
@@ -10,3 +30,117 @@ def health_check() -> None:
 
     It returns 200 if the project is healthy.
     """
+
+
+@router.get(
+    "/ready",
+    response_model=Readiness,
+    responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"model": Readiness}},
+)
+async def readiness_check(
+    response: Response,
+    probe: ReadinessProbe = Depends(get_readiness_probe),
+) -> dict[str, Any]:
+    """
+    Checks whether this worker is ready to serve requests.
+
+    Unlike the health check it returns 503 until pools are warmed up
+    and while the database or redis don't answer. Checks are cached
+    for a few seconds, frequent probes don't reach the dependencies.
+
+    :param response: current response.
+    :param probe: readiness probe of this worker.
+    :returns: readiness and results of dependency checks.
+    """
+    readiness = await probe.status()
+    if not readiness["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return readiness
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics() -> Response:
+    """
+    Get metrics of all workers in the Prometheus text format.
+
+    Requests are counted by a middleware, pool gauges are refreshed
+    by every worker in background.
+
+    :returns: metrics.
+    """
+    content, media_type = render_metrics()
+    return Response(content, media_type=media_type)
+
+
+@router.get("/stats/hashing", response_model=HashingStats)
+def get_hashing_stats() -> dict[str, Any]:
+    """
+    Get password hashing pool statistics.
+
+    Queue depth and per-hash timings help to size the pool against login latency.
+
+    :returns: hashing statistics.
+    """
+    return password_hasher.stats()
+
+
+@router.get("/stats/user-cache", response_model=CacheStats)
+def get_user_cache_stats() -> dict[str, Any]:
+    """
+    Get authenticated user cache statistics.
+
+    Every hit is a database read saved.
+
+    :returns: cache statistics.
+    """
+    return user_cache.stats()
+
+
+@router.get("/stats/user-search-cache", response_model=CacheStats)
+def get_user_search_cache_stats() -> dict[str, Any]:
+    """
+    Get cache statistics of frequent user search queries.
+
+    :returns: cache statistics.
+    """
+    return search_cache.stats()
+
+
+@router.get("/stats/chat-history", response_model=HistoryStats)
+def get_chat_history_stats(
+    history: HistoryCache = Depends(get_history_cache),
+) -> dict[str, Any]:
+    """
+    Get chat history cache statistics.
+
+    Hit ratio and history load latency of this worker,
+    cursor pages are always read from the database.
+
+    :param history: history cache.
+    :returns: cache statistics.
+    """
+    return history.stats()
+
+
+@router.get("/stats/db-pool", response_model=PoolStats)
+def get_db_pool_stats(request: Request) -> dict[str, Any]:
+    """
+    Get database connection pool statistics.
+
+    Checkout wait histogram shows pool exhaustion before it turns into timeouts.
+
+    :param request: current request.
+    :returns: pool statistics.
+    """
+    return pool_stats(request.app.state.db_engine)
+
+
+@router.get("/stats/db-replicas", response_model=list[ReplicaStats])
+def get_db_replicas_stats(request: Request) -> list[dict[str, Any]]:
+    """
+    Get replication lag and health of read replicas.
+
+    :param request: current request.
+    :returns: replicas statistics.
+    """
+    return request.app.state.db_replicas.stats()
@@ -0,0 +1,74 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class Readiness(BaseModel):
+    """Readiness of a worker, dependencies map to whether they answered."""
+
+    ready: bool
+    warmed_up: bool
+    checks: dict[str, bool]
+
+
+class HashingStats(BaseModel):
+    """Password hashing pool statistics."""
+
+    workers: int
+    queue_size: int
+    queue_depth: int
+    in_flight: int
+    completed_total: int
+    rejected_total: int
+    hash_seconds_avg: float
+    hash_seconds_max: float
+    wait_seconds_avg: float
+
+
+class CacheStats(BaseModel):
+    """In-process cache statistics."""
+
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    hit_ratio: float
+
+
+class HistogramSnapshot(BaseModel):
+    """Cumulative histogram, bucket upper bounds map to counts."""
+
+    count: int
+    sum: float
+    buckets: dict[str, int]
+
+
+class PoolStats(BaseModel):
+    """Database connection pool statistics."""
+
+    pool_class: str
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    timeouts_total: int
+    acquire_seconds: Optional[HistogramSnapshot]
+
+
+class ReplicaStats(BaseModel):
+    """Read replica state."""
+
+    url: str
+    lag_seconds: Optional[float]
+    healthy: bool
+
+
+class HistoryStats(BaseModel):
+    """Chat history cache statistics."""
+
+    hits: int
+    misses: int
+    hit_ratio: float
+    load_seconds_p50: float
+    load_seconds_p99: float
+    load_seconds: HistogramSnapshot
@@ -1,9 +1,10 @@
 from aioredis import Redis
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 from fastapi.param_functions import Depends
 
 from backend.services.redis.dependency import get_redis_connection
-from backend.web.api.redis.schema import RedisValueDTO
+from backend.settings import settings
+from backend.web.api.redis.schema import RedisBatchDTO, RedisValueDTO
 
 router = APIRouter()
 
@@ -40,3 +41,55 @@ async def set_redis_value(
     """
     if redis_value.value is not None:
         await redis.set(name=redis_value.key, value=redis_value.value)
+
+
+@router.get("/batch", response_model=list[RedisValueDTO])
+async def get_redis_values(
+    keys: list[str] = Query(
+        ...,
+        alias="key",
+        min_items=1,
+        max_items=settings.redis_batch_max_keys,
+    ),
+    redis: Redis = Depends(get_redis_connection),
+) -> list[RedisValueDTO]:
+    """
+    Get several values from redis with a single MGET.
+
+    :param keys: redis keys, passed as repeated ``key`` query parameters.
+    :param redis: redis connection.
+    :returns: values in the order of keys, missing keys have null values.
+    """
+    redis_values = await redis.mget(keys)
+    return [
+        RedisValueDTO(key=key, value=redis_value)
+        for key, redis_value in zip(keys, redis_values)
+    ]
+
+
+@router.put("/batch")
+async def set_redis_values(
+    batch: RedisBatchDTO,
+    redis: Redis = Depends(get_redis_connection),
+) -> None:
+    """
+    Set several values in redis in one round trip.
+
+    All values are written in a single MULTI/EXEC pipeline,
+    entries with null values are skipped.
+
+    :param batch: values to set and their optional ttl.
+    :param redis: redis connection.
+    """
+    mapping = {
+        entry.key: entry.value for entry in batch.entries if entry.value is not None
+    }
+    if not mapping:
+        return
+
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.mset(mapping)
+        if batch.ttl is not None:
+            for key in mapping:
+                pipe.expire(key, batch.ttl)
+        await pipe.execute()
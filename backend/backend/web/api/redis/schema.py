@@ -1,6 +1,8 @@
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from backend.settings import settings
 
 
 class RedisValueDTO(BaseModel):
@@ -8,3 +10,14 @@ class RedisValueDTO(BaseModel):
 
     key: str
     value: Optional[str]  # noqa: WPS110
+
+
+class RedisBatchDTO(BaseModel):
+    """DTO for setting several redis values at once."""
+
+    entries: list[RedisValueDTO] = Field(
+        ...,
+        min_items=1,
+        max_items=settings.redis_batch_max_keys,
+    )
+    ttl: Optional[int] = Field(None, gt=0, description="Expiration in seconds.")
@@ -1,11 +1,12 @@
 from fastapi.routing import APIRouter
 
-from backend.web.api import auth, echo, monitoring, redis, user
+from backend.web.api import auth, chat, echo, monitoring, redis, user
 
 api_router = APIRouter()
 
 api_router.include_router(user.router, prefix="/users", tags=["users"])
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
+api_router.include_router(chat.router, prefix="/chat", tags=["chat"])
 
 api_router.include_router(monitoring.router, tags=["monitoring"])
 api_router.include_router(echo.router, tags=["echo"])
@@ -0,0 +1,103 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from uuid import UUID
+
+from fastapi import Request, Response, status
+
+
+def user_etag(user_id: UUID, updated_at: datetime) -> str:
+    """Build weak ETag of a user version.
+
+    Args:
+        user_id (UUID): User ID.
+        updated_at (datetime): Last update time of the user, naive UTC.
+
+    Returns:
+        str: Weak ETag.
+    """
+
+    return f'W/"{user_id.hex}-{updated_at:%Y%m%d%H%M%S%f}"'
+
+
+def validator_headers(
+    user_id: UUID,
+    updated_at: datetime,
+    cache_control: str,
+) -> dict[str, str]:
+    """Build ETag, Last-Modified and Cache-Control headers of a user version.
+
+    Args:
+        user_id (UUID): User ID.
+        updated_at (datetime): Last update time of the user, naive UTC.
+        cache_control (str): Cache-Control header.
+
+    Returns:
+        dict[str, str]: Headers.
+    """
+
+    return {
+        "ETag": user_etag(user_id, updated_at),
+        "Last-Modified": format_datetime(
+            updated_at.replace(tzinfo=timezone.utc),
+            usegmt=True,
+        ),
+        "Cache-Control": cache_control,
+    }
+
+
+def not_modified(
+    request: Request,
+    user_id: UUID,
+    updated_at: datetime,
+    cache_control: str,
+) -> Optional[Response]:
+    """Answer conditional request if the client has the current version.
+
+    If-None-Match takes precedence, If-Modified-Since is only checked
+    without it, as RFC 7232 requires.
+
+    Args:
+        request (Request): Current request.
+        user_id (UUID): User ID.
+        updated_at (datetime): Last update time of the user, naive UTC.
+        cache_control (str): Cache-Control header.
+
+    Returns:
+        Optional[Response]: 304 response or None if the body must be sent.
+    """
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if not _etag_matches(if_none_match, user_etag(user_id, updated_at)):
+            return None
+    elif not _not_modified_since(request.headers.get("if-modified-since"), updated_at):
+        return None
+
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=validator_headers(user_id, updated_at, cache_control),
+    )
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison.
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+def _not_modified_since(if_modified_since: Optional[str], updated_at: datetime) -> bool:
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    # Last-Modified has whole seconds.
+    return updated_at.replace(microsecond=0) <= since
@@ -1,77 +1,344 @@
-from typing import Optional
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Optional, Sequence
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import orjson
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.exc import IntegrityError
 
-from backend.db.dao.user import UserDAO
-from backend.db.dependencies.user import get_current_active_user
+from backend.db.dao.user import PUBLIC_COLUMNS, UserDAO
+from backend.db.dependencies.user import (
+    get_current_active_superuser,
+    get_current_active_user,
+    get_user_read_dao,
+)
 from backend.db.models.user import User
-from backend.exceptions import UserNotFoundException
+from backend.db.pagination import decode_cursor, encode_cursor
+from backend.exceptions import InvalidCursorException, UserNotFoundException
+from backend.services.cache.search import search_cache
+from backend.services.ratelimit.dependency import rate_limit
+from backend.settings import settings
 from backend.web.api.user import schema
+from backend.web.api.user.conditional import not_modified, validator_headers
+from backend.web.api.user.serialization import rows_to_csv, rows_to_json, rows_to_ndjson
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+EXPORT_MEDIA_TYPES = {
+    schema.ExportFormat.ndjson: NDJSON_MEDIA_TYPE,
+    schema.ExportFormat.csv: CSV_MEDIA_TYPE,
+}
+# users are cached by clients but revalidated with ETag on every use
+ME_CACHE_CONTROL = "private, no-cache"
+USER_CACHE_CONTROL = "no-cache"
+
 
 @router.get("/", response_model=list[schema.User])
 async def get_users(
     skip: Optional[int] = 0,
     limit: Optional[int] = 100,
-    user_dao: UserDAO = Depends(),
-) -> list[User]:
-    """Get list of users.
+    cursor: Optional[str] = None,
+    preferences: Optional[str] = None,
+    user_dao: UserDAO = Depends(get_user_read_dao),
+) -> Response:
+    """Get list of users ordered by creation time.
+
+    A full page carries the cursor of the next page in the X-Next-Cursor header.
+    Passing it back as ``cursor`` reads the next page with an index seek instead
+    of skipping rows, so deep pages stay as fast as the first one.
+
+    Only the columns of ``schema.User`` are selected and the page is encoded
+    straight from row tuples, skipping ORM objects and response model
+    validation, which dominate CPU time of large pages. The JSON is the same.
+
+    ``preferences`` is a JSON object, only users whose preferences contain
+    it are returned, which is served by the GIN index of preferences.
 
     Args:
         skip (Optional[int], optional): Number of users to skip. Defaults to 0.
         limit (Optional[int], optional): Max amount of users to return. Defaults to 100.
+        cursor (Optional[str], optional): Cursor of the page. Overrides skip.
+        preferences (Optional[str], optional): Preferences users must contain.
         user_dao (UserDAO, optional): User DAO.
 
+    Raises:
+        HTTPException: Invalid cursor.
+        HTTPException: Preferences filter is not a JSON object.
+
     Returns:
-        list[User]: List of users.
+        Response: JSON list of users.
     """
 
-    return await user_dao.get_multi(offset=skip, limit=limit)
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except InvalidCursorException as error:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            ) from error
+        skip = 0
+
+    expr = []
+    if preferences is not None:
+        expr.append(User.preferences.contains(_parse_preferences(preferences)))
+
+    rows = await user_dao.get_multi_rows(
+        schema.USER_COLUMNS,
+        expr,
+        offset=skip,
+        limit=limit,
+        after=after,
+    )
+
+    headers = {}
+    if rows and len(rows) == limit:
+        last = rows[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    return Response(
+        rows_to_json(schema.USER_KEYS, rows),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+def _parse_preferences(preferences: str) -> dict[str, Any]:
+    try:
+        parsed = orjson.loads(preferences)
+    except orjson.JSONDecodeError:
+        parsed = None
+    if not isinstance(parsed, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Preferences must be a JSON object",
+        )
+    return parsed
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {
+                NDJSON_MEDIA_TYPE: {},
+                CSV_MEDIA_TYPE: {},
+            },
+        },
+    },
+)
+async def export_users(
+    export_format: schema.ExportFormat = Query(
+        schema.ExportFormat.ndjson,
+        alias="format",
+    ),
+    user_dao: UserDAO = Depends(get_user_read_dao),
+    current_user: User = Depends(get_current_active_superuser),
+) -> StreamingResponse:
+    """Stream all users as NDJSON or CSV.
+
+    Rows are read through a server-side cursor and serialized chunk by chunk,
+    so memory stays flat however large the table is.
+
+    Args:
+        export_format (schema.ExportFormat): Output format.
+        user_dao (UserDAO, optional): User DAO.
+        current_user (User, optional): Current superuser.
+
+    Returns:
+        StreamingResponse: Users stream.
+    """
+
+    return StreamingResponse(
+        _export_rows(user_dao, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f"attachment; filename=users.{export_format.value}",
+        },
+    )
+
+
+async def _export_rows(
+    user_dao: UserDAO,
+    export_format: schema.ExportFormat,
+) -> AsyncIterator[bytes]:
+    """Serialize all users chunk by chunk.
+
+    Args:
+        user_dao (UserDAO): User DAO.
+        export_format (schema.ExportFormat): Output format.
+
+    Yields:
+        bytes: Serialized chunk of users, CSV starts with a header.
+    """
+
+    keys = [column.key for column in PUBLIC_COLUMNS]
+    chunks = user_dao.stream_public_rows(settings.users_export_chunk_size)
+    try:
+        if export_format == schema.ExportFormat.csv:
+            yield rows_to_csv([keys])
+        async for chunk in chunks:
+            yield _serialize_export(export_format, keys, chunk)
+    except asyncio.CancelledError:
+        logger.info("Client disconnected during users export")
+        raise
+    finally:
+        await chunks.aclose()
+
+
+def _serialize_export(
+    export_format: schema.ExportFormat,
+    keys: list[str],
+    rows: Sequence[Sequence[Any]],
+) -> bytes:
+    if export_format == schema.ExportFormat.csv:
+        return rows_to_csv(rows)
+    return rows_to_ndjson(keys, rows)
 
 
 @router.get("/me", response_model=schema.User)
-async def get_user_me(current_user: User = Depends(get_current_active_user)) -> User:
+async def get_user_me(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_active_user),
+) -> User | Response:
     """Get current user.
 
+    Answers 304 Not Modified if the client has the current version.
+
     Args:
+        request (Request): Current request.
+        response (Response): Response to set headers on.
         current_user (User, optional): Current user.
 
     Returns:
-        User: Current user.
+        User | Response: Current user or 304 response.
     """
 
+    unchanged = not_modified(
+        request,
+        current_user.id,
+        current_user.updated_at,
+        ME_CACHE_CONTROL,
+    )
+    if unchanged is not None:
+        return unchanged
+
+    response.headers.update(
+        validator_headers(current_user.id, current_user.updated_at, ME_CACHE_CONTROL),
+    )
     return current_user
 
 
+@router.get("/search", response_model=list[schema.User])
+async def search_users(
+    q: str = Query(..., min_length=1, max_length=64),
+    limit: int = Query(10, ge=1, le=settings.users_search_max_limit),
+    user_dao: UserDAO = Depends(get_user_read_dao),
+) -> list[dict[str, Any]]:
+    """Search users by username, first name, last name or email.
+
+    Prefix and fuzzy matches are ranked by similarity. Results of frequent
+    queries are cached by the worker for a short time, until one of their
+    users changes.
+
+    Args:
+        q (str): Search query.
+        limit (int): Max amount of users to return. Defaults to 10.
+        user_dao (UserDAO, optional): User DAO.
+
+    Returns:
+        list[dict[str, Any]]: Found users.
+    """
+
+    key = (q.strip().lower(), limit)
+    if not key[0]:
+        return []
+
+    users = search_cache.get(key)
+    if users is None:
+        epoch = search_cache.epoch
+        found = await user_dao.search(key[0], limit)
+        users = [schema.User.from_orm(user).dict() for user in found]
+        search_cache.set(key, users, epoch=epoch)
+    return users
+
+
 @router.get("/{user_id}", response_model=schema.User)
-async def get_user(user_id: UUID, user_dao: UserDAO = Depends()) -> User:
+async def get_user(
+    user_id: UUID,
+    request: Request,
+    response: Response,
+    user_dao: UserDAO = Depends(get_user_read_dao),
+) -> User | Response:
     """Get user by id.
 
+    Conditional requests are answered by the last update time of the user,
+    which is read without loading the whole row, so a client with the current
+    version gets 304 Not Modified cheaply.
+
     Args:
         user_id (UUID): User ID.
+        request (Request): Current request.
+        response (Response): Response to set headers on.
         user_dao (UserDAO, optional): User DAO.
 
     Raises:
         UserNotFoundException: User not found.
 
     Returns:
-        User: User.
+        User | Response: User or 304 response.
     """
 
     try:
-        return await user_dao.get(str(user_id))
+        if "if-none-match" in request.headers or "if-modified-since" in request.headers:
+            updated_at = await user_dao.get_version(user_id)
+            unchanged = not_modified(
+                request,
+                user_id,
+                updated_at,
+                USER_CACHE_CONTROL,
+            )
+            if unchanged is not None:
+                return unchanged
+        user = await user_dao.get(str(user_id))
     except UserNotFoundException as error:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         ) from error
 
+    response.headers.update(
+        validator_headers(user.id, user.updated_at, USER_CACHE_CONTROL),
+    )
+    return user
+
 
-@router.post("/", status_code=status.HTTP_201_CREATED, response_model=schema.User)
+@router.post(
+    "/",
+    status_code=status.HTTP_201_CREATED,
+    response_model=schema.User,
+    dependencies=[Depends(rate_limit("register"))],
+)
 async def create_user(user: schema.UserCreate, user_dao: UserDAO = Depends()) -> User:
     """Create new user.
 
@@ -81,6 +348,7 @@ async def create_user(user: schema.UserCreate, user_dao: UserDAO = Depends()) ->
 
     Raises:
         HTTPException: User already exists.
+        HTTPException: Too many registrations from the client.
 
     Returns:
         User: User.
@@ -97,6 +365,138 @@ async def create_user(user: schema.UserCreate, user_dao: UserDAO = Depends()) ->
         raise error
 
 
+@router.post(
+    "/bulk",
+    response_model=schema.UserImportResult,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {
+                        "type": "array",
+                        "items": {"$ref": "#/components/schemas/UserCreate"},
+                    },
+                },
+                NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}},
+            },
+        },
+    },
+)
+async def import_users(
+    request: Request,
+    user_dao: UserDAO = Depends(),
+    current_user: User = Depends(get_current_active_superuser),
+) -> dict[str, Any]:
+    """Create users in bulk from a JSON array or NDJSON.
+
+    Invalid rows and rows whose username or email already exists are reported
+    back by index, the rest of the batch is created.
+
+    Args:
+        request (Request): Request with users data.
+        user_dao (UserDAO, optional): User DAO.
+        current_user (User, optional): Current superuser.
+
+    Returns:
+        dict[str, Any]: Import result with throughput stats.
+    """
+
+    start = time.perf_counter()
+    rows = await _parse_import_rows(request)
+    valid, failed = _validate_import_rows(rows)
+
+    conflicts = await user_dao.create_many([obj for _, obj in valid])
+    for position in conflicts:
+        index, obj = valid[position]
+        failed.append(_import_error(index, obj, "Username or email already exists"))
+
+    seconds = time.perf_counter() - start
+    return {
+        "created": len(valid) - len(conflicts),
+        "failed": sorted(failed, key=lambda error: error.index),
+        "seconds": seconds,
+        "rows_per_second": len(rows) / seconds,
+    }
+
+
+async def _parse_import_rows(request: Request) -> list[Any]:
+    """Parse bulk import body.
+
+    Args:
+        request (Request): Request with a JSON array or NDJSON body.
+
+    Raises:
+        HTTPException: Body is not valid JSON or NDJSON.
+        HTTPException: Too many rows.
+
+    Returns:
+        list[Any]: Rows to import.
+    """
+
+    body = await request.body()
+    try:
+        if request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+            rows = [orjson.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            rows = orjson.loads(body)
+    except orjson.JSONDecodeError as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Body must be a JSON array or NDJSON",
+        ) from error
+
+    if not isinstance(rows, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Body must be a JSON array or NDJSON",
+        )
+    if len(rows) > settings.users_import_max_rows:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Can't import more than {settings.users_import_max_rows} users",
+        )
+    return rows
+
+
+def _validate_import_rows(
+    rows: list[Any],
+) -> tuple[list[tuple[int, dict[str, Any]]], list[schema.UserImportError]]:
+    """Validate rows of bulk import.
+
+    Args:
+        rows (list[Any]): Rows to import.
+
+    Returns:
+        tuple[list[tuple[int, dict[str, Any]]], list[schema.UserImportError]]:
+            Index and data of every valid row, errors of the invalid ones.
+    """
+
+    valid = []
+    failed = []
+    for index, row in enumerate(rows):
+        try:
+            valid.append((index, schema.UserCreate.parse_obj(row).dict()))
+        except ValidationError as error:
+            failed.append(_import_error(index, row, _format_errors(error)))
+    return valid, failed
+
+
+def _import_error(index: int, row: Any, detail: str) -> schema.UserImportError:
+    username = row.get("username") if isinstance(row, dict) else None
+    return schema.UserImportError(
+        index=index,
+        username=username if isinstance(username, str) else None,
+        detail=detail,
+    )
+
+
+def _format_errors(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in error.errors()
+    )
+
+
 @router.patch("/{user_id}", response_model=schema.User)
 async def update_user(
     user_id: UUID,
@@ -143,6 +543,47 @@ async def update_user(
         raise error
 
 
+@router.patch("/{user_id}/preferences", response_model=schema.User)
+async def update_user_preferences(
+    user_id: UUID,
+    changes: dict[str, Any] = Body(...),
+    user_dao: UserDAO = Depends(),
+    current_user: User = Depends(get_current_active_user),
+) -> User:
+    """Change some preferences of user, keeping the others.
+
+    Top-level keys of the body replace those of preferences, keys set to null
+    are removed. The merge is done by the database without reading the user.
+
+    Args:
+        user_id (UUID): User ID.
+        changes (dict[str, Any]): Changed preferences.
+        user_dao (UserDAO, optional): User DAO.
+        current_user (User, optional): Current user.
+
+    Raises:
+        HTTPException: You are not allowed to update this user.
+        HTTPException: User not found.
+
+    Returns:
+        User: User.
+    """
+
+    if user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not allowed to update this user",
+        )
+
+    try:
+        return await user_dao.update_preferences(changes, str(user_id))
+    except UserNotFoundException as error:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        ) from error
+
+
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
     user_id: UUID,
@@ -1,9 +1,12 @@
 from datetime import datetime
-from typing import Optional
+from enum import Enum
+from typing import Any, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, EmailStr, Field
 
+from backend.db.models.user import User as UserModel
+
 
 class UserBase(BaseModel):
     """Base class for User DTO model."""
@@ -33,7 +36,7 @@ class UserUpdate(UserBase):
     is_active: Optional[bool] = None
     is_reported: Optional[bool] = None
     is_blocked: Optional[bool] = None
-    preferences: Optional[str] = None
+    preferences: Optional[dict[str, Any]] = None
 
 
 class UserInDBBase(UserBase):
@@ -48,7 +51,7 @@ class UserInDBBase(UserBase):
     is_active: bool
     is_reported: bool
     is_blocked: bool
-    preferences: Optional[str] = None
+    preferences: Optional[dict[str, Any]] = None
     created_at: datetime
     updated_at: datetime
 
@@ -64,3 +67,32 @@ class UserInDB(UserInDBBase):
     """DTO model for User from db."""
 
     hashed_password: str
+
+
+class UserImportError(BaseModel):
+    """DTO model for a row rejected by bulk import."""
+
+    index: int
+    username: Optional[str] = None
+    detail: str
+
+
+class UserImportResult(BaseModel):
+    """DTO model for bulk import outcome."""
+
+    created: int
+    failed: list[UserImportError]
+    seconds: float
+    rows_per_second: float
+
+
+class ExportFormat(str, Enum):
+    """Formats of users export."""
+
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+# columns of User in its field order, lists are serialized from them
+USER_COLUMNS = tuple(getattr(UserModel, key) for key in User.__fields__)
+USER_KEYS = tuple(User.__fields__)
@@ -0,0 +1,70 @@
+import csv
+import io
+from datetime import datetime
+from typing import Any, Sequence
+
+import orjson
+
+
+def rows_to_ndjson(keys: Sequence[str], rows: Sequence[Sequence[Any]]) -> bytes:
+    """Serialize rows into NDJSON, one object per row.
+
+    Types orjson doesn't know, such as asyncpg UUIDs, are written as strings.
+
+    Args:
+        keys (Sequence[str]): Column names.
+        rows (Sequence[Sequence[Any]]): Row tuples.
+
+    Returns:
+        bytes: NDJSON chunk.
+    """
+
+    return b"".join(
+        orjson.dumps(
+            dict(zip(keys, row)),
+            default=str,
+            option=orjson.OPT_APPEND_NEWLINE,
+        )
+        for row in rows
+    )
+
+
+def rows_to_json(keys: Sequence[str], rows: Sequence[Sequence[Any]]) -> bytes:
+    """Serialize rows into a JSON array of objects.
+
+    Naive datetimes and UUIDs are written the same way pydantic's JSON
+    encoders write them, so the output matches the response model's.
+
+    Args:
+        keys (Sequence[str]): Column names.
+        rows (Sequence[Sequence[Any]]): Row tuples.
+
+    Returns:
+        bytes: JSON array.
+    """
+
+    return orjson.dumps([dict(zip(keys, row)) for row in rows], default=str)
+
+
+def rows_to_csv(rows: Sequence[Sequence[Any]]) -> bytes:
+    """Serialize rows into CSV lines.
+
+    Args:
+        rows (Sequence[Sequence[Any]]): Row tuples.
+
+    Returns:
+        bytes: CSV chunk.
+    """
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_csv_value(cell) for cell in row] for row in rows)
+    return buffer.getvalue().encode()
+
+
+def _csv_value(cell: Any) -> Any:
+    if isinstance(cell, datetime):
+        return cell.isoformat()
+    if isinstance(cell, (dict, list)):
+        return orjson.dumps(cell).decode()
+    return cell
@@ -5,7 +5,9 @@ from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from backend.web.api.router import api_router
+from backend.web.exception_handlers import register_exception_handlers
 from backend.web.lifetime import shutdown, startup
+from backend.web.middleware import MetricsMiddleware
 
 
 def get_app() -> FastAPI:
@@ -30,12 +32,16 @@ def get_app() -> FastAPI:
     app.on_event("shutdown")(shutdown(app))
 
     app.include_router(router=api_router, prefix="/api")
+    register_exception_handlers(app)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
+    # added last to be the outermost and time the whole request
+    app.add_middleware(MetricsMiddleware, routes=app.routes)
 
     return app
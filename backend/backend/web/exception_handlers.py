@@ -0,0 +1,34 @@
+from fastapi import FastAPI, Request, status
+from fastapi.responses import ORJSONResponse
+
+from backend.exceptions import PasswordHashingOverloadedException
+
+
+async def password_hashing_overloaded_handler(
+    request: Request,
+    error: PasswordHashingOverloadedException,
+) -> ORJSONResponse:
+    """
+    Ask the client to retry later, password hashing queue is full.
+
+    :param request: current request.
+    :param error: raised exception.
+    :return: response with 503 status.
+    """
+    return ORJSONResponse(
+        {"detail": str(error)},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "1"},
+    )
+
+
+def register_exception_handlers(app: FastAPI) -> None:
+    """
+    Map exceptions raised by any endpoint to responses.
+
+    :param app: current FastAPI app.
+    """
+    app.add_exception_handler(
+        PasswordHashingOverloadedException,
+        password_hashing_overloaded_handler,
+    )
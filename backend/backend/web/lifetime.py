@@ -1,16 +1,39 @@
-from asyncio import current_task
+import asyncio
+import logging
+from datetime import datetime
 from typing import Awaitable, Callable
 
 import aioredis
+from aioredis.exceptions import RedisError
 from fastapi import FastAPI
-from sqlalchemy.ext.asyncio import (
-    AsyncSession,
-    async_scoped_session,
-    create_async_engine,
-)
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
+from backend.db.dao.message import MessageDAO
+from backend.db.dao.user import UserDAO
+from backend.db.instrumentation import instrument_engine
+from backend.db.pool import create_pooled_engine, warm_up_pool
+from backend.db.routing import ReplicaSet, RoutingSession
+from backend.security import password_hasher
+from backend.services.cache.user import user_cache
+from backend.services.chat.buffer import MessageBuffer
+from backend.services.chat.events import EventRelay
+from backend.services.chat.history import HistoryCache
+from backend.services.chat.hub import ChatHub
+from backend.services.chat.presence import PresenceTracker
+from backend.services.metrics.prometheus import (
+    MESSAGES_DEFAULT_PARTITION_ROWS,
+    forget_worker,
+    update_pool_metrics,
+)
+from backend.services.ratelimit.limiter import RateLimiter
+from backend.services.readiness.probe import ReadinessProbe
+from backend.services.redis.pool import warm_up_redis_pool
 from backend.settings import settings
+from backend.web.api.user.schema import USER_COLUMNS
+
+logger = logging.getLogger(__name__)
 
 
 def _setup_db(app: FastAPI) -> None:
@@ -20,33 +43,260 @@ def _setup_db(app: FastAPI) -> None:
     This function creates SQLAlchemy engine instance,
     session_factory for creating sessions
     and stores them in the application's state property.
+    Statements of the engine are counted per request.
 
     :param app: fastAPI application.
     """
-    engine = create_async_engine(str(settings.db_url), echo=settings.db_echo)
-    session_factory = async_scoped_session(
-        sessionmaker(
-            engine,
-            expire_on_commit=False,
-            class_=AsyncSession,
-        ),
-        scopefunc=current_task,
+    engine = create_pooled_engine(str(settings.db_url))
+    instrument_engine(engine)
+    session_factory = sessionmaker(
+        engine,
+        expire_on_commit=False,
+        class_=AsyncSession,
     )
     app.state.db_engine = engine
     app.state.db_session_factory = session_factory
 
 
+async def _setup_db_replicas(app: FastAPI) -> None:
+    """
+    Create read replica engines and the routing session factory.
+
+    Replication lag is measured once before serving requests
+    and then periodically in background. Reads run in read-only
+    transactions, on a replica or on the primary.
+
+    :param app: fastAPI application.
+    """
+    engines = [create_pooled_engine(url) for url in settings.db_replica_urls]
+    for engine in engines:
+        instrument_engine(engine)
+    replicas = ReplicaSet(
+        [engine.execution_options(postgresql_readonly=True) for engine in engines],
+        max_lag=settings.db_replica_max_lag,
+    )
+    await replicas.check()
+    replicas.start(settings.db_replica_check_interval)
+
+    app.state.db_replicas = replicas
+    app.state.db_read_session_factory = sessionmaker(
+        app.state.db_engine,
+        expire_on_commit=False,
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        replicas=replicas,
+        reader=app.state.db_engine.sync_engine.execution_options(
+            postgresql_readonly=True,
+        ),
+    )
+
+
 def _setup_redis(app: FastAPI) -> None:
     """
-    Initialize redis connection.
+    Initialize redis connection pool and the client shared by all requests.
+
+    When every connection is taken, commands wait for one to be released
+    instead of failing right away, for at most the pool timeout.
 
     :param app: current FastAPI app.
     """
-    app.state.redis_pool = aioredis.ConnectionPool.from_url(
+    app.state.redis_pool = aioredis.BlockingConnectionPool.from_url(
         str(settings.redis_url),
+        max_connections=settings.redis_max_connections,
+        timeout=settings.redis_pool_timeout,
+        socket_keepalive=settings.redis_socket_keepalive,
+        health_check_interval=settings.redis_health_check_interval,
+    )
+    app.state.redis = aioredis.Redis(connection_pool=app.state.redis_pool)
+
+
+def _setup_rate_limiter(app: FastAPI) -> None:
+    """
+    Create rate limiter on top of the shared redis client.
+
+    :param app: current FastAPI app.
+    """
+    app.state.rate_limiter = RateLimiter(
+        app.state.redis,
+        prefix=settings.rate_limit_prefix,
+        fallback_seconds=settings.rate_limit_fallback_seconds,
     )
 
 
+def _setup_readiness_probe(app: FastAPI) -> None:
+    """
+    Create readiness probe, the worker isn't ready until warm-up is over.
+
+    :param app: current FastAPI app.
+    """
+    app.state.readiness_probe = ReadinessProbe(
+        app.state.db_engine,
+        app.state.redis,
+        ttl=settings.ready_check_ttl,
+        timeout=settings.ready_check_timeout,
+    )
+
+
+def _setup_user_cache(app: FastAPI) -> None:
+    """
+    Subscribe user cache to invalidations from other workers.
+
+    :param app: current FastAPI app.
+    """
+    user_cache.attach(app.state.redis)
+
+
+async def _maintain_partitions(app: FastAPI) -> None:
+    """
+    Create monthly partitions of messages ahead and check the default one.
+
+    Messages in the default partition mean partitions weren't created
+    in time, they are reported by a gauge and in the log.
+
+    :param app: current FastAPI app.
+    """
+    try:
+        async with app.state.db_session_factory() as session:
+            message_dao = MessageDAO(session)
+            await message_dao.create_partitions(
+                datetime.utcnow().date(),
+                months=settings.messages_partitions_ahead,
+            )
+            stray = await message_dao.count_default()
+    except (SQLAlchemyError, OSError) as error:
+        logger.error(f"Failed to maintain partitions of messages: {error}")
+        return
+
+    MESSAGES_DEFAULT_PARTITION_ROWS.set(stray)
+    if stray:
+        logger.warning(f"{stray} messages are outside of monthly partitions")
+
+
+async def _setup_chat(app: FastAPI) -> None:
+    """
+    Create chat hub, presence tracker, relay of ephemeral events,
+    history cache and the write-behind buffer of messages.
+
+    The hub delivers messages to WebSockets of this worker,
+    monthly partitions of messages are created ahead of time.
+
+    :param app: current FastAPI app.
+    """
+    await _maintain_partitions(app)
+
+    async def _maintain_periodically() -> None:  # noqa: WPS430
+        while True:
+            await asyncio.sleep(settings.messages_partitions_interval)
+            await _maintain_partitions(app)
+
+    app.state.partitions_task = asyncio.create_task(_maintain_periodically())
+
+    app.state.history_cache = HistoryCache(
+        app.state.redis,
+        prefix=settings.chat_history_cache_prefix,
+        size=settings.chat_history_cache_size,
+        ttl=settings.chat_history_cache_ttl,
+    )
+    app.state.message_buffer = MessageBuffer(
+        app.state.db_session_factory,
+        flush_size=settings.messages_flush_size,
+        flush_interval=settings.messages_flush_interval,
+        max_size=settings.messages_buffer_size,
+        max_retries=settings.messages_flush_retries,
+        history=app.state.history_cache,
+    )
+    app.state.message_buffer.start()
+    app.state.chat_hub = ChatHub(
+        app.state.redis,
+        channel_prefix=settings.chat_channel_prefix,
+        queue_size=settings.chat_send_queue_size,
+    )
+    app.state.chat_hub.start()
+    app.state.presence_tracker = PresenceTracker(
+        app.state.redis,
+        app.state.chat_hub,
+        key=settings.presence_key,
+        channel=settings.presence_channel,
+        interval=settings.presence_interval,
+        timeout=settings.presence_timeout,
+    )
+    await app.state.presence_tracker.start()
+    app.state.event_relay = EventRelay(
+        app.state.chat_hub,
+        app.state.history_cache,
+        app.state.db_session_factory,
+        window=settings.chat_events_window,
+        typing_throttle=settings.chat_typing_throttle,
+        cursor_flush_interval=settings.read_cursors_flush_interval,
+    )
+    app.state.event_relay.start()
+
+
+def _setup_metrics(app: FastAPI) -> None:
+    """
+    Refresh pool gauges of this worker in background.
+
+    :param app: current FastAPI app.
+    """
+
+    async def _update_periodically() -> None:  # noqa: WPS430
+        while True:
+            update_pool_metrics(app.state.db_engine, app.state.redis_pool)
+            await asyncio.sleep(settings.metrics_pool_interval)
+
+    app.state.pool_metrics_task = asyncio.create_task(_update_periodically())
+
+
+async def _warm_up_db(app: FastAPI) -> None:
+    """
+    Open connections of the primary and replicas, preparing statements.
+
+    :param app: current FastAPI app.
+    """
+
+    async def _prepare(conn: AsyncConnection) -> None:  # noqa: WPS430
+        async with app.state.db_session_factory(bind=conn) as session:
+            await UserDAO(session).warm_up(USER_COLUMNS)
+
+    prepare = _prepare if settings.db_warm_statements else None
+    for engine in (app.state.db_engine, *app.state.db_replicas.engines):
+        try:
+            await warm_up_pool(engine, settings.db_warm_connections, prepare)
+        except (SQLAlchemyError, OSError) as error:
+            logger.warning(f"Failed to warm up database connections: {error}")
+
+
+async def _warm_up_redis(app: FastAPI) -> None:
+    """
+    Open connections of the redis pool.
+
+    :param app: current FastAPI app.
+    """
+    try:
+        await warm_up_redis_pool(
+            app.state.redis_pool,
+            settings.redis_warm_connections,
+        )
+    except (RedisError, OSError) as error:
+        logger.warning(f"Failed to warm up redis connections: {error}")
+
+
+async def _warm_up(app: FastAPI) -> None:
+    """
+    Open database and redis connections before the first requests.
+
+    First requests after a deploy don't pay for connection handshakes,
+    statements of hot user queries are prepared on every connection.
+    Failures are logged, the readiness probe reports unavailable
+    dependencies on its own.
+
+    :param app: current FastAPI app.
+    """
+    await _warm_up_db(app)
+    await _warm_up_redis(app)
+    app.state.readiness_probe.warmed_up = True
+
+
 def startup(app: FastAPI) -> Callable[[], Awaitable[None]]:
     """
     Actions to run on application startup.
@@ -60,7 +310,14 @@ def startup(app: FastAPI) -> Callable[[], Awaitable[None]]:
 
     async def _startup() -> None:  # noqa: WPS430
         _setup_db(app)
+        await _setup_db_replicas(app)
         _setup_redis(app)
+        _setup_readiness_probe(app)
+        _setup_rate_limiter(app)
+        _setup_user_cache(app)
+        await _setup_chat(app)
+        _setup_metrics(app)
+        await _warm_up(app)
         pass  # noqa: WPS420
 
     return _startup
@@ -75,9 +332,24 @@ def shutdown(app: FastAPI) -> Callable[[], Awaitable[None]]:
     """
 
     async def _shutdown() -> None:  # noqa: WPS430
+        app.state.readiness_probe.warmed_up = False
+        app.state.pool_metrics_task.cancel()
+        forget_worker()
+
+        app.state.partitions_task.cancel()
+        await app.state.presence_tracker.close()
+        await app.state.event_relay.close()
+        await app.state.chat_hub.close()
+        await app.state.message_buffer.close()
+
+        await app.state.db_replicas.stop()
         await app.state.db_engine.dispose()
 
+        await user_cache.detach()
+        await app.state.redis.close()
         await app.state.redis_pool.disconnect()
+
+        password_hasher.shutdown()
         pass  # noqa: WPS420
 
     return _shutdown
@@ -0,0 +1,135 @@
+import time
+from typing import Any, Callable, Optional, Sequence
+
+from prometheus_client.metrics import MetricWrapperBase
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.db.instrumentation import QueryStats, collect_queries
+from backend.services.metrics.prometheus import (
+    DB_QUERIES,
+    DB_SECONDS,
+    REQUEST_SECONDS,
+    REQUESTS,
+    REQUESTS_IN_PROGRESS,
+)
+from backend.settings import settings
+
+# label of requests that matched no route, raw paths would explode cardinality
+UNMATCHED_ROUTE = "unmatched"
+
+
+class MetricsMiddleware:
+    """Count HTTP requests and observe their latency by route template.
+
+    A plain ASGI middleware, it neither builds a Request nor wraps the body
+    like BaseHTTPMiddleware does. The route template is looked up by the
+    endpoint the router stored in the scope. Labelled children of metrics
+    are cached, looking them up is most of the cost of a labelled metric.
+
+    SQL statements of every request are counted by the instrumented engine
+    into stats set here, in debug mode they are sent in a Server-Timing header.
+    """
+
+    def __init__(self, app: ASGIApp, routes: Sequence[BaseRoute]):
+        self.app = app
+        self.routes = routes
+        self._templates: Optional[dict[Callable[..., Any], str]] = None
+        self._in_progress: dict[str, MetricWrapperBase] = {}
+        self._finished: dict[tuple[Any, ...], tuple[MetricWrapperBase, ...]] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+
+        with collect_queries(f"{method} {scope['path']}") as stats:
+
+            async def _send(message: Message) -> None:  # noqa: WPS430
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    if settings.debug:
+                        message["headers"] = [
+                            *message.get("headers", ()),
+                            (b"server-timing", server_timing(stats)),
+                        ]
+                await send(message)
+
+            in_progress = self._in_progress_gauge(method)
+            in_progress.inc()
+            start = time.perf_counter()
+            try:
+                await self.app(scope, receive, _send)
+            finally:
+                elapsed = time.perf_counter() - start
+                in_progress.dec()
+                key = (method, scope.get("endpoint"), status)
+                self._observe(key, elapsed, stats)
+
+    def _in_progress_gauge(self, method: str) -> MetricWrapperBase:
+        in_progress = self._in_progress.get(method)
+        if in_progress is None:
+            in_progress = REQUESTS_IN_PROGRESS.labels(method)
+            self._in_progress[method] = in_progress
+        return in_progress
+
+    def _observe(
+        self,
+        key: tuple[str, Optional[Callable[..., Any]], int],
+        elapsed: float,
+        stats: QueryStats,
+    ) -> None:
+        finished = self._finished.get(key)
+        if finished is None:
+            finished = self._children(*key)
+            self._finished[key] = finished
+        requests, seconds, db_queries, db_seconds = finished
+        requests.inc()
+        seconds.observe(elapsed)
+        if stats.queries:
+            db_queries.observe(stats.queries)
+            db_seconds.observe(stats.seconds)
+
+    def _children(
+        self,
+        method: str,
+        endpoint: Optional[Callable[..., Any]],
+        status: int,
+    ) -> tuple[MetricWrapperBase, ...]:
+        route = self._template(endpoint)
+        status_label = str(status)
+        return (
+            REQUESTS.labels(method, route, status_label),
+            REQUEST_SECONDS.labels(method, route, status_label),
+            DB_QUERIES.labels(route),
+            DB_SECONDS.labels(route),
+        )
+
+    def _template(self, endpoint: Optional[Callable[..., Any]]) -> str:
+        if self._templates is None:
+            # routes are complete by the time requests are served
+            self._templates = {
+                route.endpoint: route.path  # type: ignore
+                for route in self.routes
+                if hasattr(route, "endpoint") and hasattr(route, "path")
+            }
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        return self._templates.get(endpoint, UNMATCHED_ROUTE)
+
+
+def server_timing(stats: QueryStats) -> bytes:
+    """
+    Describe SQL statements of a request as a Server-Timing header.
+
+    Statements run after the response started aren't included.
+
+    :param stats: statements of the request so far.
+    :return: header value.
+    """
+    milliseconds = stats.seconds * 1000
+    return f'db;dur={milliseconds:.2f};desc="{stats.queries} queries"'.encode()
@@ -0,0 +1,173 @@
+"""
+Load test of the chat WebSocket gateway running in a live server.
+
+Opens many idle connections, then measures how long direct messages take
+from a sender to a recipient connection while they stay open. Start the
+server with the same BACKEND_SECRET_KEY, tokens are signed locally::
+
+    BACKEND_WORKERS_COUNT=4 BACKEND_RELOAD=false python -m backend
+    python -m benchmarks.chat_gateway --connections 10000 --messages 2000
+
+Raise the open files limit of the server (``ulimit -n``) above the number
+of connections. Run with different BACKEND_WORKERS_COUNT to compare workers,
+probe connections land on random workers, so latency covers cross-worker
+delivery through redis.
+"""
+import argparse
+import asyncio
+import resource
+import statistics
+import time
+import uuid
+
+import orjson
+import websockets
+from httpx import AsyncClient
+
+from backend.security import create_access_token
+
+
+async def _create_user(client: AsyncClient, limit: asyncio.Semaphore) -> str:
+    async with limit:
+        response = await client.post(
+            "/api/users/",
+            json={
+                "username": f"bench-{uuid.uuid4().hex[:16]}",
+                "email": f"{uuid.uuid4().hex}@example.com",
+                "password": uuid.uuid4().hex,
+            },
+        )
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+async def _create_users(base_url: str, count: int) -> list[str]:
+    # stay below the password hashing queue of the server
+    limit = asyncio.Semaphore(16)
+    async with AsyncClient(base_url=base_url, timeout=60) as client:
+        return await asyncio.gather(
+            *(_create_user(client, limit) for _ in range(count)),
+        )
+
+
+async def _open(
+    url: str,
+    user_id: str,
+    limit: asyncio.Semaphore,
+) -> websockets.WebSocketClientProtocol:
+    async with limit:
+        return await websockets.connect(  # type: ignore
+            f"{url}?token={create_access_token(user_id)}",
+            open_timeout=60,
+            ping_interval=None,
+        )
+
+
+async def _probe(
+    sender: websockets.WebSocketClientProtocol,
+    receiver: websockets.WebSocketClientProtocol,
+    recipient: str,
+    messages: int,
+) -> list[float]:
+    latencies = []
+    for number in range(messages):
+        sent_at = time.perf_counter()
+        await sender.send(
+            orjson.dumps({"to": recipient, "text": str(number)}).decode(),
+        )
+        while True:
+            message = orjson.loads(await receiver.recv())
+            if message.get("text") == str(number):
+                break
+        latencies.append((time.perf_counter() - sent_at) * 1000)
+    return latencies
+
+
+async def run(
+    url: str,
+    base_url: str,
+    connections: int,
+    users: int,
+    probes: int,
+    messages: int,
+) -> None:
+    """
+    Open idle connections and measure delivery latency of direct messages.
+
+    :param url: WebSocket URL of the gateway.
+    :param base_url: HTTP URL of the API, used to create users.
+    :param connections: number of idle connections.
+    :param users: number of users idle connections are spread over.
+    :param probes: number of sender/recipient pairs measuring latency.
+    :param messages: number of messages sent by every probe.
+    """
+    user_ids = await _create_users(base_url, users + probes * 2)
+    idle_users, probe_users = user_ids[:users], user_ids[users:]
+    limit = asyncio.Semaphore(500)
+
+    start = time.perf_counter()
+    idle = await asyncio.gather(
+        *(_open(url, idle_users[n % users], limit) for n in range(connections)),
+    )
+    opened = time.perf_counter() - start
+    print(f"opened {len(idle)} idle connections in {opened:.1f}s")  # noqa: WPS421
+
+    pairs = [
+        (
+            await _open(url, probe_users[n * 2], limit),
+            await _open(url, probe_users[n * 2 + 1], limit),
+            probe_users[n * 2 + 1],
+        )
+        for n in range(probes)
+    ]
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(
+            _probe(sender, receiver, recipient, messages)
+            for sender, receiver, recipient in pairs
+        ),
+    )
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for probe in results for latency in probe]
+    quantiles = statistics.quantiles(latencies, n=100)
+    still_open = sum(not connection.closed for connection in idle)
+    print(  # noqa: WPS421
+        f"idle open={still_open}/{len(idle)} messages={len(latencies)} "
+        f"rate={len(latencies) / elapsed:.0f}/s "
+        f"p50={quantiles[49]:.2f}ms p99={quantiles[98]:.2f}ms "
+        f"max={max(latencies):.2f}ms",
+    )
+
+    for sender, receiver, _ in pairs:
+        await sender.close()
+        await receiver.close()
+    await asyncio.gather(*(connection.close() for connection in idle))
+
+
+def main() -> None:
+    """Entrypoint of the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="ws://127.0.0.1:8000/api/chat/ws")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--probes", type=int, default=10)
+    parser.add_argument("--messages", type=int, default=200)
+    args = parser.parse_args()
+    _, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    asyncio.run(
+        run(
+            args.url,
+            args.base_url,
+            args.connections,
+            args.users,
+            args.probes,
+            args.messages,
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Compare loading recent chat history from the redis cache with keyset queries.
+
+Conversations are read with a skewed popularity, a few of them take most
+of the reads, like in a real chat. New messages are sent in between, so
+cached lists keep being updated instead of only being read.
+
+Run it against a throwaway database and redis, the database is created
+and dropped on the way::
+
+    BACKEND_DB_BASE=backend_bench python -m benchmarks.history --reads 20000
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Awaitable, Callable
+
+import aioredis
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.db.dao.message import MessageDAO, conversation_id
+from backend.db.meta import meta
+from backend.db.models import load_all_models
+from backend.db.models.user import User
+from backend.db.utils import create_database, drop_database
+from backend.services.chat.history import FIELDS, HistoryCache
+from backend.settings import settings
+
+
+def _message(
+    sender: uuid.UUID,
+    recipient: uuid.UUID,
+    created_at: datetime,
+) -> dict[str, Any]:
+    return {
+        "id": uuid.uuid4(),
+        "created_at": created_at,
+        "conversation_id": conversation_id(sender, recipient),
+        "sender_id": sender,
+        "recipient_id": recipient,
+        "text": "x" * 64,
+    }
+
+
+def _percentile(timings: list[float], percentile: float) -> float:
+    return sorted(timings)[int(len(timings) * percentile)] * 1000
+
+
+async def _seed(
+    session_factory: sessionmaker,
+    conversations: int,
+    messages: int,
+) -> list[tuple[uuid.UUID, uuid.UUID]]:
+    """
+    Create users and conversations of the benchmark.
+
+    :param session_factory: database session factory.
+    :param conversations: number of conversations.
+    :param messages: number of messages in every conversation.
+    :return: sender and recipient of every conversation.
+    """
+    users = [uuid.uuid4() for _ in range(conversations + 1)]
+    pairs = [(users[0], user_id) for user_id in users[1:]]
+    start = datetime.utcnow() - timedelta(days=1)
+    async with session_factory() as session:
+        await session.execute(
+            insert(User),
+            [
+                {
+                    "id": user_id,
+                    "username": user_id.hex[:32],
+                    "email": user_id.hex,
+                    "hashed_password": "x",
+                    "salt": "x",
+                }
+                for user_id in users
+            ],
+        )
+        await session.commit()
+        await MessageDAO(session).create_many(
+            [
+                _message(*pair, start + timedelta(seconds=number))
+                for pair in pairs
+                for number in range(messages)
+            ],
+        )
+    return pairs
+
+
+async def _load_from_db(
+    session_factory: sessionmaker,
+    conversation: uuid.UUID,
+    count: int,
+) -> Any:
+    async with session_factory() as session:
+        rows = await MessageDAO(session).get_history(conversation, count)
+    return [{field: getattr(row, field) for field in FIELDS} for row in rows]
+
+
+async def _load_cached(
+    history: HistoryCache,
+    session_factory: sessionmaker,
+    conversation: uuid.UUID,
+    count: int,
+) -> Any:
+    return await history.load(
+        conversation,
+        count,
+        None,
+        partial(_load_from_db, session_factory, conversation),
+    )
+
+
+async def _measure(
+    name: str,
+    load: Callable[[uuid.UUID, int], Awaitable[Any]],
+    history: HistoryCache,
+    pairs: list[tuple[uuid.UUID, uuid.UUID]],
+    reads: int,
+    limit: int,
+    concurrency: int,
+) -> None:
+    """
+    Read history of popular conversations and print latency percentiles.
+
+    Every tenth read is preceded by a new message of the conversation.
+
+    :param name: name of the mode.
+    :param load: loads the given number of the newest messages.
+    :param history: history cache new messages are pushed to.
+    :param pairs: sender and recipient of every conversation.
+    :param reads: number of history reads.
+    :param limit: messages per read.
+    :param concurrency: number of concurrent readers.
+    """
+    weights = [1 / (rank + 1) for rank in range(len(pairs))]
+    timings: list[float] = []
+
+    async def _reader(count: int) -> None:  # noqa: WPS430
+        for number in range(count):
+            pair = random.choices(pairs, weights)[0]
+            if number % 10 == 0:
+                await history.push(_message(*pair, datetime.utcnow()))
+            started = time.perf_counter()
+            await load(conversation_id(*pair), limit)
+            timings.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(_reader(reads // concurrency) for _ in range(concurrency)))
+    print(  # noqa: WPS421
+        f"{name}: p50 {_percentile(timings, 0.5):.2f} ms, "
+        f"p99 {_percentile(timings, 0.99):.2f} ms",
+    )
+
+
+async def run(
+    conversations: int,
+    messages: int,
+    reads: int,
+    limit: int,
+    concurrency: int,
+) -> None:
+    """
+    Read history with and without the cache and print latency and hit ratio.
+
+    :param conversations: number of conversations.
+    :param messages: number of messages in every conversation.
+    :param reads: number of history reads by every mode.
+    :param limit: messages per read.
+    :param concurrency: number of concurrent readers.
+    """
+    load_all_models()
+    await create_database()
+    engine = create_async_engine(str(settings.db_url), pool_size=concurrency)
+    session_factory = sessionmaker(
+        engine,
+        expire_on_commit=False,
+        class_=AsyncSession,
+    )
+    redis = aioredis.from_url(str(settings.redis_url))
+    history = HistoryCache(
+        redis,
+        prefix=f"{settings.chat_history_cache_prefix}:bench:{uuid.uuid4().hex}",
+        size=settings.chat_history_cache_size,
+        ttl=settings.chat_history_cache_ttl,
+    )
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(meta.create_all)
+        pairs = await _seed(session_factory, conversations, messages)
+
+        modes = (
+            ("db", partial(_load_from_db, session_factory)),
+            ("cache", partial(_load_cached, history, session_factory)),
+        )
+        for name, load in modes:
+            await _measure(name, load, history, pairs, reads, limit, concurrency)
+
+        stats = history.stats()
+        print(  # noqa: WPS421
+            f"hit ratio {stats['hit_ratio']:.3f} "
+            f"({stats['hits']} hits, {stats['misses']} misses)",
+        )
+    finally:
+        async for key in redis.scan_iter(f"{history.prefix}:*"):
+            await redis.delete(key)
+        await redis.close()
+        await engine.dispose()
+        await drop_database()
+
+
+def main() -> None:
+    """Entrypoint of the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--conversations", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--reads", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(
+        run(
+            args.conversations,
+            args.messages,
+            args.reads,
+            args.limit,
+            args.concurrency,
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
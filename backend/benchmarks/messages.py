@@ -0,0 +1,134 @@
+"""
+Compare storing chat messages one INSERT per message with the write-behind buffer.
+
+Run it against a throwaway database, it is created and dropped on the way::
+
+    BACKEND_DB_BASE=backend_bench python -m benchmarks.messages --messages 20000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.db.dao.message import conversation_id
+from backend.db.meta import meta
+from backend.db.models import load_all_models
+from backend.db.models.message import Message
+from backend.db.models.user import User
+from backend.db.utils import create_database, drop_database
+from backend.services.chat.buffer import MessageBuffer
+from backend.settings import settings
+
+
+def _message(sender: uuid.UUID, recipient: uuid.UUID) -> dict[str, Any]:
+    return {
+        "id": uuid.uuid4(),
+        "created_at": datetime.utcnow(),
+        "conversation_id": conversation_id(sender, recipient),
+        "sender_id": sender,
+        "recipient_id": recipient,
+        "text": "x" * 64,
+    }
+
+
+async def _send_all(
+    send: Callable[[dict[str, Any]], Awaitable[None]],
+    users: list[uuid.UUID],
+    messages: int,
+    senders: int,
+) -> float:
+    async def _sender(count: int) -> None:  # noqa: WPS430
+        for number in range(count):
+            await send(_message(users[number % 2], users[1 - number % 2]))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_sender(messages // senders) for _ in range(senders)))
+    return time.perf_counter() - start
+
+
+async def run(messages: int, senders: int) -> None:
+    """
+    Store messages both ways and print throughput.
+
+    :param messages: number of messages stored by every mode.
+    :param senders: number of concurrent senders.
+    """
+    load_all_models()
+    await create_database()
+    engine = create_async_engine(str(settings.db_url), pool_size=20)
+    session_factory = sessionmaker(
+        engine,
+        expire_on_commit=False,
+        class_=AsyncSession,
+    )
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(meta.create_all)
+        users = [uuid.uuid4(), uuid.uuid4()]
+        async with session_factory() as session:
+            await session.execute(
+                insert(User),
+                [
+                    {
+                        "id": user_id,
+                        "username": user_id.hex[:32],
+                        "email": user_id.hex,
+                        "hashed_password": "x",
+                        "salt": "x",
+                    }
+                    for user_id in users
+                ],
+            )
+            await session.commit()
+
+        async def _insert(message: dict[str, Any]) -> None:  # noqa: WPS430
+            async with session_factory() as session:
+                await session.execute(insert(Message).values(**message))
+                await session.commit()
+
+        elapsed = await _send_all(_insert, users, messages, senders)
+        print(f"insert+commit: {messages / elapsed:.0f} msg/s")  # noqa: WPS421
+
+        for durable in (False, True):
+            buffer = MessageBuffer(
+                session_factory,
+                flush_size=settings.messages_flush_size,
+                flush_interval=settings.messages_flush_interval,
+                max_size=settings.messages_buffer_size,
+                max_retries=settings.messages_flush_retries,
+            )
+            buffer.start()
+            start = time.perf_counter()
+            await _send_all(
+                lambda message: buffer.put(message, durable=durable),
+                users,
+                messages,
+                senders,
+            )
+            await buffer.close()
+            elapsed = time.perf_counter() - start
+            print(  # noqa: WPS421
+                f"buffer durable={durable}: {messages / elapsed:.0f} msg/s",
+            )
+    finally:
+        await engine.dispose()
+        await drop_database()
+
+
+def main() -> None:
+    """Entrypoint of the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--senders", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.senders))
+
+
+if __name__ == "__main__":
+    main()
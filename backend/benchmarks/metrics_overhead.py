@@ -0,0 +1,79 @@
+"""
+Measure the time the metrics middleware adds to a request.
+
+A minimal ASGI app that routes to a single endpoint and answers right away
+is called directly, with and without the middleware, so nothing but the
+middleware differs between the two loops::
+
+    python -m benchmarks.metrics_overhead --requests 200000
+"""
+import argparse
+import asyncio
+import time
+from typing import Any
+
+from starlette.routing import Route
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from backend.web.middleware import MetricsMiddleware
+
+
+def _endpoint() -> None:
+    """Endpoint the requests are routed to."""
+
+
+ROUTE = Route("/api/items/{item_id}", _endpoint)
+
+
+async def _app(scope: Scope, receive: Receive, send: Send) -> None:
+    scope["endpoint"] = _endpoint
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _receive() -> dict[str, Any]:
+    return {"type": "http.request", "body": b""}
+
+
+async def _send(message: dict[str, Any]) -> None:
+    """Drop the response."""
+
+
+async def _time(app: ASGIApp, requests: int) -> float:
+    start = time.perf_counter()
+    for number in range(requests):
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": f"/api/items/{number}",
+        }
+        await app(scope, _receive, _send)
+    return (time.perf_counter() - start) / requests * 1_000_000
+
+
+async def run(requests: int) -> None:
+    """
+    Print time per request with and without the middleware.
+
+    :param requests: requests sent by every loop.
+    """
+    middleware = MetricsMiddleware(_app, routes=[ROUTE])
+    await _time(middleware, requests // 10)
+    bare_us = await _time(_app, requests)
+    metrics_us = await _time(middleware, requests)
+    print(  # noqa: WPS421
+        f"bare {bare_us:.2f} us, with metrics {metrics_us:.2f} us, "
+        f"overhead {metrics_us - bare_us:.2f} us per request",
+    )
+
+
+def main() -> None:
+    """Entrypoint of the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
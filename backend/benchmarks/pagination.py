@@ -0,0 +1,100 @@
+"""
+Compare OFFSET and keyset pagination of users at increasing depths.
+
+Run it against a throwaway database, it is created and dropped on the way::
+
+    BACKEND_DB_BASE=backend_bench python -m benchmarks.pagination --rows 1000000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from backend.db.dao.user import UserDAO
+from backend.db.meta import meta
+from backend.db.models import load_all_models
+from backend.db.utils import create_database, drop_database
+from backend.settings import settings
+
+SEED_USERS = """
+INSERT INTO users (
+    id, username, email, hashed_password, salt, first_name, last_name,
+    is_superuser, is_active, is_reported, is_blocked, created_at, updated_at
+)
+SELECT
+    md5(n::text)::uuid, 'user' || n, 'user' || n || '@example.com',
+    repeat('x', 60), repeat('s', 86), 'First' || n, 'Last' || n,
+    false, true, false, false,
+    timestamp '2022-01-01' + n * interval '1 second',
+    timestamp '2022-01-01' + n * interval '1 second'
+FROM generate_series(1, :rows) AS n
+"""
+
+
+async def _time_page(session: AsyncSession, **kwargs: object) -> float:
+    start = time.perf_counter()
+    await UserDAO(session).get_multi(**kwargs)  # type: ignore
+    return (time.perf_counter() - start) * 1000
+
+
+async def run(rows: int, page_size: int, repeats: int) -> None:
+    """
+    Seed users and print per-page latency for both pagination modes.
+
+    :param rows: number of users to seed.
+    :param page_size: users per page.
+    :param repeats: measurements per depth, median is reported.
+    """
+    load_all_models()
+    await create_database()
+    engine = create_async_engine(str(settings.db_url))
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(meta.create_all)
+            await conn.execute(text(SEED_USERS), {"rows": rows})
+            await conn.execute(text("ANALYZE users"))
+
+        print(f"{'depth':>10} {'offset ms':>12} {'keyset ms':>12}")  # noqa: WPS421
+        async with AsyncSession(engine) as session:
+            for depth in (0, rows // 100, rows // 10, rows // 2, rows - page_size):
+                # the keyset position of the row just before the requested page
+                position = await session.execute(
+                    text(
+                        "SELECT created_at, id FROM users "
+                        "ORDER BY created_at, id OFFSET :depth LIMIT 1",
+                    ),
+                    {"depth": max(depth - 1, 0)},
+                )
+                after = tuple(position.one()) if depth else None
+                offset_ms = [
+                    await _time_page(session, offset=depth, limit=page_size)
+                    for _ in range(repeats)
+                ]
+                keyset_ms = [
+                    await _time_page(session, after=after, limit=page_size)
+                    for _ in range(repeats)
+                ]
+                print(  # noqa: WPS421
+                    f"{depth:>10} {statistics.median(offset_ms):>12.2f} "
+                    f"{statistics.median(keyset_ms):>12.2f}",
+                )
+    finally:
+        await engine.dispose()
+        await drop_database()
+
+
+def main() -> None:
+    """Entrypoint of the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.page_size, args.repeats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+"""
+Throughput and latency of the main HTTP endpoints, checked against a baseline.
+
+Runs login, /users/me, user listing at several page sizes, /echo and the
+redis endpoints one after another, either in-process through the ASGI
+transport with the real startup hooks, or against uvicorn started with
+the given number of workers. A throwaway database is created and dropped
+on the way, redis must be reachable in both modes.
+
+Record a baseline, then compare later runs with it; the run fails if p50
+or p99 of any endpoint grew by more than the threshold::
+
+    BACKEND_DB_BASE=backend_bench python -m benchmarks.suite --mode asgi \\
+        --save benchmarks/baselines/asgi.json
+    BACKEND_DB_BASE=backend_bench python -m benchmarks.suite --mode asgi \\
+        --compare benchmarks/baselines/asgi.json --threshold 0.2
+
+    BACKEND_DB_BASE=backend_bench python -m benchmarks.suite --mode live \\
+        --workers 4 --save benchmarks/baselines/live-4.json
+
+Baselines depend on the machine, record them where they are compared.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import statistics
+import subprocess  # noqa: S404
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, NamedTuple, Optional
+
+import orjson
+from benchmarks.pagination import SEED_USERS
+from httpx import AsyncClient, HTTPError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from backend.db.meta import meta
+from backend.db.models import load_all_models
+from backend.db.utils import create_database, drop_database
+from backend.security import create_access_token
+from backend.settings import settings
+from backend.web.application import get_app
+
+PAGE_SIZES = (10, 100, 500)
+PASSWORD = "benchmark-password"
+
+
+class Scenario(NamedTuple):
+    """Request repeated by a benchmark."""
+
+    name: str
+    method: str
+    url: str
+    options: dict[str, Any]
+    # share of --requests sent, login is bound by password hashing
+    share: float = 1
+
+
+class Result(NamedTuple):
+    """Measurements of a scenario."""
+
+    requests: int
+    errors: int
+    rps: float
+    p50_ms: float
+    p99_ms: float
+
+
+def _scenarios(username: str, token: str) -> list[Scenario]:
+    auth = {"Authorization": f"Bearer {token}"}
+    keys = [f"bench:{number}" for number in range(10)]
+    return [
+        Scenario(
+            "login",
+            "POST",
+            "/api/auth/access-token",
+            {"data": {"username": username, "password": PASSWORD}},
+            share=0.1,
+        ),
+        Scenario("users_me", "GET", "/api/users/me", {"headers": auth}),
+        *(
+            Scenario(
+                f"users_list_{size}",
+                "GET",
+                "/api/users/",
+                {"params": {"limit": size}},
+            )
+            for size in PAGE_SIZES
+        ),
+        Scenario("echo", "POST", "/api/echo", {"json": {"message": "x" * 64}}),
+        Scenario(
+            "redis_set",
+            "PUT",
+            "/api/redis/",
+            {"json": {"key": keys[0], "value": "x" * 64}},
+        ),
+        Scenario("redis_get", "GET", "/api/redis/", {"params": {"key": keys[0]}}),
+        Scenario(
+            "redis_batch_get",
+            "GET",
+            "/api/redis/batch",
+            {"params": {"key": keys}},
+        ),
+    ]
+
+
+async def _measure(
+    client: AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+) -> Result:
+    count = max(int(requests * scenario.share), concurrency)
+    # warm up connections, caches and statement caches
+    await _send_all(client, scenario, concurrency, 1)
+    latencies, errors, elapsed = await _send_all(
+        client,
+        scenario,
+        concurrency,
+        count // concurrency,
+    )
+    return _result(count, latencies, errors, elapsed)
+
+
+async def _send_all(
+    client: AsyncClient,
+    scenario: Scenario,
+    concurrency: int,
+    per_worker: int,
+) -> tuple[list[float], int, float]:
+    latencies: list[float] = []
+    errors = 0
+
+    async def _worker() -> None:  # noqa: WPS430
+        nonlocal errors
+        for _ in range(per_worker):
+            latency, failed = await _send(client, scenario)
+            if latency is not None:
+                latencies.append(latency)
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def _send(
+    client: AsyncClient, scenario: Scenario
+) -> tuple[Optional[float], bool]:
+    # latency in ms is None if the request didn't get a response
+    start = time.perf_counter()
+    try:
+        response = await client.request(
+            scenario.method,
+            scenario.url,
+            **scenario.options,
+        )
+    except HTTPError:
+        return None, True
+    return (time.perf_counter() - start) * 1000, response.is_error
+
+
+def _result(count: int, latencies: list[float], errors: int, elapsed: float) -> Result:
+    if len(latencies) < 2:
+        return Result(count, errors, 0, 0, 0)
+    quantiles = statistics.quantiles(latencies, n=100)
+    return Result(
+        requests=len(latencies),
+        errors=errors,
+        rps=round(len(latencies) / elapsed, 1),
+        p50_ms=round(quantiles[49], 3),
+        p99_ms=round(quantiles[98], 3),
+    )
+
+
+async def _prepare(client: AsyncClient) -> tuple[str, str]:
+    username = f"bench-{uuid.uuid4().hex[:16]}"
+    response = await client.post(
+        "/api/users/",
+        json={
+            "username": username,
+            "email": f"{username}@example.com",
+            "password": PASSWORD,
+        },
+    )
+    response.raise_for_status()
+    return username, create_access_token(response.json()["id"])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def _asgi_client() -> AsyncIterator[AsyncClient]:
+    # requests of the suite come from one client, they would be rate limited
+    settings.rate_limit_enabled = False
+    app = get_app()
+    for startup in app.router.on_startup:
+        await startup()
+    try:
+        async with AsyncClient(app=app, base_url="http://bench") as client:
+            yield client
+    finally:
+        for shutdown in app.router.on_shutdown:
+            await shutdown()
+
+
+@asynccontextmanager
+async def _live_client(workers: int) -> AsyncIterator[AsyncClient]:
+    port = _free_port()
+    env = {**os.environ, "BACKEND_RATE_LIMIT_ENABLED": "false"}
+    server = subprocess.Popen(  # noqa: S603
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "backend.web.application:get_app",
+            "--factory",
+            "--host=127.0.0.1",
+            f"--port={port}",
+            f"--workers={workers}",
+            "--no-access-log",
+            "--log-level=warning",
+        ],
+        env=env,
+    )
+    try:
+        async with AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", timeout=30
+        ) as client:
+            await _wait_ready(client, server)
+            yield client
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+async def _wait_ready(client: AsyncClient, server: subprocess.Popen[bytes]) -> None:
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("Server exited during startup")
+        try:
+            response = await client.get("/api/health")
+        except HTTPError:
+            await asyncio.sleep(0.2)
+            continue
+        if response.status_code == 200:
+            return
+    raise RuntimeError("Server didn't start in 30 seconds")
+
+
+async def run(
+    mode: str,
+    workers: int,
+    rows: int,
+    requests: int,
+    concurrency: int,
+) -> dict[str, Any]:
+    """
+    Seed users and measure every scenario.
+
+    :param mode: "asgi" to serve requests in-process, "live" for uvicorn.
+    :param workers: uvicorn workers in live mode.
+    :param rows: number of users to seed.
+    :param requests: requests per scenario.
+    :param concurrency: number of concurrent clients.
+    :returns: run parameters and results by scenario.
+    """
+    load_all_models()
+    await create_database()
+    engine = create_async_engine(str(settings.db_url))
+    async with engine.begin() as conn:
+        await conn.run_sync(meta.create_all)
+        await conn.execute(text(SEED_USERS), {"rows": rows})
+        await conn.execute(text("ANALYZE users"))
+    await engine.dispose()
+
+    clients = _asgi_client() if mode == "asgi" else _live_client(workers)
+    results: dict[str, Result] = {}
+    try:
+        async with clients as client:
+            username, token = await _prepare(client)
+            for scenario in _scenarios(username, token):
+                result = await _measure(client, scenario, requests, concurrency)
+                results[scenario.name] = result
+                print(f"{scenario.name:>16} {_format(result)}")  # noqa: WPS421
+    finally:
+        await drop_database()
+
+    return {
+        "mode": mode,
+        "workers": workers if mode == "live" else 1,
+        "concurrency": concurrency,
+        "rows": rows,
+        "scenarios": {name: result._asdict() for name, result in results.items()},
+    }
+
+
+def _format(result: Result) -> str:
+    return (
+        f"rps={result.rps:>8.1f} p50={result.p50_ms:>8.2f}ms "
+        f"p99={result.p99_ms:>8.2f}ms errors={result.errors}"
+    )
+
+
+def compare(
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+    thresholds: dict[str, float],
+) -> list[str]:
+    """
+    Find scenarios that got slower than the baseline or failed.
+
+    :param current: results of this run.
+    :param baseline: results of the baseline run.
+    :param thresholds: allowed growth by metric, 0.2 is 20%.
+    :returns: descriptions of regressions, empty if there are none.
+    """
+    regressions = []
+    for name, result in current["scenarios"].items():
+        if result["errors"]:
+            regressions.append(f"{name}: {result['errors']} failed requests")
+        expected: Optional[dict[str, Any]] = baseline["scenarios"].get(name)
+        if expected is None:
+            continue
+        for metric, threshold in thresholds.items():
+            limit = expected[metric] * (1 + threshold)
+            if result[metric] > limit:
+                regressions.append(
+                    f"{name}: {metric} {result[metric]:.2f} > {limit:.2f} "
+                    f"(baseline {expected[metric]:.2f})",
+                )
+    return regressions
+
+
+def main() -> None:
+    """Entrypoint of the benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--mode", choices=("asgi", "live"), default="asgi")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--save", type=Path, help="write results as a baseline")
+    parser.add_argument("--compare", type=Path, help="baseline to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument(
+        "--p99-threshold",
+        type=float,
+        help="allowed growth of p99, p99 is noisier (default: --threshold)",
+    )
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    current = asyncio.run(
+        run(args.mode, args.workers, args.rows, args.requests, args.concurrency),
+    )
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_bytes(
+            orjson.dumps(current, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS),
+        )
+    if args.compare:
+        regressions = compare(
+            current,
+            orjson.loads(args.compare.read_bytes()),
+            {
+                "p50_ms": args.threshold,
+                "p99_ms": args.p99_threshold or args.threshold,
+            },
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")  # noqa: WPS421
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
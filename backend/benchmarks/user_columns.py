@@ -0,0 +1,109 @@
+"""
+Measure what a page of users costs with and without the deferred credentials.
+
+For a page loaded with all columns, as before deferring password hashes
+and salts, and with the default columns, prints the column bytes sent by
+the database and the memory taken by the loaded users.
+
+Run it against a throwaway database, it is created and dropped on the way::
+
+    BACKEND_DB_BASE=backend_bench python -m benchmarks.user_columns --page-size 100
+"""
+import argparse
+import asyncio
+import tracemalloc
+from typing import Any
+
+from benchmarks.pagination import SEED_USERS
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import undefer_group
+
+from backend.db.dao.user import CREDENTIALS_GROUP, LOADED_COLUMNS
+from backend.db.meta import meta
+from backend.db.models import load_all_models
+from backend.db.models.user import User
+from backend.db.utils import create_database, drop_database
+from backend.settings import settings
+
+
+async def _page_bytes(engine: AsyncEngine, columns: Any, page_size: int) -> int:
+    page = (
+        select(*columns).order_by(User.created_at, User.id).limit(page_size).subquery()
+    )
+    size = sum(func.coalesce(func.pg_column_size(column), 0) for column in page.c)
+    async with engine.connect() as conn:
+        return await conn.scalar(select(func.sum(size)).select_from(page))
+
+
+async def _page_memory(engine: AsyncEngine, options: Any, page_size: int) -> int:
+    async with AsyncSession(engine) as session:
+        query = (
+            select(User)
+            .options(*options)
+            .order_by(User.created_at, User.id)
+            .limit(page_size)
+        )
+        tracemalloc.start()
+        users = (await session.execute(query)).scalars().all()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del users  # noqa: WPS420
+    return size
+
+
+async def run(rows: int, page_size: int) -> None:
+    """
+    Seed users and print bytes and memory of a page.
+
+    :param rows: number of users to seed.
+    :param page_size: users per page.
+    """
+    load_all_models()
+    await create_database()
+    engine = create_async_engine(str(settings.db_url))
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(meta.create_all)
+            await conn.execute(text(SEED_USERS), {"rows": rows})
+
+        # warm up mapper compilation and the statement cache
+        await _page_memory(engine, [], page_size)
+        await _page_memory(engine, [undefer_group(CREDENTIALS_GROUP)], page_size)
+
+        results = {
+            "all columns": (
+                await _page_bytes(engine, User.__table__.columns, page_size),
+                await _page_memory(
+                    engine,
+                    [undefer_group(CREDENTIALS_GROUP)],
+                    page_size,
+                ),
+            ),
+            "deferred credentials": (
+                await _page_bytes(engine, LOADED_COLUMNS, page_size),
+                await _page_memory(engine, [], page_size),
+            ),
+        }
+    finally:
+        await engine.dispose()
+        await drop_database()
+
+    for name, (page_bytes, memory) in results.items():
+        print(  # noqa: WPS421
+            f"{name:>20}: {page_bytes / page_size:.0f} column bytes per user, "
+            f"{memory / 1024:.1f} KiB memory per page of {page_size}",
+        )
+
+
+def main() -> None:
+    """Entrypoint of the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.page_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Measure latency of GET /api/users/{user_id} served in-process.
+
+The application is started with its real startup hooks against a throwaway
+database, requests go through the ASGI transport::
+
+    BACKEND_DB_BASE=backend_bench python -m benchmarks.user_get --requests 5000
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from backend.db.meta import meta
+from backend.db.models import load_all_models
+from backend.db.utils import create_database, drop_database
+from backend.settings import settings
+from backend.web.application import get_app
+
+
+async def run(requests: int, concurrency: int) -> None:
+    """
+    Create a user and fetch it repeatedly, printing latency percentiles.
+
+    :param requests: number of requests to send.
+    :param concurrency: number of concurrent clients.
+    """
+    load_all_models()
+    await create_database()
+    engine = create_async_engine(str(settings.db_url))
+    async with engine.begin() as conn:
+        await conn.run_sync(meta.create_all)
+    await engine.dispose()
+
+    app = get_app()
+    for startup in app.router.on_startup:
+        await startup()
+    try:
+        async with AsyncClient(app=app, base_url="http://bench") as client:
+            response = await client.post(
+                "/api/users/",
+                json={
+                    "username": "bench",
+                    "email": "bench@example.com",
+                    "password": "x",
+                },
+            )
+            url = f"/api/users/{response.json()['id']}"
+            for _ in range(100):
+                await client.get(url)
+
+            latencies: list[float] = []
+
+            async def _worker(count: int) -> None:  # noqa: WPS430
+                for _ in range(count):
+                    start = time.perf_counter()
+                    await client.get(url)
+                    latencies.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            await asyncio.gather(
+                *(_worker(requests // concurrency) for _ in range(concurrency)),
+            )
+            elapsed = time.perf_counter() - start
+    finally:
+        for shutdown in app.router.on_shutdown:
+            await shutdown()
+        await drop_database()
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(  # noqa: WPS421
+        f"requests={len(latencies)} rps={len(latencies) / elapsed:.0f} "
+        f"p50={quantiles[49]:.2f}ms p99={quantiles[98]:.2f}ms",
+    )
+
+
+def main() -> None:
+    """Entrypoint of the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=1)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(run(args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
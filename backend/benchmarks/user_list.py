@@ -0,0 +1,109 @@
+"""
+Compare CPU time of a GET /api/users page built through the response model
+with the page encoded straight from row tuples.
+
+The response model path is what FastAPI does for ORM objects: load them,
+validate every one through ``schema.User`` and encode the result. CPU time
+of this process is measured, time spent waiting for the database is not.
+
+Run it against a throwaway database, it is created and dropped on the way::
+
+    BACKEND_DB_BASE=backend_bench python -m benchmarks.user_list --pages 2000
+"""
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from benchmarks.pagination import SEED_USERS
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from backend.db.dao.user import UserDAO
+from backend.db.meta import meta
+from backend.db.models import load_all_models
+from backend.db.utils import create_database, drop_database
+from backend.settings import settings
+from backend.web.api.user.endpoints import router
+from backend.web.api.user.schema import USER_COLUMNS, USER_KEYS
+from backend.web.api.user.serialization import rows_to_json
+
+
+async def _cpu_per_page(render: Callable[[], Awaitable[bytes]], pages: int) -> float:
+    for _ in range(pages // 10):
+        await render()
+    start = time.process_time()
+    for _ in range(pages):
+        await render()
+    return (time.process_time() - start) / pages * 1000
+
+
+async def run(rows: int, page_size: int, pages: int) -> None:
+    """
+    Seed users and print CPU time per page of both serialization paths.
+
+    :param rows: number of users to seed.
+    :param page_size: users per page.
+    :param pages: pages rendered by every path.
+    :raises RuntimeError: paths produce different JSON.
+    """
+    load_all_models()
+    await create_database()
+    engine = create_async_engine(str(settings.db_url))
+    route = next(
+        route
+        for route in router.routes
+        if isinstance(route, APIRoute) and route.name == "get_users"
+    )
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(meta.create_all)
+            await conn.execute(text(SEED_USERS), {"rows": rows})
+            await conn.execute(text("ANALYZE users"))
+
+        async with AsyncSession(engine) as session:
+            user_dao = UserDAO(session)
+
+            async def _response_model() -> bytes:  # noqa: WPS430
+                users = await user_dao.get_multi(limit=page_size)
+                content = await serialize_response(
+                    field=route.secure_cloned_response_field,
+                    response_content=users,
+                )
+                session.expunge_all()
+                return ORJSONResponse(content).body
+
+            async def _rows() -> bytes:  # noqa: WPS430
+                rows = await user_dao.get_multi_rows(USER_COLUMNS, limit=page_size)
+                return rows_to_json(USER_KEYS, rows)
+
+            if await _response_model() != await _rows():
+                raise RuntimeError("Row serialization differs from the response model")
+
+            model_ms = await _cpu_per_page(_response_model, pages)
+            rows_ms = await _cpu_per_page(_rows, pages)
+    finally:
+        await engine.dispose()
+        await drop_database()
+
+    print(  # noqa: WPS421
+        f"page of {page_size}: response model {model_ms:.2f} ms CPU, "
+        f"rows {rows_ms:.2f} ms CPU, saved {model_ms - rows_ms:.2f} ms "
+        f"({model_ms / rows_ms:.1f}x)",
+    )
+
+
+def main() -> None:
+    """Entrypoint of the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.page_size, args.pages))
+
+
+if __name__ == "__main__":
+    main()